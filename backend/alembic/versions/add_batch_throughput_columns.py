@@ -0,0 +1,29 @@
+"""add batch throughput columns
+
+Revision ID: add_throughput_002
+Revises: add_cpf_cnpj_001
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_throughput_002'
+down_revision = 'add_cpf_cnpj_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Métricas de vazão do despacho na tabela judit_batches
+    op.add_column('judit_batches', sa.Column('throughput', sa.Float(), nullable=True))
+    op.add_column('judit_batches', sa.Column('iniciado_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('judit_batches', sa.Column('finalizado_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    op.drop_column('judit_batches', 'finalizado_at')
+    op.drop_column('judit_batches', 'iniciado_at')
+    op.drop_column('judit_batches', 'throughput')
@@ -0,0 +1,46 @@
+"""add composite and partial indexes for hot judit queries
+
+Revision ID: add_composite_indexes_011
+Revises: partition_results_010
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_composite_indexes_011'
+down_revision = 'partition_results_010'
+branch_labels = None
+depends_on = None
+
+AGUARDANDO = sa.text("status = 'aguardando'")
+DISPONIVEL = sa.text("status IN ('pendente', 'processando')")
+
+# (nome, tabela, colunas, predicado do índice parcial)
+INDICES = [
+    ('ix_judit_batches_created_at', 'judit_batches', ['created_at'], None),
+    ('ix_judit_requests_batch_id_status', 'judit_requests', ['batch_id', 'status'], None),
+    ('ix_judit_requests_aguardando', 'judit_requests', ['batch_id', 'created_at'], AGUARDANDO),
+    ('ix_judit_results_batch_id_id', 'judit_results', ['batch_id', 'id'], None),
+    ('ix_judit_results_batch_id_status', 'judit_results', ['batch_id', 'status'], None),
+    ('ix_judit_queue_disponivel', 'judit_queue', ['id'], DISPONIVEL),
+    ('ix_judit_queue_batch_disponivel', 'judit_queue', ['batch_id', 'id'], DISPONIVEL),
+    ('ix_judit_webhook_inbox_disponivel', 'judit_webhook_inbox', ['id'], DISPONIVEL),
+]
+
+
+def upgrade():
+    for nome, tabela, colunas, predicado in INDICES:
+        op.create_index(nome, tabela, colunas, postgresql_where=predicado, sqlite_where=predicado)
+    
+    # Estatísticas atualizadas para o planejador escolher os índices novos
+    if op.get_bind().dialect.name == 'postgresql':
+        for tabela in sorted({tabela for _, tabela, _, _ in INDICES}):
+            op.execute(f'ANALYZE {tabela}')
+
+
+def downgrade():
+    for nome, tabela, _, _ in reversed(INDICES):
+        op.drop_index(nome, table_name=tabela)
@@ -0,0 +1,28 @@
+"""add judit_consultas_em_voo.aguardando (response body only kept for waiting workers)
+
+Revision ID: add_consultas_em_voo_aguardando_020
+Revises: add_judit_consultas_em_voo_019
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_consultas_em_voo_aguardando_020'
+down_revision = 'add_judit_consultas_em_voo_019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Workers aguardando a consulta em voo: sem nenhum, o dono só libera a chave (sem gravar o corpo)
+    op.add_column(
+        'judit_consultas_em_voo',
+        sa.Column('aguardando', sa.Integer(), nullable=False, server_default='0')
+    )
+
+
+def downgrade():
+    op.drop_column('judit_consultas_em_voo', 'aguardando')
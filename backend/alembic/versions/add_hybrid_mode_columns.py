@@ -0,0 +1,29 @@
+"""add hybrid mode columns to judit_batches
+
+Revision ID: add_hybrid_mode_012
+Revises: add_composite_indexes_011
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hybrid_mode_012'
+down_revision = 'add_composite_indexes_011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Modo híbrido: banco de dados primeiro, on-demand só para quem precisa (com limite por lote)
+    op.add_column('judit_batches', sa.Column('hibrido', sa.Boolean(), nullable=True, server_default=sa.false()))
+    op.add_column('judit_batches', sa.Column('max_escalonamentos', sa.Integer(), nullable=True))
+    op.add_column('judit_batches', sa.Column('escalonados', sa.Integer(), nullable=True, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('judit_batches', 'escalonados')
+    op.drop_column('judit_batches', 'max_escalonamentos')
+    op.drop_column('judit_batches', 'hibrido')
@@ -0,0 +1,49 @@
+"""add judit cache table
+
+Revision ID: add_judit_cache_004
+Revises: add_judit_queue_003
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_judit_cache_004'
+down_revision = 'add_judit_queue_003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Acertos/erros de cache por lote
+    op.add_column('judit_batches', sa.Column('cache_hits', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('judit_batches', sa.Column('cache_misses', sa.Integer(), nullable=True, server_default='0'))
+    
+    # Cache de consultas /lawsuits entre lotes
+    op.create_table(
+        'judit_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('chave', sa.String(length=64), nullable=False),
+        sa.Column('search_type', sa.String(length=20), nullable=True),
+        sa.Column('search_key', sa.String(length=20), nullable=True),
+        sa.Column('party_documents', sa.String(length=255), nullable=True),
+        sa.Column('with_attachments', sa.Boolean(), nullable=True),
+        sa.Column('qtd_processos', sa.Integer(), nullable=True),
+        sa.Column('processos', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('expira_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_judit_cache_id', 'judit_cache', ['id'])
+    op.create_index('ix_judit_cache_chave', 'judit_cache', ['chave'], unique=True)
+    op.create_index('ix_judit_cache_expira_at', 'judit_cache', ['expira_at'])
+
+
+def downgrade():
+    op.drop_index('ix_judit_cache_expira_at', table_name='judit_cache')
+    op.drop_index('ix_judit_cache_chave', table_name='judit_cache')
+    op.drop_index('ix_judit_cache_id', table_name='judit_cache')
+    op.drop_table('judit_cache')
+    op.drop_column('judit_batches', 'cache_misses')
+    op.drop_column('judit_batches', 'cache_hits')
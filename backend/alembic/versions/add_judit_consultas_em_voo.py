@@ -0,0 +1,38 @@
+"""add judit_consultas_em_voo (coalesce identical Judit calls across worker processes)
+
+Revision ID: add_judit_consultas_em_voo_019
+Revises: add_lawsuits_classe_trgm_018
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_judit_consultas_em_voo_019'
+down_revision = 'add_lawsuits_classe_trgm_018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    json_type = sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')
+
+    # Uma linha por consulta em voo: quem reservou a chave chama a Judit, os demais workers aguardam a resposta
+    op.create_table(
+        'judit_consultas_em_voo',
+        sa.Column('chave', sa.String(length=100), nullable=False),
+        sa.Column('token', sa.String(length=36), nullable=False),
+        sa.Column('worker_id', sa.String(length=100), nullable=True),
+        sa.Column('expira_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('resposta', json_type, nullable=True),
+        sa.Column('concluido_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('chave')
+    )
+
+
+def downgrade():
+    op.drop_table('judit_consultas_em_voo')
@@ -0,0 +1,47 @@
+"""add judit queue table
+
+Revision ID: add_judit_queue_003
+Revises: add_throughput_002
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_judit_queue_003'
+down_revision = 'add_throughput_002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Opção de anexos guardada no lote para que a fila possa ser retomada
+    op.add_column('judit_batches', sa.Column('with_attachments', sa.Boolean(), nullable=True, server_default=sa.true()))
+    
+    # Fila durável de registros por lote
+    op.create_table(
+        'judit_queue',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('batch_id', sa.String(length=100), nullable=False),
+        sa.Column('posicao', sa.Integer(), nullable=True),
+        sa.Column('registro', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('tentativas', sa.Integer(), nullable=True),
+        sa.Column('worker_id', sa.String(length=100), nullable=True),
+        sa.Column('lease_ate', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_judit_queue_id', 'judit_queue', ['id'])
+    op.create_index('ix_judit_queue_batch_id', 'judit_queue', ['batch_id'])
+    op.create_index('ix_judit_queue_status', 'judit_queue', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_judit_queue_status', table_name='judit_queue')
+    op.drop_index('ix_judit_queue_batch_id', table_name='judit_queue')
+    op.drop_index('ix_judit_queue_id', table_name='judit_queue')
+    op.drop_table('judit_queue')
+    op.drop_column('judit_batches', 'with_attachments')
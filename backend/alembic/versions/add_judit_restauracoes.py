@@ -0,0 +1,33 @@
+"""add judit_restauracoes (restored months kept out of retention)
+
+Revision ID: add_judit_restauracoes_016
+Revises: add_pipedrive_documentos_015
+Create Date: 2026-10-18 06:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_judit_restauracoes_016'
+down_revision = 'add_pipedrive_documentos_015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Meses restaurados de arquivo: a retenção não os arquiva de novo antes de expira_em
+    op.create_table(
+        'judit_restauracoes',
+        sa.Column('tabela', sa.String(length=30), nullable=False),
+        sa.Column('mes', sa.Date(), nullable=False),
+        sa.Column('arquivo', sa.String(length=500), nullable=True),
+        sa.Column('restaurado_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('expira_em', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('tabela', 'mes')
+    )
+
+
+def downgrade():
+    op.drop_table('judit_restauracoes')
@@ -0,0 +1,47 @@
+"""add judit webhook inbox table
+
+Revision ID: add_webhook_inbox_006
+Revises: add_request_deal_id_005
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_webhook_inbox_006'
+down_revision = 'add_request_deal_id_005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Caixa de entrada dos callbacks: o endpoint só grava, o processamento é em bloco
+    op.create_table(
+        'judit_webhook_inbox',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('chave', sa.String(length=64), nullable=False),
+        sa.Column('judit_request_id', sa.String(length=100), nullable=True),
+        sa.Column('response_type', sa.String(length=50), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True, server_default='pendente'),
+        sa.Column('tentativas', sa.Integer(), nullable=True, server_default='0'),
+        sa.Column('erro', sa.Text(), nullable=True),
+        sa.Column('worker_id', sa.String(length=100), nullable=True),
+        sa.Column('lease_ate', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('processado_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_judit_webhook_inbox_id', 'judit_webhook_inbox', ['id'])
+    op.create_index('ix_judit_webhook_inbox_chave', 'judit_webhook_inbox', ['chave'], unique=True)
+    op.create_index('ix_judit_webhook_inbox_judit_request_id', 'judit_webhook_inbox', ['judit_request_id'])
+    op.create_index('ix_judit_webhook_inbox_status', 'judit_webhook_inbox', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_judit_webhook_inbox_status', table_name='judit_webhook_inbox')
+    op.drop_index('ix_judit_webhook_inbox_judit_request_id', table_name='judit_webhook_inbox')
+    op.drop_index('ix_judit_webhook_inbox_chave', table_name='judit_webhook_inbox')
+    op.drop_index('ix_judit_webhook_inbox_id', table_name='judit_webhook_inbox')
+    op.drop_table('judit_webhook_inbox')
@@ -0,0 +1,43 @@
+"""add content-addressed lawsuit blobs
+
+Revision ID: add_lawsuit_blobs_009
+Revises: add_result_payloads_008
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_lawsuit_blobs_009'
+down_revision = 'add_result_payloads_008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    json_type = sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')
+    
+    # Cada processo gravado uma vez, endereçado por sha256(CNJ + conteúdo)
+    op.create_table(
+        'judit_lawsuit_blobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('cnj', sa.String(length=30), nullable=True),
+        sa.Column('dados', json_type, nullable=False),
+        sa.Column('refcount', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_judit_lawsuit_blobs_id', 'judit_lawsuit_blobs', ['id'])
+    op.create_index('ix_judit_lawsuit_blobs_hash', 'judit_lawsuit_blobs', ['hash'], unique=True)
+    op.create_index('ix_judit_lawsuit_blobs_cnj', 'judit_lawsuit_blobs', ['cnj'])
+    
+    # IDs dos blobs na ordem original dos processos do resultado
+    op.add_column('judit_results', sa.Column('processos_blobs', json_type, nullable=True))
+
+
+def downgrade():
+    op.drop_column('judit_results', 'processos_blobs')
+    op.drop_table('judit_lawsuit_blobs')
@@ -0,0 +1,80 @@
+"""add normalized lawsuit tables
+
+Revision ID: add_lawsuits_007
+Revises: add_webhook_inbox_006
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_lawsuits_007'
+down_revision = 'add_webhook_inbox_006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Um processo por número CNJ, com as colunas usadas nos filtros
+    op.create_table(
+        'lawsuits',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('cnj', sa.String(length=30), nullable=False),
+        sa.Column('nome', sa.Text(), nullable=True),
+        sa.Column('tribunal', sa.String(length=20), nullable=True),
+        sa.Column('justica', sa.String(length=50), nullable=True),
+        sa.Column('instancia', sa.String(length=20), nullable=True),
+        sa.Column('classe', sa.String(length=255), nullable=True),
+        sa.Column('assunto', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('fase', sa.String(length=100), nullable=True),
+        sa.Column('valor', sa.Float(), nullable=True),
+        sa.Column('data_distribuicao', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_lawsuits_id', 'lawsuits', ['id'])
+    op.create_index('ix_lawsuits_cnj', 'lawsuits', ['cnj'], unique=True)
+    op.create_index('ix_lawsuits_tribunal', 'lawsuits', ['tribunal'])
+    op.create_index('ix_lawsuits_classe', 'lawsuits', ['classe'])
+    op.create_index('ix_lawsuits_status', 'lawsuits', ['status'])
+    op.create_index('ix_lawsuits_data_distribuicao', 'lawsuits', ['data_distribuicao'])
+    op.create_index('ix_lawsuits_tribunal_status', 'lawsuits', ['tribunal', 'status'])
+    
+    op.create_table(
+        'lawsuit_parties',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('lawsuit_id', sa.Integer(), nullable=False),
+        sa.Column('nome', sa.String(length=255), nullable=True),
+        sa.Column('documento', sa.String(length=20), nullable=True),
+        sa.Column('lado', sa.String(length=20), nullable=True),
+        sa.Column('tipo', sa.String(length=50), nullable=True),
+    )
+    op.create_index('ix_lawsuit_parties_id', 'lawsuit_parties', ['id'])
+    op.create_index('ix_lawsuit_parties_lawsuit_id', 'lawsuit_parties', ['lawsuit_id'])
+    op.create_index('ix_lawsuit_parties_documento', 'lawsuit_parties', ['documento'])
+    
+    # Vínculo resultado (registro/negócio de um lote) -> processo
+    op.create_table(
+        'judit_result_lawsuits',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('result_id', sa.Integer(), nullable=False),
+        sa.Column('lawsuit_id', sa.Integer(), nullable=False),
+        sa.Column('batch_id', sa.String(length=100), nullable=False),
+        sa.Column('deal_id', sa.String(length=20), nullable=True),
+        sa.UniqueConstraint('result_id', 'lawsuit_id', name='uq_judit_result_lawsuits'),
+    )
+    op.create_index('ix_judit_result_lawsuits_id', 'judit_result_lawsuits', ['id'])
+    op.create_index('ix_judit_result_lawsuits_result_id', 'judit_result_lawsuits', ['result_id'])
+    op.create_index('ix_judit_result_lawsuits_lawsuit_id', 'judit_result_lawsuits', ['lawsuit_id'])
+    op.create_index('ix_judit_result_lawsuits_batch_id', 'judit_result_lawsuits', ['batch_id'])
+    op.create_index('ix_judit_result_lawsuits_deal_id', 'judit_result_lawsuits', ['deal_id'])
+
+
+def downgrade():
+    op.drop_table('judit_result_lawsuits')
+    op.drop_table('lawsuit_parties')
+    op.drop_table('lawsuits')
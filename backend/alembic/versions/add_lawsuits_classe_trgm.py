@@ -0,0 +1,30 @@
+"""trigram index for lawsuit class search
+
+Revision ID: add_lawsuits_classe_trgm_018
+Revises: add_judit_restauracoes_016
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_lawsuits_classe_trgm_018'
+down_revision = 'add_judit_restauracoes_016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /processos?classe= busca trecho (ILIKE '%...%'): o btree não é usado
+    op.drop_index('ix_lawsuits_classe', table_name='lawsuits')
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE INDEX ix_lawsuits_classe_trgm ON lawsuits USING gin (classe gin_trgm_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_lawsuits_classe_trgm', table_name='lawsuits')
+    op.create_index('ix_lawsuits_classe', 'lawsuits', ['classe'])
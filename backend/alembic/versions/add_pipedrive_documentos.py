@@ -0,0 +1,50 @@
+"""add pipedrive_documentos (CPF/CNPJ index)
+
+Revision ID: add_pipedrive_documentos_015
+Revises: add_pipedrive_webhook_014
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_pipedrive_documentos_015'
+down_revision = 'add_pipedrive_webhook_014'
+branch_labels = None
+depends_on = None
+
+# Documentos já espelhados: um por valor do campo (separados por , ; | ou quebra de linha), só dígitos
+BACKFILL = """
+INSERT INTO pipedrive_documentos (documento, entidade, entidade_id, tipo)
+SELECT DISTINCT documento, '{entidade}', id, CASE length(documento) WHEN 11 THEN 'cpf' ELSE 'cnpj' END
+FROM (
+    SELECT id, regexp_replace(parte, '\\D', '', 'g') AS documento
+    FROM {tabela}, regexp_split_to_table({coluna}, '[,;|\\n]+') AS parte
+    WHERE {coluna} IS NOT NULL
+) documentos
+WHERE length(documento) IN (11, 14)
+"""
+
+
+def upgrade():
+    # Índice de CPF/CNPJ normalizado das pessoas e organizações do espelho
+    op.create_table(
+        'pipedrive_documentos',
+        sa.Column('documento', sa.String(length=14), nullable=False),
+        sa.Column('entidade', sa.String(length=20), nullable=False),
+        sa.Column('entidade_id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('tipo', sa.String(length=4), nullable=False),
+        sa.PrimaryKeyConstraint('documento', 'entidade', 'entidade_id')
+    )
+    op.create_index('ix_pipedrive_documentos_entidade', 'pipedrive_documentos', ['entidade', 'entidade_id'])
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(BACKFILL.format(entidade='person', tabela='pipedrive_persons', coluna='cpf'))
+        op.execute(BACKFILL.format(entidade='organization', tabela='pipedrive_organizations', coluna='cnpj'))
+
+
+def downgrade():
+    op.drop_index('ix_pipedrive_documentos_entidade', table_name='pipedrive_documentos')
+    op.drop_table('pipedrive_documentos')
@@ -0,0 +1,129 @@
+"""add pipedrive mirror tables
+
+Revision ID: add_pipedrive_mirror_013
+Revises: add_hybrid_mode_012
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_pipedrive_mirror_013'
+down_revision = 'add_hybrid_mode_012'
+branch_labels = None
+depends_on = None
+
+JSON = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def _colunas_espelho():
+    return [
+        sa.Column('dados', JSON, nullable=True),
+        sa.Column('sincronizado_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    ]
+
+
+def upgrade():
+    # Espelho local do Pipedrive: IDs do Pipedrive, registro completo em `dados`
+    op.create_table(
+        'pipedrive_deals',
+        sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('value', sa.Float(), nullable=True),
+        sa.Column('currency', sa.String(length=10), nullable=True),
+        sa.Column('pipeline_id', sa.Integer(), nullable=True),
+        sa.Column('stage_id', sa.Integer(), nullable=True),
+        sa.Column('person_id', sa.BigInteger(), nullable=True),
+        sa.Column('person_name', sa.String(length=255), nullable=True),
+        sa.Column('org_id', sa.BigInteger(), nullable=True),
+        sa.Column('org_name', sa.String(length=255), nullable=True),
+        sa.Column('owner_name', sa.String(length=255), nullable=True),
+        sa.Column('add_time', sa.String(length=30), nullable=True),
+        sa.Column('update_time', sa.DateTime(timezone=True), nullable=True),
+        *_colunas_espelho(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pipedrive_deals_status', 'pipedrive_deals', ['status'])
+    op.create_index('ix_pipedrive_deals_pipeline_id', 'pipedrive_deals', ['pipeline_id'])
+    op.create_index('ix_pipedrive_deals_person_id', 'pipedrive_deals', ['person_id'])
+    op.create_index('ix_pipedrive_deals_org_id', 'pipedrive_deals', ['org_id'])
+    op.create_index('ix_pipedrive_deals_titulo_lower', 'pipedrive_deals', [sa.text('lower(title)')])
+
+    op.create_table(
+        'pipedrive_persons',
+        sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('org_id', sa.BigInteger(), nullable=True),
+        sa.Column('cpf', sa.String(length=255), nullable=True),
+        sa.Column('update_time', sa.DateTime(timezone=True), nullable=True),
+        *_colunas_espelho(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pipedrive_persons_org_id', 'pipedrive_persons', ['org_id'])
+
+    op.create_table(
+        'pipedrive_organizations',
+        sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('cnpj', sa.String(length=255), nullable=True),
+        sa.Column('update_time', sa.DateTime(timezone=True), nullable=True),
+        *_colunas_espelho(),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'pipedrive_pipelines',
+        sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        *_colunas_espelho(),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'pipedrive_filters',
+        sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('type', sa.String(length=20), nullable=True),
+        *_colunas_espelho(),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_table(
+        'pipedrive_filter_deals',
+        sa.Column('filtro_id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('deal_id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.PrimaryKeyConstraint('filtro_id', 'deal_id')
+    )
+    op.create_index('ix_pipedrive_filter_deals_deal_id', 'pipedrive_filter_deals', ['deal_id'])
+
+    op.create_table(
+        'pipedrive_sync',
+        sa.Column('entidade', sa.String(length=30), nullable=False),
+        sa.Column('ultimo_update_time', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completo_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('sincronizado_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('registros', sa.Integer(), nullable=True),
+        sa.Column('erro', sa.String(length=500), nullable=True),
+        sa.PrimaryKeyConstraint('entidade')
+    )
+
+
+def downgrade():
+    op.drop_table('pipedrive_sync')
+    op.drop_index('ix_pipedrive_filter_deals_deal_id', table_name='pipedrive_filter_deals')
+    op.drop_table('pipedrive_filter_deals')
+    op.drop_table('pipedrive_filters')
+    op.drop_table('pipedrive_pipelines')
+    op.drop_table('pipedrive_organizations')
+    op.drop_index('ix_pipedrive_persons_org_id', table_name='pipedrive_persons')
+    op.drop_table('pipedrive_persons')
+    op.drop_index('ix_pipedrive_deals_titulo_lower', table_name='pipedrive_deals')
+    op.drop_index('ix_pipedrive_deals_org_id', table_name='pipedrive_deals')
+    op.drop_index('ix_pipedrive_deals_person_id', table_name='pipedrive_deals')
+    op.drop_index('ix_pipedrive_deals_pipeline_id', table_name='pipedrive_deals')
+    op.drop_index('ix_pipedrive_deals_status', table_name='pipedrive_deals')
+    op.drop_table('pipedrive_deals')
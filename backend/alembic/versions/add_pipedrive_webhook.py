@@ -0,0 +1,61 @@
+"""add pipedrive webhook tables
+
+Revision ID: add_pipedrive_webhook_014
+Revises: add_pipedrive_mirror_013
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_pipedrive_webhook_014'
+down_revision = 'add_pipedrive_mirror_013'
+branch_labels = None
+depends_on = None
+
+JSON = sa.JSON().with_variant(postgresql.JSONB(), "postgresql")
+
+
+def upgrade():
+    # Último evento aplicado por registro (ordem por meta.timestamp e marca de exclusão)
+    op.create_table(
+        'pipedrive_webhook_versoes',
+        sa.Column('objeto', sa.String(length=20), nullable=False),
+        sa.Column('objeto_id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('evento_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('acao', sa.String(length=20), nullable=True),
+        sa.PrimaryKeyConstraint('objeto', 'objeto_id')
+    )
+    op.create_index('ix_pipedrive_webhook_versoes_evento_at', 'pipedrive_webhook_versoes', ['evento_at'])
+
+    # Dead-letter dos eventos que não puderam ser aplicados
+    op.create_table(
+        'pipedrive_webhook_falhas',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chave', sa.String(length=64), nullable=False),
+        sa.Column('objeto', sa.String(length=20), nullable=True),
+        sa.Column('objeto_id', sa.BigInteger(), nullable=True),
+        sa.Column('acao', sa.String(length=20), nullable=True),
+        sa.Column('payload', JSON, nullable=True),
+        sa.Column('erro', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('tentativas', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('reprocessado_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_pipedrive_webhook_falhas_id', 'pipedrive_webhook_falhas', ['id'])
+    op.create_index('ix_pipedrive_webhook_falhas_chave', 'pipedrive_webhook_falhas', ['chave'], unique=True)
+    op.create_index('ix_pipedrive_webhook_falhas_status', 'pipedrive_webhook_falhas', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_pipedrive_webhook_falhas_status', table_name='pipedrive_webhook_falhas')
+    op.drop_index('ix_pipedrive_webhook_falhas_chave', table_name='pipedrive_webhook_falhas')
+    op.drop_index('ix_pipedrive_webhook_falhas_id', table_name='pipedrive_webhook_falhas')
+    op.drop_table('pipedrive_webhook_falhas')
+    op.drop_index('ix_pipedrive_webhook_versoes_evento_at', table_name='pipedrive_webhook_versoes')
+    op.drop_table('pipedrive_webhook_versoes')
@@ -0,0 +1,25 @@
+"""add deal_id to judit requests
+
+Revision ID: add_request_deal_id_005
+Revises: add_judit_cache_004
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_request_deal_id_005'
+down_revision = 'add_judit_cache_004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Requisições coalescidas compartilham o judit_request_id; o deal_id identifica cada registro de origem
+    op.add_column('judit_requests', sa.Column('deal_id', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    op.drop_column('judit_requests', 'deal_id')
@@ -0,0 +1,61 @@
+"""store judit processos as jsonb and compress large payloads
+
+Revision ID: add_result_payloads_008
+Revises: add_lawsuits_007
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_result_payloads_008'
+down_revision = 'add_lawsuits_007'
+branch_labels = None
+depends_on = None
+
+# Colunas JSON que passam a JSONB no PostgreSQL (tabela, coluna, índice GIN)
+COLUNAS_JSONB = [
+    ('judit_results', 'processos', 'ix_judit_results_processos_gin'),
+    ('judit_cache', 'processos', None),
+    ('lawsuits', 'payload', 'ix_lawsuits_payload_gin'),
+]
+
+
+def upgrade():
+    op.add_column(
+        'judit_results',
+        sa.Column('processos_comprimidos', sa.Boolean(), nullable=True, server_default=sa.false())
+    )
+    
+    # Processos grandes comprimidos (zstd/zlib), lidos só quando pedidos
+    op.create_table(
+        'judit_result_payloads',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('result_id', sa.Integer(), nullable=False),
+        sa.Column('codec', sa.String(length=10), nullable=False),
+        sa.Column('tamanho_original', sa.Integer(), nullable=True),
+        sa.Column('dados', sa.LargeBinary(), nullable=False),
+    )
+    op.create_index('ix_judit_result_payloads_id', 'judit_result_payloads', ['id'])
+    op.create_index('ix_judit_result_payloads_result_id', 'judit_result_payloads', ['result_id'], unique=True)
+    
+    # JSONB: armazenamento binário (TOAST comprimido) e índices GIN para buscas por conteúdo
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for tabela, coluna, indice in COLUNAS_JSONB:
+        op.execute(f'ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE JSONB USING {coluna}::jsonb')
+        if indice:
+            op.execute(f'CREATE INDEX {indice} ON {tabela} USING gin ({coluna} jsonb_path_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for tabela, coluna, indice in COLUNAS_JSONB:
+            if indice:
+                op.drop_index(indice, table_name=tabela)
+            op.execute(f'ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE JSON USING {coluna}::json')
+    
+    op.drop_table('judit_result_payloads')
+    op.drop_column('judit_results', 'processos_comprimidos')
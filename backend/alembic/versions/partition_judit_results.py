@@ -0,0 +1,115 @@
+"""partition judit_results and judit_requests by month
+
+Revision ID: partition_results_010
+Revises: add_lawsuit_blobs_009
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'partition_results_010'
+down_revision = 'add_lawsuit_blobs_009'
+branch_labels = None
+depends_on = None
+
+# Meses criados à frente do mês atual (os seguintes são criados pela aplicação)
+MESES_A_FRENTE = 3
+
+# tabela -> (coluna de partição, índices recriados na tabela particionada)
+TABELAS = {
+    'judit_results': ('processado_at', [
+        'CREATE INDEX ix_judit_results_id ON judit_results (id)',
+        'CREATE INDEX ix_judit_results_batch_id ON judit_results (batch_id)',
+        'CREATE INDEX ix_judit_results_request_id ON judit_results (request_id)',
+        'CREATE INDEX ix_judit_results_processos_gin ON judit_results USING gin (processos jsonb_path_ops)',
+    ]),
+    'judit_requests': ('created_at', [
+        'CREATE INDEX ix_judit_requests_id ON judit_requests (id)',
+        'CREATE INDEX ix_judit_requests_batch_id ON judit_requests (batch_id)',
+        # Único por partição: a chave de partição precisa fazer parte da constraint
+        'CREATE UNIQUE INDEX ix_judit_requests_request_id ON judit_requests (request_id, created_at)',
+        'CREATE INDEX ix_judit_requests_judit_request_id ON judit_requests (judit_request_id)',
+    ]),
+}
+
+
+def _somar_mes(mes, meses=1):
+    total = mes.year * 12 + mes.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _particionar(tabela, coluna, indices):
+    bind = op.get_bind()
+    antiga = f'{tabela}_legacy'
+
+    op.execute(f'ALTER TABLE {tabela} RENAME TO {antiga}')
+    op.execute(f'ALTER TABLE {antiga} RENAME CONSTRAINT {tabela}_pkey TO {antiga}_pkey')
+    op.execute(f'UPDATE {antiga} SET {coluna} = now() WHERE {coluna} IS NULL')
+    op.execute(
+        f'CREATE TABLE {tabela} (LIKE {antiga} INCLUDING DEFAULTS) '
+        f'PARTITION BY RANGE ({coluna})'
+    )
+    op.execute(f'ALTER TABLE {tabela} ALTER COLUMN {coluna} SET NOT NULL')
+    op.execute(f'ALTER TABLE {tabela} ADD PRIMARY KEY (id, {coluna})')
+
+    # Uma partição por mês, do registro mais antigo até MESES_A_FRENTE meses à frente
+    inicio = bind.execute(sa.text(f'SELECT min({coluna}) FROM {antiga}')).scalar()
+    hoje = date.today().replace(day=1)
+    mes = date(inicio.year, inicio.month, 1) if inicio else hoje
+    while mes <= _somar_mes(hoje, MESES_A_FRENTE):
+        proximo = _somar_mes(mes)
+        op.execute(
+            f"CREATE TABLE {tabela}_{mes:%Y_%m} PARTITION OF {tabela} "
+            f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{proximo.isoformat()}')"
+        )
+        mes = proximo
+    op.execute(f'CREATE TABLE {tabela}_default PARTITION OF {tabela} DEFAULT')
+
+    op.execute(f'INSERT INTO {tabela} SELECT * FROM {antiga}')
+
+    # A sequência do id passa para a nova tabela antes de remover a antiga
+    op.execute(f'ALTER SEQUENCE {tabela}_id_seq OWNED BY {tabela}.id')
+    op.execute(f'DROP TABLE {antiga}')
+    for indice in indices:
+        op.execute(indice)
+
+
+def _desparticionar(tabela):
+    antiga = f'{tabela}_particionada'
+
+    op.execute(f'ALTER TABLE {tabela} RENAME TO {antiga}')
+    op.execute(f'ALTER TABLE {antiga} RENAME CONSTRAINT {tabela}_pkey TO {antiga}_pkey')
+    op.execute(f'CREATE TABLE {tabela} (LIKE {antiga} INCLUDING DEFAULTS)')
+    op.execute(f'ALTER TABLE {tabela} ADD PRIMARY KEY (id)')
+    op.execute(f'INSERT INTO {tabela} SELECT * FROM {antiga}')
+    op.execute(f'ALTER SEQUENCE {tabela}_id_seq OWNED BY {tabela}.id')
+    op.execute(f'DROP TABLE {antiga} CASCADE')
+
+
+def upgrade():
+    # Particionamento declarativo só existe no PostgreSQL
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for tabela, (coluna, indices) in TABELAS.items():
+        _particionar(tabela, coluna, indices)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _desparticionar('judit_results')
+    op.execute('CREATE INDEX ix_judit_results_id ON judit_results (id)')
+    op.execute('CREATE INDEX ix_judit_results_batch_id ON judit_results (batch_id)')
+    op.execute('CREATE INDEX ix_judit_results_request_id ON judit_results (request_id)')
+    op.execute('CREATE INDEX ix_judit_results_processos_gin ON judit_results USING gin (processos jsonb_path_ops)')
+
+    _desparticionar('judit_requests')
+    op.execute('CREATE INDEX ix_judit_requests_id ON judit_requests (id)')
+    op.execute('CREATE INDEX ix_judit_requests_batch_id ON judit_requests (batch_id)')
+    op.execute('CREATE UNIQUE INDEX ix_judit_requests_request_id ON judit_requests (request_id)')
+    op.execute('CREATE INDEX ix_judit_requests_judit_request_id ON judit_requests (judit_request_id)')
@@ -0,0 +1,28 @@
+"""purge judit_queue.registro of finished items
+
+Revision ID: purge_judit_queue_registros_021
+Revises: add_consultas_em_voo_aguardando_020
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'purge_judit_queue_registros_021'
+down_revision = 'add_consultas_em_voo_aguardando_020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Itens finalizados não leem mais a linha da planilha; novos já são finalizados sem ela
+    op.execute(
+        "UPDATE judit_queue SET registro = NULL "
+        "WHERE status NOT IN ('pendente', 'processando') AND registro IS NOT NULL"
+    )
+
+
+def downgrade():
+    # Os registros descartados não podem ser recuperados
+    pass
@@ -11,6 +11,7 @@ from app.core.config import settings
 from app.core.security import verify_token
 from app.db.base import get_db
 from app.models.user import User
+from app.services.pipedrive import PipedriveAPI, obter_cliente
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -98,3 +99,22 @@ def get_current_superuser(
             detail="Permissões insuficientes"
         )
     return current_user
+
+
+def get_pipedrive_api() -> PipedriveAPI:
+    """
+    Cliente Pipedrive compartilhado pelo processo
+    
+    Returns:
+        PipedriveAPI criado na inicialização da API (sessão e conexões reaproveitadas)
+        
+    Raises:
+        HTTPException: Se as credenciais do Pipedrive não estiverem configuradas
+    """
+    try:
+        return obter_cliente()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
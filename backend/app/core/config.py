@@ -31,15 +31,83 @@ class Settings(BaseSettings):
     JUDIT_API_KEY: str = ""
     ESCAVADOR_API_TOKEN: str = ""
     
+    # Judit - despacho de lotes
+    JUDIT_MAX_CONCORRENCIA: int = 10  # Requisições simultâneas em voo
+    JUDIT_REQUISICOES_POR_SEGUNDO: float = 5.0  # Taxa inicial do limitador adaptativo
+    JUDIT_COALESCENCIA_LEASE_SEGUNDOS: int = 120  # Reserva de uma consulta entre workers; sem resposta até aqui, outro processo assume (0 = só dentro do processo)
+    JUDIT_COALESCENCIA_ESPERA_MS: int = 200  # Intervalo entre verificações de quem aguarda a consulta de outro worker
+    
+    # Judit - modo híbrido (banco de dados com escalonamento para on-demand)
+    JUDIT_HIBRIDO_MAX_ESCALONAMENTOS_PCT: float = 20.0  # Limite padrão por lote, em % dos registros
+    JUDIT_HIBRIDO_DESATUALIZADO_DIAS: int = 30  # Processos sem atualização há mais que isso são reconsultados (0 = só sem resultados)
+    
+    # Judit - fila durável
+    JUDIT_FILA_LEASE_SEGUNDOS: int = 300  # Tempo até um item reivindicado voltar para a fila
+    JUDIT_FILA_TAMANHO_LOTE: int = 50  # Itens reivindicados por vez
+    JUDIT_FILA_MAX_TENTATIVAS: int = 3  # Reivindicações antes de desistir do item
+    JUDIT_GRAVACAO_MAX_LINHAS: int = 200  # Resultados acumulados antes de gravar em bloco
+    JUDIT_GRAVACAO_INTERVALO_MS: int = 500  # Intervalo máximo entre gravações em bloco
+    JUDIT_INBOX_TAMANHO_LOTE: int = 100  # Callbacks do webhook processados por vez
+    JUDIT_INBOX_INTERVALO_SEGUNDOS: float = 60.0  # Com WORKER_EMBUTIDO, varredura dos callbacks pendentes ou com lease vencido (0 desativa)
+    
+    # Judit - reconciliação de requisições sem callback e lotes parados
+    JUDIT_RECONCILIACAO_INTERVALO_MINUTOS: float = 10.0  # Intervalo da varredura (0 desativa)
+    JUDIT_RECONCILIACAO_AGUARDANDO_MINUTOS: int = 30  # Idade a partir da qual a requisição é consultada na Judit
+    JUDIT_RECONCILIACAO_REENVIO_HORAS: float = 24.0  # Ainda pendente na Judit após isso: a busca é reenfileirada
+    JUDIT_RECONCILIACAO_TAMANHO_LOTE: int = 200  # Requisições da Judit consultadas por varredura
+    
+    # Judit - cache de consultas entre lotes
+    JUDIT_CACHE_TTL_HORAS: float = 24.0  # 0 desativa o cache
+    JUDIT_CACHE_LRU_TAMANHO: int = 5000  # Entradas em memória por processo (0 = só Postgres)
+    
+    # Judit - armazenamento dos processos
+    JUDIT_DEDUPLICAR_PROCESSOS: bool = True  # Cada processo gravado uma vez em judit_lawsuit_blobs
+    JUDIT_COMPRIMIR_PROCESSOS_ACIMA_KB: int = 0  # Sem deduplicação: processos maiores vão comprimidos para judit_result_payloads (0 desativa)
+    
+    # Judit - listagem de lotes (/batches)
+    JUDIT_BATCHES_CACHE_SEGUNDOS: float = 10.0  # Validade das páginas em cache (0 desativa)
+    
+    # Judit - particionamento mensal e retenção (judit_results / judit_requests)
+    JUDIT_RETENCAO_MESES: int = 0  # Meses mantidos no banco; os anteriores vão para arquivo (0 desativa)
+    JUDIT_ARQUIVO_DIR: str = "arquivo_judit"  # Diretório dos arquivos Parquet/NDJSON.gz
+    JUDIT_PARTICOES_A_FRENTE: int = 3  # Partições mensais criadas antecipadamente
+    JUDIT_MANUTENCAO_INTERVALO_HORAS: float = 6.0  # Intervalo da manutenção de partições no worker
+    JUDIT_RESTAURACAO_DIAS: float = 30.0  # Dias que um mês restaurado fica no banco antes de voltar a ser arquivado
+    
+    # Worker (python -m app.worker)
+    WORKER_EMBUTIDO: bool = True  # False: a API só enfileira, o worker separado processa
+    WORKER_PROCESSOS: int = 2
+    WORKER_INTERVALO_OCIOSO: float = 2.0  # Segundos entre verificações com a fila vazia
+    WORKER_TEMPO_ENCERRAMENTO: int = 60  # Segundos para terminar itens em andamento ao parar
+    
     # Pipedrive
     PIPEDRIVE_API_KEY: str = ""
     PIPEDRIVE_DOMAIN: str = ""
+    PIPEDRIVE_REQUISICOES_POR_SEGUNDO: float = 8.0
+    PIPEDRIVE_MAX_CONCORRENCIA: int = 8  # Requisições simultâneas ao carregar pessoas/organizações em lote
+    PIPEDRIVE_POOL_CONEXOES: int = 16  # Conexões keep-alive mantidas com o Pipedrive (>= PIPEDRIVE_MAX_CONCORRENCIA)
+    
+    # Pipedrive - espelho local (negócios, pessoas, organizações, funis e filtros)
+    PIPEDRIVE_ESPELHO_INTERVALO_MINUTOS: float = 5.0  # Intervalo da sincronização incremental (0 desativa)
+    PIPEDRIVE_ESPELHO_COMPLETO_HORAS: float = 24.0  # Carga completa periódica, remove o que foi apagado (0 = só a inicial)
+    PIPEDRIVE_ESPELHO_FILTROS_MINUTOS: float = 60.0  # Intervalo da releitura dos negócios de cada filtro ".API"
+    PIPEDRIVE_INDICE_CACHE_SEGUNDOS: float = 60.0  # Validade do índice de CPF/CNPJ em memória (check-pipedrive)
+    PIPEDRIVE_WEBHOOK_USUARIO: str = ""  # HTTP Basic configurado no webhook do Pipedrive (obrigatório: sem ele o webhook recusa os eventos)
+    PIPEDRIVE_WEBHOOK_SENHA: str = ""
     
     # Assertiva
     ASSERTIVA_CLIENT_ID: str = ""
     ASSERTIVA_CLIENT_SECRET: str = ""
     ASSERTIVA_BASE_URL: str = "https://api.assertivasolucoes.com.br"
     ASSERTIVA_AUTH_URL: str = "https://api.assertivasolucoes.com.br/oauth2/v3/token"
+    ASSERTIVA_REQUISICOES_POR_SEGUNDO: float = 2.0
+    
+    # Invertexto
+    INVERTEXTO_REQUISICOES_POR_SEGUNDO: float = 1.0
+    
+    # Limitador de taxa adaptativo (todos os provedores)
+    RATE_LIMIT_FATOR_MAXIMO: float = 4.0  # Taxa máxima = taxa inicial x fator
+    RATE_LIMIT_MAX_TENTATIVAS: int = 5  # Tentativas por requisição em caso de 429/503
     
     # CORS
     CORS_ORIGINS: str = '["https://processoscanpro.atendimentorapido.app.br", "http://localhost:3000", "http://localhost:5173"]'
@@ -1,21 +1,101 @@
 """
 Aplicação principal FastAPI
 """
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.db.base import engine, Base
 from app.api.routes import auth
 from app.routers import dados, pipedrive, judit
+from app.services.judit_progress import barramento_progresso
+from app.services import judit_retention, pipedrive_sync
+from app.services.pipedrive import obter_cliente, fechar_cliente
 
 # Cria tabelas no banco de dados
 Base.metadata.create_all(bind=engine)
 
+
+async def reconciliar_periodicamente(intervalo: float):
+    """Reconcilia requisições sem callback e lotes parados a cada `intervalo` segundos"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, judit.judit_service.reconciliar)
+        await asyncio.sleep(intervalo)
+
+
+async def processar_inbox_periodicamente(intervalo: float):
+    """Reprocessa os callbacks pendentes ou com lease vencido a cada `intervalo` segundos"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(intervalo)
+        await loop.run_in_executor(None, judit.judit_service.processar_inbox)
+
+
+async def sincronizar_pipedrive_periodicamente(intervalo: float):
+    """Mantém o espelho local do Pipedrive atualizado a cada `intervalo` segundos"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await loop.run_in_executor(None, pipedrive_sync.sincronizar)
+        await asyncio.sleep(intervalo)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicialização e encerramento da aplicação"""
+    reconciliacao = None
+    inbox = None
+    espelho = None
+    # Cliente Pipedrive único (sessão com pool keep-alive) injetado nas rotas via Depends
+    if settings.PIPEDRIVE_API_KEY:
+        try:
+            obter_cliente()
+        except ValueError as e:
+            print(f"[PIPEDRIVE] Cliente não criado: {e}")
+    
+    # Retoma itens da fila e callbacks do webhook deixados para trás por um restart/deploy
+    # (com WORKER_EMBUTIDO=false quem drena a fila é o python -m app.worker)
+    if settings.WORKER_EMBUTIDO:
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, judit.judit_service.processar_fila)
+        loop.run_in_executor(None, judit.judit_service.processar_inbox)
+        # Callbacks que chegaram antes da requisição ser gravada voltam após o lease,
+        # mesmo que nenhum outro webhook chegue
+        if settings.JUDIT_INBOX_INTERVALO_SEGUNDOS > 0:
+            inbox = asyncio.create_task(processar_inbox_periodicamente(settings.JUDIT_INBOX_INTERVALO_SEGUNDOS))
+        # Próximas partições mensais e retenção (o worker separado repete periodicamente)
+        loop.run_in_executor(None, judit_retention.manutencao)
+        # Requisições cujo callback nunca chegou e lotes parados por uma queda
+        if settings.JUDIT_RECONCILIACAO_INTERVALO_MINUTOS > 0:
+            reconciliacao = asyncio.create_task(
+                reconciliar_periodicamente(settings.JUDIT_RECONCILIACAO_INTERVALO_MINUTOS * 60)
+            )
+        # Espelho local do Pipedrive (carga completa na primeira vez, depois incremental)
+        if settings.PIPEDRIVE_ESPELHO_INTERVALO_MINUTOS > 0 and settings.PIPEDRIVE_API_KEY:
+            espelho = asyncio.create_task(
+                sincronizar_pipedrive_periodicamente(settings.PIPEDRIVE_ESPELHO_INTERVALO_MINUTOS * 60)
+            )
+    
+    # Progresso publicado pelo worker/outras instâncias (NOTIFY, só PostgreSQL)
+    barramento_progresso.iniciar_escuta(engine)
+    yield
+    if reconciliacao:
+        reconciliacao.cancel()
+    if inbox:
+        inbox.cancel()
+    if espelho:
+        espelho.cancel()
+    barramento_progresso.parar_escuta()
+    fechar_cliente()
+
+
 # Cria aplicação FastAPI
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # Configuração CORS
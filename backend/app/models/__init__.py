@@ -1,4 +1,20 @@
 # Models package
-from .judit import JuditBatch, JuditRequest, JuditResult
+from .judit import (
+    JuditBatch, JuditRequest, JuditResult, JuditQueueItem, JuditCache, JuditWebhookInbox,
+    JuditLawsuit, JuditLawsuitParty, JuditResultLawsuit, JuditResultPayload, JuditLawsuitBlob, JuditRestauracao,
+    JuditConsultaEmVoo
+)
+from .pipedrive import (
+    PipedriveDeal, PipedrivePerson, PipedriveOrganization, PipedrivePipeline,
+    PipedriveFilter, PipedriveFilterDeal, PipedriveSync, PipedriveWebhookVersao, PipedriveWebhookFalha,
+    PipedriveDocumento
+)
 
-__all__ = ['JuditBatch', 'JuditRequest', 'JuditResult']
+__all__ = [
+    'JuditBatch', 'JuditRequest', 'JuditResult', 'JuditQueueItem', 'JuditCache', 'JuditWebhookInbox',
+    'JuditLawsuit', 'JuditLawsuitParty', 'JuditResultLawsuit', 'JuditResultPayload', 'JuditLawsuitBlob', 'JuditRestauracao',
+    'JuditConsultaEmVoo',
+    'PipedriveDeal', 'PipedrivePerson', 'PipedriveOrganization', 'PipedrivePipeline',
+    'PipedriveFilter', 'PipedriveFilterDeal', 'PipedriveSync', 'PipedriveWebhookVersao', 'PipedriveWebhookFalha',
+    'PipedriveDocumento'
+]
@@ -1,10 +1,26 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, JSON
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Integer, Boolean, Date, DateTime, Float, Text, JSON, LargeBinary, DDL, Index, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func, text
 from ..db.base import Base
 
+# JSONB no PostgreSQL (indexável com GIN, sem re-parse a cada leitura); JSON nos demais bancos
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Predicados dos índices parciais (mesmo texto no PostgreSQL e no SQLite)
+AGUARDANDO = text("status = 'aguardando'")
+DISPONIVEL = text("status IN ('pendente', 'processando')")
+
+def _parcial(nome: str, *colunas: str, where) -> Index:
+    """Índice parcial: só as linhas que as consultas quentes procuram"""
+    return Index(nome, *colunas, postgresql_where=where, sqlite_where=where)
+
 class JuditBatch(Base):
     """Lote de processamento Judit.io"""
     __tablename__ = "judit_batches"
+    __table_args__ = (
+        # /batches lista os mais recentes primeiro
+        Index("ix_judit_batches_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     batch_id = Column(String(100), unique=True, index=True, nullable=False)
@@ -13,31 +29,56 @@ class JuditBatch(Base):
     sucesso = Column(Integer, default=0)
     erro = Column(Integer, default=0)
     on_demand = Column(Boolean, default=False)
+    hibrido = Column(Boolean, default=False)  # Banco de dados primeiro; sem resultado/desatualizado vai para on-demand
+    max_escalonamentos = Column(Integer, nullable=True)  # Limite de registros enviados ao on-demand no modo híbrido
+    escalonados = Column(Integer, default=0)  # Registros já enviados ao on-demand no modo híbrido
+    with_attachments = Column(Boolean, default=True)
     status = Column(String(50), default="processando")  # processando, aguardando_webhooks, concluído, erro
+    throughput = Column(Float, nullable=True)  # Registros despachados por segundo
+    cache_hits = Column(Integer, default=0)  # Consultas respondidas pelo cache local
+    cache_misses = Column(Integer, default=0)  # Consultas que foram até a Judit
+    iniciado_at = Column(DateTime(timezone=True), nullable=True)
+    finalizado_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class JuditRequest(Base):
-    """Requisição individual para Judit.io"""
+    """Requisição individual para Judit.io (particionada por mês em created_at no PostgreSQL)"""
     __tablename__ = "judit_requests"
+    __table_args__ = (
+        Index("ix_judit_requests_batch_id_status", "batch_id", "status"),
+        # Requisições ainda sem callback (fechamento do lote e varredura das antigas)
+        _parcial("ix_judit_requests_aguardando", "batch_id", "created_at", where=AGUARDANDO),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     batch_id = Column(String(100), index=True, nullable=False)
     request_id = Column(String(100), unique=True, index=True)
-    judit_request_id = Column(String(100), index=True)
+    judit_request_id = Column(String(100), index=True)  # Compartilhado por registros com a mesma busca
+    deal_id = Column(String(20), nullable=True)  # ID do negócio no Pipedrive
     documento = Column(String(20))  # Mantido para compatibilidade
     doc_type = Column(String(10))  # cpf, cnpj
     cpf = Column(String(11), nullable=True)  # CPF sem formatação
     cnpj = Column(String(14), nullable=True)  # CNPJ sem formatação
     nome = Column(String(255))
     empresa = Column(String(255))
-    status = Column(String(50), default="aguardando")  # aguardando, processando, concluído, erro
+    status = Column(String(50), default="aguardando")  # aguardando, processando, concluído, erro, reenviado
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class JuditResult(Base):
-    """Resultado do processamento"""
+    """Resultado do processamento (particionado por mês em processado_at no PostgreSQL)"""
     __tablename__ = "judit_results"
+    __table_args__ = (
+        # Consultas de containment (processos @> '[{"tribunal_acronym": "TRT2"}]')
+        Index(
+            "ix_judit_results_processos_gin", "processos",
+            postgresql_using="gin", postgresql_ops={"processos": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+        # Paginação por id dentro do lote (/resultados, exportação) e filtro por status
+        Index("ix_judit_results_batch_id_id", "batch_id", "id"),
+        Index("ix_judit_results_batch_id_status", "batch_id", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     batch_id = Column(String(100), index=True, nullable=False)
@@ -51,6 +92,172 @@ class JuditResult(Base):
     empresa = Column(String(255))
     status = Column(String(50))  # sucesso, erro
     qtd_processos = Column(Integer, default=0)
-    processos = Column(JSON)  # Dados completos em JSON
+    processos = Column(JSONType)  # Dados completos em JSON (NULL quando comprimidos)
+    processos_comprimidos = Column(Boolean, default=False)  # Processos em judit_result_payloads
+    processos_blobs = Column(JSONType, nullable=True)  # IDs em judit_lawsuit_blobs, na ordem original
     erro = Column(Text, nullable=True)
     processado_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class JuditQueueItem(Base):
+    """Registro de um lote aguardando processamento (fila durável)"""
+    __tablename__ = "judit_queue"
+    __table_args__ = (
+        # Só os itens em aberto: a fila concluída cresce, o índice não
+        _parcial("ix_judit_queue_disponivel", "id", where=DISPONIVEL),
+        _parcial("ix_judit_queue_batch_disponivel", "batch_id", "id", where=DISPONIVEL),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(String(100), index=True, nullable=False)
+    posicao = Column(Integer)  # Índice do registro na planilha original
+    registro = Column(JSON)  # Linha da planilha enviada em /processar (NULL após finalizar)
+    status = Column(String(20), default="pendente", index=True)  # pendente, processando, concluído, erro
+    tentativas = Column(Integer, default=0)
+    worker_id = Column(String(100), nullable=True)
+    lease_ate = Column(DateTime(timezone=True), nullable=True)  # Item volta para a fila após expirar
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class JuditCache(Base):
+    """Cache de consultas /lawsuits compartilhado entre lotes"""
+    __tablename__ = "judit_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    chave = Column(String(64), unique=True, index=True, nullable=False)  # sha256 da busca normalizada
+    search_type = Column(String(20))
+    search_key = Column(String(20))
+    party_documents = Column(String(255), nullable=True)  # Filtro de documentos, ordenado
+    with_attachments = Column(Boolean, default=True)
+    qtd_processos = Column(Integer, default=0)
+    processos = Column(JSONType)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expira_at = Column(DateTime(timezone=True), index=True)
+
+class JuditWebhookInbox(Base):
+    """Callback recebido da Judit.io aguardando processamento (caixa de entrada durável)"""
+    __tablename__ = "judit_webhook_inbox"
+    __table_args__ = (
+        _parcial("ix_judit_webhook_inbox_disponivel", "id", where=DISPONIVEL),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    chave = Column(String(64), unique=True, index=True, nullable=False)  # sha256 do payload (descarta reenvios idênticos)
+    judit_request_id = Column(String(100), index=True)
+    response_type = Column(String(50))
+    payload = Column(JSON)  # Corpo bruto do callback
+    status = Column(String(20), default="pendente", index=True)  # pendente, processando, processado, ignorado, erro
+    tentativas = Column(Integer, default=0)
+    erro = Column(Text, nullable=True)
+    worker_id = Column(String(100), nullable=True)
+    lease_ate = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processado_at = Column(DateTime(timezone=True), nullable=True)
+
+class JuditLawsuit(Base):
+    """Processo judicial normalizado (um registro por número CNJ, compartilhado entre lotes)"""
+    __tablename__ = "lawsuits"
+    __table_args__ = (
+        Index("ix_lawsuits_tribunal_status", "tribunal", "status"),
+        Index(
+            "ix_lawsuits_payload_gin", "payload",
+            postgresql_using="gin", postgresql_ops={"payload": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+        # Busca por trecho da classe (ILIKE '%...%'), que um índice btree não atende
+        Index(
+            "ix_lawsuits_classe_trgm", "classe",
+            postgresql_using="gin", postgresql_ops={"classe": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cnj = Column(String(30), unique=True, index=True, nullable=False)  # Número CNJ (code)
+    nome = Column(Text, nullable=True)  # Ex.: "FULANO X EMPRESA"
+    tribunal = Column(String(20), index=True)  # tribunal_acronym (TRT2, TJSP...)
+    justica = Column(String(50), nullable=True)
+    instancia = Column(String(20), nullable=True)
+    classe = Column(String(255))  # Primeira classificação
+    assunto = Column(String(255), nullable=True)  # Primeiro assunto
+    status = Column(String(50), index=True)
+    fase = Column(String(100), nullable=True)
+    valor = Column(Float, nullable=True)  # Valor da causa
+    data_distribuicao = Column(DateTime(timezone=True), index=True)
+    payload = Column(JSONType)  # Dados completos do processo (última versão recebida)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# gin_trgm_ops vem da extensão pg_trgm (create_all em banco novo)
+event.listen(
+    JuditLawsuit.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+class JuditLawsuitParty(Base):
+    """Parte de um processo normalizado"""
+    __tablename__ = "lawsuit_parties"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    lawsuit_id = Column(Integer, index=True, nullable=False)
+    nome = Column(String(255))
+    documento = Column(String(20), index=True, nullable=True)  # CPF/CNPJ sem formatação
+    lado = Column(String(20))  # Active, Passive, Interested...
+    tipo = Column(String(50), nullable=True)  # person_type
+
+class JuditResultLawsuit(Base):
+    """Vínculo entre um resultado (registro/negócio de um lote) e os processos encontrados"""
+    __tablename__ = "judit_result_lawsuits"
+    __table_args__ = (
+        UniqueConstraint("result_id", "lawsuit_id", name="uq_judit_result_lawsuits"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    result_id = Column(Integer, index=True, nullable=False)
+    lawsuit_id = Column(Integer, index=True, nullable=False)
+    batch_id = Column(String(100), index=True, nullable=False)
+    deal_id = Column(String(20), index=True, nullable=True)
+
+class JuditResultPayload(Base):
+    """Processos de um resultado grande, comprimidos (carregados só quando pedidos)"""
+    __tablename__ = "judit_result_payloads"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    result_id = Column(Integer, unique=True, index=True, nullable=False)
+    codec = Column(String(10), nullable=False)  # zstd, zlib
+    tamanho_original = Column(Integer)  # Bytes do JSON antes da compressão
+    dados = Column(LargeBinary, nullable=False)
+
+class JuditLawsuitBlob(Base):
+    """
+    Conteúdo de um processo armazenado uma única vez (endereçado por hash do CNJ + conteúdo)
+    refcount = quantas posições de judit_results.processos_blobs apontam para ele
+    """
+    __tablename__ = "judit_lawsuit_blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    hash = Column(String(64), unique=True, index=True, nullable=False)  # sha256
+    cnj = Column(String(30), index=True, nullable=True)
+    dados = Column(JSONType, nullable=False)
+    refcount = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class JuditRestauracao(Base):
+    """Mês devolvido ao banco por judit_retention.restaurar (fica fora da retenção até expira_em)"""
+    __tablename__ = "judit_restauracoes"
+    
+    tabela = Column(String(30), primary_key=True)  # judit_results, judit_requests
+    mes = Column(Date, primary_key=True)  # Primeiro dia do mês
+    arquivo = Column(String(500), nullable=True)
+    restaurado_at = Column(DateTime(timezone=True), server_default=func.now())
+    expira_em = Column(DateTime(timezone=True), nullable=False)
+
+class JuditConsultaEmVoo(Base):
+    """Chamada à Judit em andamento em algum processo (coalescência entre workers, ver judit_coalescencia)"""
+    __tablename__ = "judit_consultas_em_voo"
+    
+    chave = Column(String(100), primary_key=True)  # "lawsuits:<sha256>" / "requests:<sha256>"
+    token = Column(String(36), nullable=False)  # Identifica a reserva atual da chave
+    worker_id = Column(String(100), nullable=True)
+    expira_at = Column(DateTime(timezone=True), nullable=False)  # Sem conclusão até aqui, outro processo assume
+    aguardando = Column(Integer, nullable=False, default=0)  # Workers esperando a resposta
+    status_code = Column(Integer, nullable=True)
+    resposta = Column(JSONType, nullable=True)  # Corpo JSON, gravado só quando alguém aguarda
+    concluido_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,131 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime, Index, BigInteger, Text
+from sqlalchemy.sql import func
+from ..db.base import Base
+from .judit import JSONType
+
+# Espelho local do Pipedrive: IDs são os do Pipedrive (sem autoincremento)
+# e `dados` guarda o registro completo retornado pela API v1
+
+class PipedriveDeal(Base):
+    """Negócio do Pipedrive (espelho)"""
+    __tablename__ = "pipedrive_deals"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    title = Column(String(500))
+    status = Column(String(20), index=True)  # open, won, lost
+    value = Column(Float, nullable=True)
+    currency = Column(String(10), nullable=True)
+    pipeline_id = Column(Integer, index=True, nullable=True)
+    stage_id = Column(Integer, nullable=True)
+    person_id = Column(BigInteger, index=True, nullable=True)
+    person_name = Column(String(255), nullable=True)
+    org_id = Column(BigInteger, index=True, nullable=True)
+    org_name = Column(String(255), nullable=True)
+    owner_name = Column(String(255), nullable=True)
+    add_time = Column(String(30), nullable=True)  # Como vem da API ("YYYY-MM-DD HH:MM:SS", UTC)
+    update_time = Column(DateTime(timezone=True), nullable=True)
+    dados = Column(JSONType)
+    sincronizado_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# /buscar-nome: título exato, sem diferenciar maiúsculas
+Index("ix_pipedrive_deals_titulo_lower", func.lower(PipedriveDeal.title))
+
+class PipedrivePerson(Base):
+    """Pessoa do Pipedrive (espelho)"""
+    __tablename__ = "pipedrive_persons"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String(255))
+    org_id = Column(BigInteger, index=True, nullable=True)
+    cpf = Column(String(255), nullable=True)  # Valor bruto do campo personalizado
+    update_time = Column(DateTime(timezone=True), nullable=True)
+    dados = Column(JSONType)
+    sincronizado_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class PipedriveOrganization(Base):
+    """Organização do Pipedrive (espelho)"""
+    __tablename__ = "pipedrive_organizations"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String(255))
+    cnpj = Column(String(255), nullable=True)  # Valor bruto do campo personalizado
+    update_time = Column(DateTime(timezone=True), nullable=True)
+    dados = Column(JSONType)
+    sincronizado_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class PipedrivePipeline(Base):
+    """Funil do Pipedrive (espelho)"""
+    __tablename__ = "pipedrive_pipelines"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String(255))
+    dados = Column(JSONType)
+    sincronizado_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class PipedriveFilter(Base):
+    """Filtro do Pipedrive (espelho)"""
+    __tablename__ = "pipedrive_filters"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    name = Column(String(255))
+    type = Column(String(20), nullable=True)  # deals, people, org...
+    dados = Column(JSONType)
+    sincronizado_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class PipedriveFilterDeal(Base):
+    """Negócios que atendem a um filtro ".API" (os filtros são avaliados pelo Pipedrive)"""
+    __tablename__ = "pipedrive_filter_deals"
+
+    filtro_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    deal_id = Column(BigInteger, primary_key=True, autoincrement=False, index=True)
+
+class PipedriveSync(Base):
+    """Estado da sincronização de cada entidade do espelho"""
+    __tablename__ = "pipedrive_sync"
+
+    entidade = Column(String(30), primary_key=True)  # deals, persons, organizations, pipelines, filters, filter_deals[:<filtro_id>]
+    ultimo_update_time = Column(DateTime(timezone=True), nullable=True)  # Maior update_time já espelhado
+    completo_at = Column(DateTime(timezone=True), nullable=True)  # Última carga completa
+    sincronizado_at = Column(DateTime(timezone=True), nullable=True)  # Última sincronização (completa ou incremental)
+    registros = Column(Integer, default=0)
+    erro = Column(String(500), nullable=True)
+
+class PipedriveDocumento(Base):
+    """CPF/CNPJ (só dígitos) das pessoas e organizações espelhadas, um por valor do campo"""
+    __tablename__ = "pipedrive_documentos"
+    __table_args__ = (
+        Index("ix_pipedrive_documentos_entidade", "entidade", "entidade_id"),
+    )
+
+    documento = Column(String(14), primary_key=True)
+    entidade = Column(String(20), primary_key=True)  # person, organization
+    entidade_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    tipo = Column(String(4), nullable=False)  # cpf, cnpj
+
+class PipedriveWebhookVersao(Base):
+    """
+    Último evento do webhook aplicado a cada registro (ordem por meta.timestamp)
+    Também serve de marca de exclusão: eventos mais antigos que um "deleted" são ignorados
+    """
+    __tablename__ = "pipedrive_webhook_versoes"
+
+    objeto = Column(String(20), primary_key=True)  # deal, person, organization
+    objeto_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    evento_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    acao = Column(String(20))  # added, updated, deleted
+
+class PipedriveWebhookFalha(Base):
+    """Evento do webhook que não pôde ser aplicado (dead-letter)"""
+    __tablename__ = "pipedrive_webhook_falhas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chave = Column(String(64), unique=True, index=True, nullable=False)  # sha256 do payload (descarta reenvios idênticos)
+    objeto = Column(String(20), nullable=True)
+    objeto_id = Column(BigInteger, nullable=True)
+    acao = Column(String(20), nullable=True)
+    payload = Column(JSONType)
+    erro = Column(Text, nullable=True)
+    status = Column(String(20), default="pendente", index=True)  # pendente, reprocessado
+    tentativas = Column(Integer, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    reprocessado_at = Column(DateTime(timezone=True), nullable=True)
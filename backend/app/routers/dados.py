@@ -1,80 +1,113 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
 from typing import List, Dict, Any
+from sqlalchemy.orm import Session
 import pandas as pd
 
 # Importa as classes das APIs locais
-from app.services.pipedrive import PipedriveAPI
+from app.services.pipedrive import PipedriveAPI, nome_confere
 from app.services.assertiva import AssertiveAPI
 from app.services.invertexto import InvertextoAPI
+from app.services import pipedrive_sync, pipedrive_documentos
+from app.db.base import get_db
+from app.api.deps import get_pipedrive_api
 
 router = APIRouter(prefix="/api/dados", tags=["dados"])
 
+def _check_pipedrive_api(api: PipedriveAPI, data: List[Dict[str, Any]], coluna_nome: str, coluna_cpf: str):
+    """Validação tripla pela API, linha a linha (usada enquanto o espelho não foi carregado)"""
+    df = pd.DataFrame(data)
+    df['Existe_No_Pipedrive'] = False
+    
+    cpfs_encontrados = 0
+    resultados = []
+    
+    for index, row in df.iterrows():
+        nome = str(row[coluna_nome]).strip()
+        cpf = str(row[coluna_cpf]).strip()
+        
+        if not nome or not cpf or pd.isna(row[coluna_nome]) or pd.isna(row[coluna_cpf]):
+            continue
+            
+        cpf_limpo = ''.join(filter(str.isdigit, cpf))
+        if len(cpf_limpo) < 11:
+            continue
+        
+        try:
+            if api.buscar_pessoa_por_cpf(cpf_limpo, nome=nome):
+                df.at[index, 'Existe_No_Pipedrive'] = True
+                cpfs_encontrados += 1
+                resultados.append({'nome': nome, 'cpf': cpf, 'encontrado': True})
+        except Exception as e:
+            print(f"Erro ao verificar {nome}: {e}")
+    
+    return {
+        "success": True,
+        "cpfs_encontrados": cpfs_encontrados,
+        "total": len(df),
+        "data": df.to_dict('records'),
+        "resultados": resultados,
+        "espelho": {"fonte": "api", "sincronizado_at": None, "idade_segundos": 0}
+    }
+
 @router.post("/check-pipedrive")
-async def check_pipedrive(
+def check_pipedrive(
     data: List[Dict[str, Any]],
     coluna_nome: str,
     coluna_cpf: str,
-    coluna_org: str = None
+    coluna_org: str = None,
+    db: Session = Depends(get_db),
+    api: PipedriveAPI = Depends(get_pipedrive_api)
 ):
     """
-    Verifica se os CPFs existem no Pipedrive usando validação tripla
+    Verifica se os CPFs/CNPJs existem no Pipedrive
+    Com o espelho local carregado, compara de uma vez os documentos da planilha
+    (só dígitos) com o índice de CPF/CNPJ das pessoas e organizações e confere
+    o nome da linha com o da pessoa/organização encontrada. Enquanto o espelho
+    não tem pessoas/organizações, volta à validação pela API (busca pelo CPF).
+    Os dois caminhos usam a mesma conferência de nome (nome_confere).
     """
     try:
-        api = PipedriveAPI()
+        espelho = pipedrive_sync.frescor(db, entidades=("persons", "organizations"))
+        if espelho is None:
+            return _check_pipedrive_api(api, data, coluna_nome, coluna_cpf)
+        indice = pipedrive_documentos.indice_documentos.obter(db)
+        
         df = pd.DataFrame(data)
+        nomes = df[coluna_nome].fillna('').astype(str).str.strip()
+        cpfs = df[coluna_cpf].fillna('').astype(str).str.strip()
+        documentos = cpfs.str.replace(r'\D', '', regex=True)
+        validos = (nomes != '') & documentos.str.len().isin(list(pipedrive_documentos.TIPOS))
         
-        # Adiciona coluna de resultado
-        df['Existe_No_Pipedrive'] = False
-        cpf_field_id = "e3c63a9658469cbb216157a807cadcf263637383"
+        candidatos = validos & documentos.isin(list(indice))
         
-        cpfs_encontrados = 0
-        resultados = []
+        # Nome da planilha conferido com o de algum registro que tem o documento
+        nomes_pipedrive = pipedrive_documentos.nomes(
+            db, {registro for documento in documentos[candidatos] for registro in indice[documento]}
+        )
+        df['Existe_No_Pipedrive'] = [
+            bool(candidato) and any(nome_confere(nome, nomes_pipedrive.get(registro)) for registro in indice[documento])
+            for candidato, nome, documento in zip(candidatos, nomes, documentos)
+        ]
+        encontrados = df['Existe_No_Pipedrive']
+        resultados = [
+            {'nome': nome, 'cpf': cpf, 'encontrado': True}
+            for nome, cpf in zip(nomes[encontrados], cpfs[encontrados])
+        ]
         
-        for index, row in df.iterrows():
-            nome = str(row[coluna_nome]).strip()
-            cpf = str(row[coluna_cpf]).strip()
-            
-            if not nome or not cpf or pd.isna(nome) or pd.isna(cpf):
-                continue
-                
-            cpf_limpo = ''.join(filter(str.isdigit, cpf))
-            if len(cpf_limpo) < 11:
-                continue
-            
-            # Busca no Pipedrive
-            try:
-                org_nome = str(row[coluna_org]).strip() if coluna_org else None
-                pessoas = api.buscar_pessoa_por_nome(nome)
-                
-                for pessoa in pessoas:
-                    cpf_pipedrive = pessoa.get(cpf_field_id, '')
-                    cpf_pipe_limpo = ''.join(filter(str.isdigit, str(cpf_pipedrive)))
-                    
-                    if cpf_pipe_limpo == cpf_limpo:
-                        df.at[index, 'Existe_No_Pipedrive'] = True
-                        cpfs_encontrados += 1
-                        resultados.append({
-                            'nome': nome,
-                            'cpf': cpf,
-                            'encontrado': True
-                        })
-                        break
-            except Exception as e:
-                print(f"Erro ao verificar {nome}: {e}")
-                
         return {
             "success": True,
-            "cpfs_encontrados": cpfs_encontrados,
+            "cpfs_encontrados": int(encontrados.sum()),
             "total": len(df),
             "data": df.to_dict('records'),
-            "resultados": resultados
+            "resultados": resultados,
+            "espelho": espelho
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/assertiva-cnpj")
-async def assertiva_cnpj(
+def assertiva_cnpj(
     data: List[Dict[str, Any]],
     coluna_cnpj: str
 ):
@@ -133,7 +166,7 @@ async def assertiva_cnpj(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/invertexto-cnpj")
-async def invertexto_cnpj(
+def invertexto_cnpj(
     data: List[Dict[str, Any]],
     coluna_cnpj: str
 ):
@@ -1,12 +1,24 @@
-from fastapi import APIRouter, HTTPException, Request, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Request, BackgroundTasks, Depends, Header, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
+import asyncio
+import json
+import math
 import uuid
 from ..services.judit_service import JuditService
-from ..db.base import get_db
-from ..models.judit import JuditBatch, JuditRequest, JuditResult
+from ..services import judit_queue, judit_inbox, judit_export, judit_storage, judit_lawsuits, judit_listagem
+from ..services.judit_progress import barramento_progresso, snapshot, STATUS_FINAIS
+from ..services.judit_listagem import cache_listagem
+from ..core.config import settings
+from ..db.base import get_db, SessionLocal
+from ..models.judit import (
+    JuditBatch, JuditRequest, JuditResult, JuditQueueItem, JuditLawsuit, JuditLawsuitParty, JuditResultLawsuit
+)
 
 router = APIRouter(prefix="/api/judit", tags=["judit"])
 judit_service = JuditService()
@@ -15,6 +27,8 @@ judit_service = JuditService()
 class ProcessarRequest(BaseModel):
     dados: List[Dict[str, Any]]
     on_demand: bool = False
+    hibrido: bool = False
+    max_escalonamentos: Optional[int] = None
     with_attachments: bool = True
 
 class StatusResponse(BaseModel):
@@ -27,7 +41,7 @@ class StatusResponse(BaseModel):
     resultados: List[Dict[str, Any]]
 
 @router.post("/processar")
-async def processar_dados(
+def processar_dados(
     request: ProcessarRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -36,11 +50,20 @@ async def processar_dados(
     Processa dados via API Judit.io
     - on_demand=true: Busca em tempo real (com webhook)
     - on_demand=false: Busca no banco de dados (mais rápido)
+    - hibrido=true: Banco de dados; registros sem processos ou desatualizados vão
+      para a busca em tempo real, até max_escalonamentos registros
+      (padrão: JUDIT_HIBRIDO_MAX_ESCALONAMENTOS_PCT % do lote)
     """
     try:
         # Gera ID único para este lote de processamento
         batch_id = str(uuid.uuid4())
         
+        max_escalonamentos = None
+        if request.hibrido:
+            max_escalonamentos = request.max_escalonamentos
+            if max_escalonamentos is None:
+                max_escalonamentos = math.ceil(len(request.dados) * settings.JUDIT_HIBRIDO_MAX_ESCALONAMENTOS_PCT / 100)
+        
         # Salva informações do batch no banco
         batch = JuditBatch(
             batch_id=batch_id,
@@ -48,36 +71,35 @@ async def processar_dados(
             processados=0,
             sucesso=0,
             erro=0,
-            on_demand=request.on_demand,
+            on_demand=request.on_demand and not request.hibrido,
+            hibrido=request.hibrido,
+            max_escalonamentos=max_escalonamentos,
+            escalonados=0,
+            with_attachments=request.with_attachments,
             status="processando"
         )
         db.add(batch)
+        
+        # Cada registro vira um item da fila durável (sobrevive a restarts)
+        judit_queue.enfileirar(db, batch_id, request.dados)
         db.commit()
-        db.refresh(batch)
-        
-        # Processa em background
-        if request.on_demand:
-            # Tempo real com webhook
-            background_tasks.add_task(
-                judit_service.processar_com_webhook,
-                batch_id,
-                request.dados,
-                request.with_attachments
-            )
-        else:
-            # Banco de dados (mais rápido)
-            background_tasks.add_task(
-                judit_service.processar_banco_dados,
-                batch_id,
-                request.dados,
-                request.with_attachments
-            )
+        
+        # Lote novo aparece na listagem (outras instâncias recebem o evento)
+        cache_listagem.invalidar()
+        barramento_progresso.publicar(db, [snapshot(batch)])
+        
+        # Drena a fila do lote em background (ou deixa para o worker separado)
+        # on_demand=true: tempo real com webhook / on_demand=false: banco de dados
+        if settings.WORKER_EMBUTIDO:
+            background_tasks.add_task(judit_service.processar_fila, batch_id)
         
         return {
             "success": True,
             "batch_id": batch_id,
             "message": f"Processamento iniciado com {len(request.dados)} registros",
-            "on_demand": request.on_demand
+            "on_demand": batch.on_demand,
+            "hibrido": request.hibrido,
+            "max_escalonamentos": max_escalonamentos
         }
     
     except Exception as e:
@@ -103,7 +125,13 @@ async def obter_status(batch_id: str, db: Session = Depends(get_db)):
                 "sucesso": batch.sucesso,
                 "erro": batch.erro,
                 "on_demand": batch.on_demand,
+                "hibrido": batch.hibrido,
+                "escalonados": batch.escalonados,
+                "max_escalonamentos": batch.max_escalonamentos,
                 "status": batch.status,
+                "throughput": batch.throughput,
+                "cache_hits": batch.cache_hits,
+                "cache_misses": batch.cache_misses,
                 "created_at": batch.created_at.isoformat() if batch.created_at else None
             }
         }
@@ -113,10 +141,73 @@ async def obter_status(batch_id: str, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _carregar_snapshot(batch_id: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
+        return snapshot(batch) if batch else None
+    finally:
+        db.close()
+
+def _evento_sse(evento: str, dados: Dict[str, Any]) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, default=str)}\n\n"
+
+@router.get("/status/{batch_id}/stream")
+async def acompanhar_status(batch_id: str, request: Request):
+    """
+    Acompanha o progresso de um lote via Server-Sent Events
+    Envia o estado completo na conexão e depois só os campos alterados
+    (processados/sucesso/erro/throughput/eta_segundos/status) a cada gravação
+    """
+    # Assina antes de ler o estado inicial para não perder eventos entre os dois
+    fila = barramento_progresso.assinar(batch_id)
+    estado = await run_in_threadpool(_carregar_snapshot, batch_id)
+    
+    if not estado:
+        barramento_progresso.cancelar(batch_id, fila)
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    
+    async def eventos():
+        atual = dict(estado)
+        try:
+            yield _evento_sse("progresso", atual)
+            
+            while atual["status"] not in STATUS_FINAIS:
+                if await request.is_disconnected():
+                    break
+                try:
+                    novo = await asyncio.wait_for(fila.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                delta = {chave: valor for chave, valor in novo.items() if atual.get(chave) != valor}
+                if not delta:
+                    continue
+                atual.update(delta)
+                yield _evento_sse("progresso", {"batch_id": batch_id, **delta})
+            
+            if atual["status"] in STATUS_FINAIS:
+                yield _evento_sse("fim", atual)
+        finally:
+            barramento_progresso.cancelar(batch_id, fila)
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/webhook")
-async def receber_webhook(request: Request):
+async def receber_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
     """
     Endpoint para receber callbacks da API Judit.io
+    Apenas grava o payload na caixa de entrada e responde; o processamento
+    é feito em bloco depois (reenvios idênticos são ignorados)
     """
     try:
         # Recebe o payload do webhook
@@ -129,49 +220,254 @@ async def receber_webhook(request: Request):
         
         print(f"[WEBHOOK] Recebido: reference_id={reference_id}, event_type={event_type}")
         
-        # Processa o webhook
-        await judit_service.processar_webhook(payload)
+        # Gravação fora do event loop (sessão síncrona)
+        novo = await run_in_threadpool(judit_inbox.registrar, db, payload)
+        
+        # Processa a caixa de entrada em background (ou deixa para o worker separado)
+        if novo and settings.WORKER_EMBUTIDO:
+            background_tasks.add_task(judit_service.processar_inbox)
         
         return {
             "success": True,
-            "message": "Webhook processado com sucesso"
+            "message": "Webhook recebido" if novo else "Webhook já recebido"
         }
     
     except Exception as e:
         print(f"[WEBHOOK] Erro: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _serializar_batch(b: JuditBatch) -> Dict[str, Any]:
+    return {
+        "batch_id": b.batch_id,
+        "total": b.total,
+        "processados": b.processados,
+        "sucesso": b.sucesso,
+        "erro": b.erro,
+        "status": b.status,
+        "on_demand": b.on_demand,
+        "hibrido": b.hibrido,
+        "escalonados": b.escalonados,
+        "max_escalonamentos": b.max_escalonamentos,
+        "throughput": b.throughput,
+        "cache_hits": b.cache_hits,
+        "cache_misses": b.cache_misses,
+        "created_at": b.created_at.isoformat() if b.created_at else None
+    }
+
+# Tamanho máximo de uma página de /batches
+LIMITE_BATCHES = 200
+
 @router.get("/batches")
-async def listar_batches(db: Session = Depends(get_db)):
+def listar_batches(
+    cursor: Optional[str] = None,
+    limite: int = 50,
+    status: Optional[str] = None,
+    criado_de: Optional[date] = None,
+    criado_ate: Optional[date] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
-    Lista todos os batches processados
+    Lista os batches, mais recentes primeiro, paginados por cursor
+    - cursor: proximo_cursor da página anterior
+    - status, criado_de, criado_ate (datas inclusivas): filtros
+    Responde com ETag; If-None-Match igual ao da página em cache retorna 304
     """
     try:
-        batches = db.query(JuditBatch).order_by(JuditBatch.created_at.desc()).all()
+        limite = max(1, min(limite, LIMITE_BATCHES))
+        chave = (cursor, limite, status, criado_de, criado_ate)
+        cabecalhos = {"Cache-Control": "no-cache"}
         
+        em_cache = cache_listagem.obter(chave)
+        if em_cache:
+            etag, corpo = em_cache
+        else:
+            geracao = cache_listagem.geracao
+            query = db.query(JuditBatch)
+            if status:
+                query = query.filter(JuditBatch.status == status)
+            if criado_de:
+                query = query.filter(JuditBatch.created_at >= criado_de)
+            if criado_ate:
+                query = query.filter(JuditBatch.created_at < criado_ate + timedelta(days=1))
+            if cursor:
+                try:
+                    criado, ultimo_id = judit_listagem.decodificar_cursor(cursor)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+                query = query.filter(or_(
+                    JuditBatch.created_at < criado,
+                    and_(JuditBatch.created_at == criado, JuditBatch.id < ultimo_id)
+                ))
+            
+            # Busca um a mais para saber se há próxima página
+            batches = query.order_by(JuditBatch.created_at.desc(), JuditBatch.id.desc()).limit(limite + 1).all()
+            tem_mais = len(batches) > limite
+            batches = batches[:limite]
+            
+            corpo = {
+                "success": True,
+                "data": [_serializar_batch(b) for b in batches],
+                "proximo_cursor": (
+                    judit_listagem.codificar_cursor(batches[-1].created_at, batches[-1].id) if tem_mais else None
+                )
+            }
+            etag = cache_listagem.guardar(chave, corpo, geracao)
+        
+        cabecalhos["ETag"] = etag
+        if judit_listagem.etag_confere(if_none_match, etag):
+            return Response(status_code=304, headers=cabecalhos)
+        return JSONResponse(corpo, headers=cabecalhos)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/batches/{batch_id}")
+def excluir_batch(batch_id: str, db: Session = Depends(get_db)):
+    """
+    Exclui um lote com seus resultados, requisições e itens da fila
+    Os processos deduplicados (blobs) e normalizados (lawsuits) só são apagados
+    quando nenhum outro resultado os referencia
+    """
+    try:
+        batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
+
+        if not batch:
+            raise HTTPException(status_code=404, detail="Lote não encontrado")
+
+        if judit_queue.itens_abertos(db, batch_id):
+            raise HTTPException(status_code=409, detail="Lote ainda em processamento")
+
+        blobs_apagados = judit_storage.liberar_lote(db, batch_id)
+        resultados = db.query(JuditResult).filter(JuditResult.batch_id == batch_id).delete(synchronize_session=False)
+        lawsuits_apagados = judit_lawsuits.desvincular(db, JuditResultLawsuit.batch_id == batch_id)
+        db.query(JuditRequest).filter(JuditRequest.batch_id == batch_id).delete(synchronize_session=False)
+        db.query(JuditQueueItem).filter(JuditQueueItem.batch_id == batch_id).delete(synchronize_session=False)
+        db.delete(batch)
+        db.commit()
+        cache_listagem.invalidar()
+
+        print(f"[JUDIT] Batch {batch_id}: excluído ({resultados} resultados, {blobs_apagados} processos liberados, {lawsuits_apagados} lawsuits apagados)")
+
         return {
             "success": True,
-            "data": [
-                {
-                    "batch_id": b.batch_id,
-                    "total": b.total,
-                    "processados": b.processados,
-                    "sucesso": b.sucesso,
-                    "erro": b.erro,
-                    "status": b.status,
-                    "on_demand": b.on_demand,
-                    "created_at": b.created_at.isoformat() if b.created_at else None
-                }
-                for b in batches
-            ]
+            "data": {
+                "batch_id": batch_id,
+                "resultados": resultados,
+                "processos_liberados": blobs_apagados,
+                "lawsuits_apagados": lawsuits_apagados
+            }
         }
+
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Campos de JuditResult expostos em /resultados (processos só quando pedido em fields=)
+CAMPOS_RESULTADO = (
+    "id", "deal_id", "documento", "doc_type", "cpf", "cnpj", "nome", "empresa",
+    "status", "qtd_processos", "processos", "erro", "processado_at"
+)
+CAMPOS_PADRAO = tuple(campo for campo in CAMPOS_RESULTADO if campo != "processos")
+LIMITE_RESULTADOS = 5000
+
+def _campos_solicitados(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(CAMPOS_PADRAO)
+    campos = [campo.strip() for campo in fields.split(",") if campo.strip()]
+    invalidos = [campo for campo in campos if campo not in CAMPOS_RESULTADO]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(invalidos)}")
+    # O id é sempre retornado (é o cursor da paginação)
+    return ["id"] + [campo for campo in campos if campo != "id"]
+
+def _filtrar_resultados(
+    query,
+    com_processos: Optional[bool] = None,
+    status: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    ids: Optional[str] = None
+):
+    """Filtros de /resultados aplicados no banco"""
+    if com_processos is True:
+        query = query.filter(JuditResult.status == "sucesso", JuditResult.qtd_processos > 0)
+    elif com_processos is False:
+        # "Sem processo": nenhum processo encontrado ou erro na consulta
+        query = query.filter(or_(
+            JuditResult.status == "erro",
+            JuditResult.qtd_processos == 0,
+            JuditResult.qtd_processos.is_(None)
+        ))
+    if status:
+        query = query.filter(JuditResult.status == status)
+    if doc_type:
+        query = query.filter(JuditResult.doc_type == doc_type)
+    if ids:
+        try:
+            lista_ids = [int(valor) for valor in ids.split(",") if valor.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="ids deve ser uma lista de inteiros")
+        query = query.filter(JuditResult.id.in_(lista_ids))
+    return query
+
+def _serializar_resultado(linha, campos: List[str]) -> Dict[str, Any]:
+    dados = {campo: getattr(linha, campo) for campo in campos}
+    if dados.get("processado_at"):
+        dados["processado_at"] = dados["processado_at"].isoformat()
+    return dados
+
+@router.get("/resultados/{batch_id}/export")
+def exportar_resultados(
+    batch_id: str,
+    format: str = "csv",
+    com_processos: Optional[bool] = None,
+    status: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Exporta os resultados de um lote em streaming (format=ndjson|csv|xlsx)
+    CSV/XLSX: uma linha por processo encontrado; NDJSON: um resultado por linha
+    Aceita os mesmos filtros de /resultados
+    """
+    if format not in judit_export.FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {format} (use ndjson, csv ou xlsx)")
+    
+    if not db.query(JuditBatch.id).filter(JuditBatch.batch_id == batch_id).first():
+        raise HTTPException(status_code=404, detail="Lote não encontrado")
+    
+    def consulta(sessao: Session):
+        query = sessao.query(JuditResult).filter(JuditResult.batch_id == batch_id)
+        return _filtrar_resultados(query, com_processos, status, doc_type)
+    
+    return StreamingResponse(
+        judit_export.GERADORES[format](consulta),
+        media_type=judit_export.FORMATOS[format],
+        headers={"Content-Disposition": f'attachment; filename="resultados_{batch_id}.{format}"'}
+    )
+
 @router.get("/resultados/{batch_id}")
-async def obter_resultados(batch_id: str, db: Session = Depends(get_db)):
+def obter_resultados(
+    batch_id: str,
+    cursor: Optional[int] = None,
+    limite: int = 500,
+    fields: Optional[str] = None,
+    com_processos: Optional[bool] = None,
+    status: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    ids: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Obtém os resultados processados de um lote
+    Obtém os resultados processados de um lote, paginados por id (keyset)
+    - cursor: id do último resultado recebido (use proximo_cursor da resposta)
+    - fields: colunas separadas por vírgula; processos só vem quando pedido
+    - com_processos=true: sucesso com processos / false: sem processos ou erro
+    - status, doc_type, ids: filtros adicionais
     """
     try:
         batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
@@ -179,9 +475,32 @@ async def obter_resultados(batch_id: str, db: Session = Depends(get_db)):
         if not batch:
             raise HTTPException(status_code=404, detail="Lote não encontrado")
         
-        # Busca resultados
-        resultados = db.query(JuditResult).filter(JuditResult.batch_id == batch_id).all()
+        campos = _campos_solicitados(fields)
+        limite = max(1, min(limite, LIMITE_RESULTADOS))
         
+        # Seleciona só as colunas pedidas (sem carregar o JSON de processos à toa)
+        colunas = [getattr(JuditResult, campo) for campo in campos]
+        if "processos" in campos:
+            colunas += [JuditResult.processos_comprimidos, JuditResult.processos_blobs]
+        query = db.query(*colunas).filter(
+            JuditResult.batch_id == batch_id
+        )
+        query = _filtrar_resultados(query, com_processos, status, doc_type, ids)
+        if cursor is not None:
+            query = query.filter(JuditResult.id > cursor)
+        
+        # Busca um a mais para saber se há próxima página
+        linhas = query.order_by(JuditResult.id).limit(limite + 1).all()
+        tem_mais = len(linhas) > limite
+        linhas = linhas[:limite]
+
+        resultados = [_serializar_resultado(linha, campos) for linha in linhas]
+        if "processos" in campos:
+            # Processos comprimidos vêm da tabela lateral numa única consulta
+            processos = judit_storage.carregar_processos(db, linhas)
+            for resultado in resultados:
+                resultado["processos"] = processos[resultado["id"]]
+
         return {
             "success": True,
             "data": {
@@ -191,23 +510,8 @@ async def obter_resultados(batch_id: str, db: Session = Depends(get_db)):
                 "processados": batch.processados,
                 "sucesso": batch.sucesso,
                 "erro": batch.erro,
-                "resultados": [
-                    {
-                        "deal_id": r.deal_id if hasattr(r, 'deal_id') else None,
-                        "documento": r.documento,
-                        "doc_type": r.doc_type,
-                        "cpf": r.cpf if hasattr(r, 'cpf') else None,
-                        "cnpj": r.cnpj if hasattr(r, 'cnpj') else None,
-                        "nome": r.nome,
-                        "empresa": r.empresa,
-                        "status": r.status,
-                        "qtd_processos": r.qtd_processos,
-                        "processos": r.processos,
-                        "erro": r.erro,
-                        "processado_at": r.processado_at.isoformat() if r.processado_at else None
-                    }
-                    for r in resultados
-                ]
+                "resultados": resultados,
+                "proximo_cursor": linhas[-1].id if tem_mais else None
             }
         }
     
@@ -215,3 +519,98 @@ async def obter_resultados(batch_id: str, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/processos")
+def buscar_processos(
+    tribunal: Optional[str] = None,
+    status: Optional[str] = None,
+    justica: Optional[str] = None,
+    classe: Optional[str] = None,
+    documento: Optional[str] = None,
+    distribuido_de: Optional[date] = None,
+    distribuido_ate: Optional[date] = None,
+    valor_minimo: Optional[float] = None,
+    batch_id: Optional[str] = None,
+    deal_id: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limite: int = 500,
+    db: Session = Depends(get_db)
+):
+    """
+    Busca negócios por características dos processos encontrados, em todos os lotes
+    (tabelas normalizadas lawsuits/lawsuit_parties, sem ler os JSONs)
+    - tribunal, status, justica: igualdade (ex.: tribunal=TRT2&status=Ativo)
+    - classe: trecho do nome da classe, sem diferenciar maiúsculas (índice trigram no PostgreSQL)
+    - documento: CPF/CNPJ de uma das partes
+    """
+    try:
+        query = db.query(
+            JuditResultLawsuit.id,
+            JuditResultLawsuit.deal_id,
+            JuditResultLawsuit.batch_id,
+            JuditResultLawsuit.result_id,
+            JuditLawsuit.cnj,
+            JuditLawsuit.tribunal,
+            JuditLawsuit.justica,
+            JuditLawsuit.classe,
+            JuditLawsuit.status,
+            JuditLawsuit.valor,
+            JuditLawsuit.data_distribuicao
+        ).join(JuditLawsuit, JuditLawsuit.id == JuditResultLawsuit.lawsuit_id)
+        
+        if tribunal:
+            query = query.filter(JuditLawsuit.tribunal == tribunal.upper())
+        if status:
+            query = query.filter(JuditLawsuit.status == status)
+        if justica:
+            query = query.filter(JuditLawsuit.justica == justica)
+        if classe:
+            query = query.filter(JuditLawsuit.classe.ilike(f"%{classe}%"))
+        if documento:
+            query = query.filter(JuditLawsuit.id.in_(
+                db.query(JuditLawsuitParty.lawsuit_id).filter(
+                    JuditLawsuitParty.documento == ''.join(filter(str.isdigit, documento))
+                )
+            ))
+        if distribuido_de:
+            query = query.filter(JuditLawsuit.data_distribuicao >= distribuido_de)
+        if distribuido_ate:
+            query = query.filter(JuditLawsuit.data_distribuicao < distribuido_ate + timedelta(days=1))
+        if valor_minimo is not None:
+            query = query.filter(JuditLawsuit.valor >= valor_minimo)
+        if batch_id:
+            query = query.filter(JuditResultLawsuit.batch_id == batch_id)
+        if deal_id:
+            query = query.filter(JuditResultLawsuit.deal_id == deal_id)
+        if cursor is not None:
+            query = query.filter(JuditResultLawsuit.id > cursor)
+        
+        limite = max(1, min(limite, LIMITE_RESULTADOS))
+        linhas = query.order_by(JuditResultLawsuit.id).limit(limite + 1).all()
+        tem_mais = len(linhas) > limite
+        linhas = linhas[:limite]
+        
+        return {
+            "success": True,
+            "data": {
+                "processos": [
+                    {
+                        "deal_id": linha.deal_id,
+                        "batch_id": linha.batch_id,
+                        "result_id": linha.result_id,
+                        "cnj": linha.cnj,
+                        "tribunal": linha.tribunal,
+                        "justica": linha.justica,
+                        "classe": linha.classe,
+                        "status": linha.status,
+                        "valor": linha.valor,
+                        "data_distribuicao": linha.data_distribuicao.isoformat() if linha.data_distribuicao else None
+                    }
+                    for linha in linhas
+                ],
+                "proximo_cursor": linhas[-1].id if tem_mais else None
+            }
+        }
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from typing import List, Dict, Any, Optional
+from sqlalchemy.orm import Session
 import pandas as pd
+import secrets
 
 from app.services.pipedrive import PipedriveAPI
+from app.services import pipedrive_sync, pipedrive_webhook
+from app.core.config import settings
+from app.db.base import get_db
+from app.api.deps import get_pipedrive_api, get_current_superuser
 
 router = APIRouter(prefix="/api/pipedrive", tags=["pipedrive"])
 
@@ -50,51 +58,89 @@ def extrair_cpf_cnpj(negocio: Dict, api: PipedriveAPI) -> tuple:
     print(f"[DEBUG] Resultado final - CPF: {cpf}, CNPJ: {cnpj}")
     return cpf, cnpj
 
+def _extrair_id(valor: Any) -> Optional[int]:
+    """ID de person_id/org_id do negócio (pode vir como número ou objeto)"""
+    if isinstance(valor, dict):
+        valor = valor.get('value') or valor.get('id')
+    try:
+        return int(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
+
+def _api() -> Dict[str, Any]:
+    """Frescor das respostas lidas direto da API (espelho ainda sem carga completa)"""
+    return {"fonte": "api", "sincronizado_at": None, "idade_segundos": 0}
+
 @router.get("/funis")
-async def listar_funis():
+def listar_funis(db: Session = Depends(get_db), api: PipedriveAPI = Depends(get_pipedrive_api)):
     """
     Lista todos os funis (pipelines) disponíveis no Pipedrive
     """
     try:
-        api = PipedriveAPI()
-        funis = api.listar_funis()
+        espelho = pipedrive_sync.frescor(db)
+        if espelho:
+            funis = pipedrive_sync.listar_funis(db)
+        else:
+            funis = api.listar_funis()
         return {
             "success": True,
-            "funis": funis
+            "funis": funis,
+            "espelho": espelho or _api()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/filtros")
-async def listar_filtros():
+def listar_filtros(db: Session = Depends(get_db), api: PipedriveAPI = Depends(get_pipedrive_api)):
     """
     Lista todos os filtros disponíveis no Pipedrive
     Filtra apenas os que contêm '.API' no nome
     """
     try:
-        api = PipedriveAPI()
-        todos_filtros = api.listar_filtros()
+        espelho = pipedrive_sync.frescor(db)
+        if espelho:
+            todos_filtros = pipedrive_sync.listar_filtros(db)
+        else:
+            todos_filtros = api.listar_filtros()
         
         # Filtra apenas os que contêm '.API' no nome
         filtros_api = [f for f in todos_filtros if '.API' in f.get('name', '')]
         
         return {
             "success": True,
-            "filtros": filtros_api
+            "filtros": filtros_api,
+            "espelho": espelho or _api()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/carregar-negocios")
-async def carregar_negocios(
+def carregar_negocios(
     funil_id: Optional[int] = None,
-    filtro_id: Optional[int] = None
+    filtro_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    api: PipedriveAPI = Depends(get_pipedrive_api)
 ):
     """
     Carrega negócios do Pipedrive com base nos filtros
+    Lê do espelho local quando ele já teve a carga completa (e, com filtro_id,
+    quando os membros do filtro já foram espelhados; a idade informada inclui
+    a deles)
     """
     try:
-        api = PipedriveAPI()
+        entidades = ("deals", "persons", "organizations")
+        if filtro_id:
+            entidades += (pipedrive_sync.entidade_filtro(filtro_id),)
+        espelho = pipedrive_sync.frescor(db, entidades=entidades)
+        if espelho:
+            negocios = pipedrive_sync.listar_negocios(db, funil_id=funil_id, filtro_id=filtro_id)
+            return {
+                "success": True,
+                "total": len(negocios),
+                "negocios": negocios,
+                "espelho": espelho
+            }
+        
         todos_negocios = []
         
         if filtro_id:
@@ -142,21 +188,22 @@ async def carregar_negocios(
                 if len(todos_negocios) >= 10000:
                     break
         
-        # Processa os negócios para formato simplificado
-        # Cache de organizações e pessoas para evitar múltiplas requisições
-        org_cache = {}
-        person_cache = {}
+        # CPF das pessoas e CNPJ das organizações carregados de uma vez
+        # (IDs únicos, em lotes paralelos) e unidos aos negócios em memória
+        person_ids = {_extrair_id(negocio.get('person_id')) for negocio in todos_negocios}
+        org_ids = {_extrair_id(negocio.get('org_id')) for negocio in todos_negocios}
+        cpfs = api.obter_campos_em_lote('persons', person_ids, api.cpf_field_id)
+        cnpjs = api.obter_campos_em_lote('organizations', org_ids, api.cnpj_field_id)
         
+        # Processa os negócios para formato simplificado
         negocios_processados = []
         for negocio in todos_negocios:
             # Extrai nome da pessoa (pode vir como string ou objeto)
             person_id_data = negocio.get('person_id')
             if isinstance(person_id_data, dict):
                 pessoa = person_id_data.get('name', '')
-                person_id = person_id_data.get('value') or person_id_data.get('id')
             else:
                 pessoa = negocio.get('person_name', '')
-                person_id = person_id_data
             
             # Extrai nome da organização (pode vir como string ou objeto)
             org_id = negocio.get('org_id')
@@ -172,63 +219,8 @@ async def carregar_negocios(
             else:
                 owner = negocio.get('owner_name', '')
             
-            # Busca CPF da pessoa (com cache)
-            cpf = ''
-            if person_id:
-                try:
-                    # Verifica se já está no cache
-                    if person_id in person_cache:
-                        cpf = person_cache[person_id]
-                    else:
-                        # Busca detalhes da pessoa
-                        person_response = api.session.get(
-                            f"{api.base_url}/persons/{person_id}",
-                            params={'api_token': api.api_token}
-                        )
-                        person_response.raise_for_status()
-                        person_data = person_response.json()
-                        
-                        if person_data and person_data.get('success') and person_data.get('data'):
-                            person_details = person_data['data']
-                            # Extrai CPF do campo personalizado
-                            cpf = person_details.get(api.cpf_field_id, '')
-                            # Armazena no cache
-                            person_cache[person_id] = cpf
-                except Exception as e:
-                    print(f"[DEBUG] Erro ao buscar pessoa {person_id}: {e}")
-            
-            # Busca CNPJ na organização (com cache)
-            cnpj = ''
-            org_id_data = negocio.get('org_id')
-            if org_id_data:
-                try:
-                    # Extrai o ID da organização
-                    if isinstance(org_id_data, dict):
-                        org_id = org_id_data.get('value') or org_id_data.get('id')
-                    else:
-                        org_id = org_id_data
-                    
-                    if org_id:
-                        # Verifica se já está no cache
-                        if org_id in org_cache:
-                            cnpj = org_cache[org_id]
-                        else:
-                            # Busca detalhes da organização
-                            org_response = api.session.get(
-                                f"{api.base_url}/organizations/{org_id}",
-                                params={'api_token': api.api_token}
-                            )
-                            org_response.raise_for_status()
-                            org_data = org_response.json()
-                            
-                            if org_data and org_data.get('success') and org_data.get('data'):
-                                org_details = org_data['data']
-                                # Extrai CNPJ do campo personalizado
-                                cnpj = org_details.get(api.cnpj_field_id, '')
-                                # Armazena no cache
-                                org_cache[org_id] = cnpj
-                except Exception as e:
-                    print(f"[DEBUG] Erro ao buscar organização: {e}")
+            cpf = cpfs.get(_extrair_id(person_id_data), '')
+            cnpj = cnpjs.get(_extrair_id(org_id), '')
             
             negocios_processados.append({
                 'id': negocio.get('id'),
@@ -249,21 +241,33 @@ async def carregar_negocios(
         return {
             "success": True,
             "total": len(negocios_processados),
-            "negocios": negocios_processados
+            "negocios": negocios_processados,
+            "espelho": _api()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/buscar-nome")
-async def buscar_por_nome(
-    termo: str
+def buscar_por_nome(
+    termo: str,
+    db: Session = Depends(get_db),
+    api: PipedriveAPI = Depends(get_pipedrive_api)
 ):
     """
-    Busca negócios por nome/título usando a API de busca do Pipedrive
+    Busca negócios por nome/título (exato, sem diferenciar maiúsculas)
+    Lê do espelho local quando ele já teve a carga completa; senão usa a API de busca do Pipedrive
     """
     try:
-        api = PipedriveAPI()
+        espelho = pipedrive_sync.frescor(db)
+        if espelho:
+            negocios = pipedrive_sync.buscar_por_titulo(db, termo)
+            return {
+                "success": True,
+                "total": len(negocios),
+                "negocios": negocios,
+                "espelho": espelho
+            }
         
         # Usa o método buscar_por_nome que faz a busca correta
         negocios = api.buscar_por_nome(termo, case_sensitive=False)
@@ -300,8 +304,68 @@ async def buscar_por_nome(
         return {
             "success": True,
             "total": len(negocios_processados),
-            "negocios": negocios_processados
+            "negocios": negocios_processados,
+            "espelho": _api()
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sincronizar", status_code=202)
+def sincronizar_espelho(
+    background_tasks: BackgroundTasks,
+    completo: bool = False,
+    db: Session = Depends(get_db),
+    api: PipedriveAPI = Depends(get_pipedrive_api)
+):
+    """
+    Agenda a sincronização do espelho local (incremental, ou carga completa com completo=true)
+    Roda em background; o andamento aparece em "espelho" das rotas que leem o espelho
+    """
+    background_tasks.add_task(pipedrive_sync.sincronizar, completo=completo, api=api)
+    return {
+        "success": True,
+        "message": "Sincronização do espelho iniciada",
+        "completo": completo,
+        "espelho": pipedrive_sync.frescor(db)
+    }
+
+def _autenticar_webhook(credenciais: Optional[HTTPBasicCredentials] = Depends(HTTPBasic(auto_error=False))):
+    """HTTP Basic do webhook; sem PIPEDRIVE_WEBHOOK_USUARIO/SENHA configurados, recusa tudo"""
+    if not (settings.PIPEDRIVE_WEBHOOK_USUARIO and settings.PIPEDRIVE_WEBHOOK_SENHA):
+        print("[WEBHOOK] Evento recusado: PIPEDRIVE_WEBHOOK_USUARIO/SENHA não configurados")
+        raise HTTPException(status_code=503, detail="Webhook do Pipedrive sem credenciais configuradas")
+    if credenciais is None or not (
+        secrets.compare_digest(credenciais.username, settings.PIPEDRIVE_WEBHOOK_USUARIO)
+        and secrets.compare_digest(credenciais.password, settings.PIPEDRIVE_WEBHOOK_SENHA)
+    ):
+        raise HTTPException(status_code=401, detail="Credenciais inválidas", headers={"WWW-Authenticate": "Basic"})
+
+@router.post("/webhook", dependencies=[Depends(_autenticar_webhook)])
+async def receber_webhook(request: Request, db: Session = Depends(get_db)):
+    """
+    Eventos added/updated/deleted de negócios, pessoas e organizações
+    Aplicados ao espelho local na ordem de meta.timestamp; eventos com erro vão
+    para pipedrive_webhook_falhas e o Pipedrive recebe 200 mesmo assim
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Payload inválido")
+    
+    # Gravação fora do event loop (sessão síncrona)
+    status = await run_in_threadpool(pipedrive_webhook.registrar, db, payload)
+    return {
+        "success": status != "falha",
+        "status": status
+    }
+
+@router.post("/webhook/reprocessar", dependencies=[Depends(get_current_superuser)])
+def reprocessar_webhook(limite: int = 100, db: Session = Depends(get_db)):
+    """
+    Reaplica os eventos do webhook que estão na dead-letter (só superusuários)
+    """
+    return {
+        "success": True,
+        **pipedrive_webhook.reprocessar_falhas(db, limite)
+    }
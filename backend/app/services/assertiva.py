@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 import time
 from urllib.parse import urljoin
 from pathlib import Path
+from .rate_limiter import SessaoLimitada
 
 # Configura o logging
 logging.basicConfig(level=logging.INFO)
@@ -39,7 +40,7 @@ class AssertiveAPI:
             raise ValueError("Credenciais da Assertiva não encontradas no arquivo .env")
         
         try:
-            self.session = requests.Session()
+            self.session = SessaoLimitada('assertiva')
             self.session.headers.update({
                 'Accept': 'application/json',
                 'Content-Type': 'application/json'
@@ -303,7 +304,7 @@ class AssertiveAPI:
             logger.info(f"Headers: {headers}")
             
             # Faz a requisição de consulta
-            cpf_response = requests.get(
+            cpf_response = self.session.get(
                 cpf_endpoint,
                 headers=headers,
                 params=params
@@ -535,7 +536,7 @@ class AssertiveAPI:
             logger.info(f"Headers: {headers}")
             
             # Faz a requisição de consulta
-            cnpj_response = requests.get(
+            cnpj_response = self.session.get(
                 cnpj_endpoint,
                 headers=headers,
                 params=params
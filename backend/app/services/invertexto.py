@@ -12,6 +12,7 @@ import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 import requests
+from .rate_limiter import SessaoLimitada
 
 # Configura o logging
 logging.basicConfig(level=logging.INFO)
@@ -28,7 +29,7 @@ class InvertextoAPI:
         self.base_url = "https://api.invertexto.com/v1"
         
         try:
-            self.session = requests.Session()
+            self.session = SessaoLimitada('invertexto')
             self.session.headers.update({
                 'Accept': 'application/json',
                 'Authorization': f'Bearer {self.token}'
@@ -140,7 +141,7 @@ class InvertextoAPI:
             
             # Faz a requisição de consulta
             print("\nEnviando requisição...")
-            cnpj_response = requests.get(
+            cnpj_response = self.session.get(
                 cnpj_endpoint,
                 headers=headers,
                 params=params
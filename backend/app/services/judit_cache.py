@@ -0,0 +1,126 @@
+"""
+Cache de consultas Judit.io entre lotes
+
+A chave é a busca normalizada (search_type, search_key, filtro party_documents,
+with_attachments). As respostas ficam em judit_cache (Postgres) por
+JUDIT_CACHE_TTL_HORAS e, opcionalmente, num LRU em memória do processo.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.judit import JuditCache
+
+
+def _digitos(valor: Any) -> str:
+    return ''.join(filter(str.isdigit, str(valor or '')))
+
+
+def normalizar_busca(search: Dict[str, Any], with_attachments: bool) -> Dict[str, Any]:
+    """Campos que identificam uma consulta, em forma canônica"""
+    filtro = (search.get("search_params") or {}).get("filter") or {}
+    party_documents = sorted(_digitos(doc) for doc in filtro.get("party_documents", []) if _digitos(doc))
+    return {
+        "search_type": search.get("search_type"),
+        "search_key": _digitos(search.get("search_key")),
+        "party_documents": ",".join(party_documents) or None,
+        "with_attachments": bool(with_attachments),
+    }
+
+
+def chave_busca(search: Dict[str, Any], with_attachments: bool) -> str:
+    """sha256 da busca normalizada"""
+    normalizada = normalizar_busca(search, with_attachments)
+    return hashlib.sha256(json.dumps(normalizada, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CacheConsultas:
+    """Cache de duas camadas: LRU em memória na frente da tabela judit_cache"""
+
+    def __init__(self, ttl_horas: Optional[float] = None, tamanho_lru: Optional[int] = None):
+        self.ttl = timedelta(hours=settings.JUDIT_CACHE_TTL_HORAS if ttl_horas is None else ttl_horas)
+        self.tamanho_lru = settings.JUDIT_CACHE_LRU_TAMANHO if tamanho_lru is None else tamanho_lru
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return self.ttl.total_seconds() > 0
+
+    def _lru_obter(self, chave: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entrada = self._lru.get(chave)
+            if entrada is None:
+                return None
+            expira, processos = entrada
+            if expira < time.monotonic():
+                del self._lru[chave]
+                return None
+            self._lru.move_to_end(chave)
+            return processos
+
+    def _lru_guardar(self, chave: str, processos: List[Dict[str, Any]], segundos: float):
+        if self.tamanho_lru <= 0 or segundos <= 0:
+            return
+        with self._lock:
+            self._lru[chave] = (time.monotonic() + segundos, processos)
+            self._lru.move_to_end(chave)
+            while len(self._lru) > self.tamanho_lru:
+                self._lru.popitem(last=False)
+
+    def obter(self, db: Session, chave: str) -> Optional[List[Dict[str, Any]]]:
+        """Processos em cache para a chave, ou None se ausente/expirado"""
+        if not self.ativo:
+            return None
+
+        processos = self._lru_obter(chave)
+        if processos is not None:
+            return processos
+
+        agora = datetime.now(timezone.utc)
+        entrada = db.query(JuditCache).filter(
+            JuditCache.chave == chave,
+            JuditCache.expira_at > agora
+        ).first()
+        if entrada is None:
+            return None
+
+        expira = entrada.expira_at
+        if expira.tzinfo is None:
+            expira = expira.replace(tzinfo=timezone.utc)
+        self._lru_guardar(chave, entrada.processos or [], (expira - agora).total_seconds())
+        return entrada.processos or []
+
+    def linha(
+        self,
+        chave: str,
+        search: Dict[str, Any],
+        with_attachments: bool,
+        processos: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Guarda a resposta no LRU e retorna a linha de judit_cache a ser gravada
+        (a gravação em si é feita em bloco pelo GravadorResultados)
+        """
+        if not self.ativo:
+            return None
+
+        self._lru_guardar(chave, processos, self.ttl.total_seconds())
+        return {
+            "chave": chave,
+            **normalizar_busca(search, with_attachments),
+            "qtd_processos": len(processos),
+            "processos": processos,
+            "expira_at": datetime.now(timezone.utc) + self.ttl,
+        }
+
+
+# Instância compartilhada pelo processo (o LRU vale para todos os lotes)
+cache_consultas = CacheConsultas()
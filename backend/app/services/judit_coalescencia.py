@@ -0,0 +1,208 @@
+"""
+Coalescência de consultas à Judit.io entre processos
+
+O CoalescedorRequisicoes une chamadas idênticas dentro de um processo; com
+vários workers (python -m app.worker --processos N) a mesma consulta pode
+estar em voo em processos diferentes. Aqui a chave da consulta é reservada em
+judit_consultas_em_voo: quem consegue a reserva chama a Judit e os demais
+processos se registram como aguardando e consultam a linha a cada
+JUDIT_COALESCENCIA_ESPERA_MS até a resposta aparecer. O dono só grava o corpo
+da resposta quando há alguém aguardando; sem ninguém, apenas apaga a reserva.
+Só o dono da chave dentro do processo (ver CoalescedorRequisicoes) chega aqui,
+e com um único processo worker a tabela nem é usada.
+
+A reserva vale JUDIT_COALESCENCIA_LEASE_SEGUNDOS: se o processo dono morrer
+sem responder, outro assume a chave quando ela expira. Se a chamada levantar
+exceção, a reserva é desfeita e quem aguardava tenta por conta própria.
+Os acessos ao banco usam sessões curtas no executor, fora do event loop.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.base import SessionLocal
+from ..models.judit import JuditConsultaEmVoo
+
+# Linhas concluídas ou abandonadas há mais que isso são removidas por limpar()
+RETENCAO = timedelta(hours=1)
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _utc(momento: datetime) -> datetime:
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+def reservar(db: Session, chave: str, token: str) -> bool:
+    """
+    Reserva a chave se ela está livre, concluída ou com a reserva vencida e faz commit
+    False quando outro processo tem a chamada em voo
+    """
+    agora = _agora()
+    linha = {
+        "chave": chave,
+        "token": token,
+        "worker_id": f"{socket.gethostname()}-{os.getpid()}",
+        "expira_at": agora + timedelta(seconds=settings.JUDIT_COALESCENCIA_LEASE_SEGUNDOS),
+        "aguardando": 0,
+        "status_code": None,
+        "resposta": None,
+        "concluido_at": None,
+    }
+    livre = or_(JuditConsultaEmVoo.concluido_at.isnot(None), JuditConsultaEmVoo.expira_at < agora)
+
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialeto == "postgresql" else sqlite
+        stmt = modulo.insert(JuditConsultaEmVoo).values(linha)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JuditConsultaEmVoo.chave],
+            set_={coluna: stmt.excluded[coluna] for coluna in linha if coluna != "chave"},
+            where=livre
+        )
+        reservou = bool(db.execute(stmt).rowcount)
+    else:
+        atual = db.get(JuditConsultaEmVoo, chave, with_for_update=True)
+        if atual is None:
+            db.add(JuditConsultaEmVoo(**linha))
+            reservou = True
+        elif atual.concluido_at is not None or _utc(atual.expira_at) < agora:
+            for coluna, valor in linha.items():
+                setattr(atual, coluna, valor)
+            reservou = True
+        else:
+            reservou = False
+    db.commit()
+    return reservou
+
+
+def aguardar(db: Session, chave: str) -> Optional[str]:
+    """
+    Registra mais um processo aguardando a reserva em voo da chave e faz commit
+    Returns: token da reserva aguardada, ou None se não há reserva em voo
+    """
+    agora = _agora()
+    registrou = db.execute(
+        update(JuditConsultaEmVoo)
+        .where(
+            JuditConsultaEmVoo.chave == chave,
+            JuditConsultaEmVoo.concluido_at.is_(None),
+            JuditConsultaEmVoo.expira_at >= agora
+        )
+        .values(aguardando=JuditConsultaEmVoo.aguardando + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    token = None
+    if registrou:
+        token = db.execute(select(JuditConsultaEmVoo.token).where(JuditConsultaEmVoo.chave == chave)).scalar()
+    db.commit()
+    return token
+
+
+def concluir(db: Session, chave: str, token: str, resultado: Tuple[int, Any]):
+    """
+    Encerra a reserva e faz commit: sem ninguém aguardando, apenas apaga a
+    linha; senão grava a resposta (status, corpo JSON) para quem aguarda
+    """
+    apagada = db.execute(delete(JuditConsultaEmVoo).where(
+        JuditConsultaEmVoo.chave == chave, JuditConsultaEmVoo.token == token,
+        JuditConsultaEmVoo.aguardando == 0
+    )).rowcount
+    if not apagada:
+        status_code, resposta = resultado
+        db.execute(
+            update(JuditConsultaEmVoo)
+            .where(JuditConsultaEmVoo.chave == chave, JuditConsultaEmVoo.token == token)
+            .values(status_code=status_code, resposta=resposta, concluido_at=_agora())
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+
+def liberar(db: Session, chave: str, token: str):
+    """Desfaz a reserva sem resposta (a chamada falhou) e faz commit"""
+    db.execute(delete(JuditConsultaEmVoo).where(
+        JuditConsultaEmVoo.chave == chave, JuditConsultaEmVoo.token == token
+    ))
+    db.commit()
+
+
+def situacao(db: Session, chave: str) -> Optional[Any]:
+    """Linha atual da chave (token, expira_at, status_code, resposta, concluido_at) ou None"""
+    linha = db.execute(
+        select(
+            JuditConsultaEmVoo.token, JuditConsultaEmVoo.expira_at, JuditConsultaEmVoo.status_code,
+            JuditConsultaEmVoo.resposta, JuditConsultaEmVoo.concluido_at
+        ).where(JuditConsultaEmVoo.chave == chave)
+    ).first()
+    db.commit()
+    return linha
+
+
+def limpar(db: Session) -> int:
+    """Remove reservas concluídas ou abandonadas há mais de RETENCAO e faz commit"""
+    removidas = db.execute(
+        delete(JuditConsultaEmVoo).where(JuditConsultaEmVoo.expira_at < _agora() - RETENCAO)
+    ).rowcount
+    db.commit()
+    return removidas
+
+
+async def _no_banco(funcao: Callable[..., Any], *args) -> Any:
+    """Executa funcao(db, *args) numa sessão própria, no executor"""
+    def executar():
+        db = SessionLocal()
+        try:
+            return funcao(db, *args)
+        finally:
+            db.close()
+    return await asyncio.get_running_loop().run_in_executor(None, executar)
+
+
+async def executar(chave: str, chamada: Callable[[], Awaitable[Tuple[int, Any]]]) -> Tuple[Tuple[int, Any], bool]:
+    """
+    Executa a chamada uma única vez entre os processos
+
+    A chamada precisa devolver (status, corpo JSON), que é o que fica gravado
+    para os demais processos.
+
+    Returns:
+        (resultado, compartilhado) - compartilhado=True quando a resposta veio
+        da chamada de outro processo
+    """
+    if settings.JUDIT_COALESCENCIA_LEASE_SEGUNDOS <= 0:
+        return await chamada(), False
+
+    token = str(uuid.uuid4())
+    espera = settings.JUDIT_COALESCENCIA_ESPERA_MS / 1000.0
+
+    while not await _no_banco(reservar, chave, token):
+        # Aguarda a reserva que está em voo; se ela sumir ou vencer, tenta reservar de novo
+        em_voo = await _no_banco(aguardar, chave)
+        while em_voo is not None:
+            await asyncio.sleep(espera)
+            linha = await _no_banco(situacao, chave)
+            if linha is None or linha.token != em_voo:
+                break
+            if linha.concluido_at is not None:
+                return (linha.status_code, linha.resposta), True
+            if _utc(linha.expira_at) < _agora():
+                break
+
+    try:
+        resultado = await chamada()
+    except BaseException:
+        await asyncio.shield(_no_banco(liberar, chave, token))
+        raise
+    await _no_banco(concluir, chave, token, resultado)
+    return resultado, False
@@ -0,0 +1,118 @@
+"""
+Motor de despacho assíncrono para a API Judit.io
+
+Executa as consultas de um lote com um número limitado de requisições
+simultâneas. O ritmo das chamadas é controlado pelo limitador adaptativo
+do provedor (ver rate_limiter).
+
+Consultas idênticas em voo ao mesmo tempo (no mesmo lote ou em lotes
+diferentes) são unidas pelo CoalescedorRequisicoes numa única chamada
+externa: dentro do processo por um Future compartilhado e entre os processos
+worker pela reserva da chave em judit_consultas_em_voo (ver judit_coalescencia).
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from . import judit_coalescencia
+
+# (chave, chamada) -> (resultado, compartilhado)
+Coalescencia = Callable[[str, Callable[[], Awaitable[Any]]], Awaitable[Tuple[Any, bool]]]
+
+
+class DespachanteJudit:
+    """
+    Despacha tarefas assíncronas com concorrência limitada
+    (a vazão de cada lote é registrada em JuditBatch.throughput ao finalizá-lo)
+    """
+
+    def __init__(self, max_concorrencia: int):
+        self.max_concorrencia = max(1, max_concorrencia)
+
+    async def executar(
+        self,
+        itens: Iterable[Any],
+        tarefa: Callable[[Any], Awaitable[None]]
+    ):
+        """
+        Executa `tarefa` para cada item e retorna quando todos terminarem
+        """
+        fila: asyncio.Queue = asyncio.Queue()
+        for item in itens:
+            fila.put_nowait(item)
+
+        total = fila.qsize()
+        if not total:
+            return
+
+        async def trabalhador():
+            while True:
+                try:
+                    item = fila.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await tarefa(item)
+                except Exception as e:
+                    print(f"[JUDIT] Erro não tratado no despacho: {str(e)}")
+
+        trabalhadores = min(self.max_concorrencia, total)
+        await asyncio.gather(*(trabalhador() for _ in range(trabalhadores)))
+
+
+class CoalescedorRequisicoes:
+    """
+    Une chamadas idênticas em andamento: a primeira executa, as demais aguardam
+    o mesmo resultado (ou a mesma exceção)
+
+    Usa concurrent.futures.Future para valer entre event loops de threads
+    diferentes (BackgroundTasks e lifespan rodam cada um o seu asyncio.run).
+    Com `entre_processos`, a chamada do dono ainda passa por essa coalescência
+    (outro processo pode já ter a mesma consulta em voo).
+    """
+
+    def __init__(self, entre_processos: Optional[Coalescencia] = None):
+        self.entre_processos = entre_processos
+        self._em_voo: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def em_voo(self) -> int:
+        with self._lock:
+            return len(self._em_voo)
+
+    async def executar(self, chave: str, chamada: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Returns:
+            (resultado, compartilhado) - compartilhado=True quando outra
+            chamada já em voo (deste ou de outro processo) forneceu o resultado
+        """
+        with self._lock:
+            futuro = self._em_voo.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = concurrent.futures.Future()
+                self._em_voo[chave] = futuro
+
+        if not dono:
+            return await asyncio.wrap_future(futuro), True
+
+        try:
+            if self.entre_processos:
+                resultado, compartilhado = await self.entre_processos(chave, chamada)
+            else:
+                resultado, compartilhado = await chamada(), False
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado, compartilhado
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+
+
+# Instância compartilhada pelo processo (coalesce entre lotes e entre workers)
+coalescedor_requisicoes = CoalescedorRequisicoes(entre_processos=judit_coalescencia.executar)
@@ -0,0 +1,177 @@
+"""
+Exportação dos resultados Judit.io em streaming (NDJSON, CSV e XLSX)
+
+Os resultados são lidos com yield_per (cursor do lado do servidor no
+PostgreSQL) e escritos linha a linha; a memória usada não depende do
+tamanho do lote. Processos comprimidos (judit_storage) são carregados
+um bloco de resultados por vez. O XLSX usa o modo write-only do openpyxl, que grava num
+arquivo temporário enviado em blocos ao final.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from openpyxl import Workbook
+from sqlalchemy.orm import Query, Session
+
+from ..db.base import SessionLocal
+from ..models.judit import JuditResult
+from . import judit_storage
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+LINHAS_POR_LOTE = 500
+TAMANHO_BLOCO = 64 * 1024
+
+# Mesmas colunas da exportação feita antes no navegador (uma linha por processo)
+COLUNAS = [
+    "Deal ID", "Documento", "Tipo", "Nome", "Empresa", "Quantidade Processos", "Status", "Erro",
+    "Processado em", "Número CNJ", "Tribunal", "Justiça", "Instância", "Valor Causa",
+    "Data Distribuição", "Fase", "Status Processo", "Polo Ativo", "Polo Passivo", "Classe",
+    "Assunto", "Vara",
+]
+
+
+def _nomes(itens: Any, filtro: Callable[[Dict[str, Any]], bool] = lambda item: True) -> str:
+    return "; ".join(
+        str(item.get("name", "")) for item in (itens or []) if isinstance(item, dict) and filtro(item)
+    )
+
+
+def _linhas_planilha(resultado: JuditResult, processos: List[Any]) -> Iterator[List[Any]]:
+    """Uma linha por processo encontrado, ou uma linha só com os dados do registro"""
+    base = [
+        resultado.deal_id or "",
+        resultado.documento or "",
+        resultado.doc_type or "",
+        resultado.nome or "",
+        resultado.empresa or "",
+        resultado.qtd_processos or 0,
+        resultado.status or "",
+        resultado.erro or "",
+        resultado.processado_at.isoformat() if resultado.processado_at else "",
+    ]
+
+    processos = [processo for processo in (processos or []) if isinstance(processo, dict)]
+    if not processos:
+        yield base + [""] * (len(COLUNAS) - len(base))
+        return
+
+    for processo in processos:
+        partes = processo.get("parties")
+        yield base + [
+            processo.get("code") or "",
+            processo.get("tribunal_acronym") or "",
+            processo.get("justice") or "",
+            processo.get("instance") or "",
+            processo.get("amount") or "",
+            processo.get("distribution_date") or "",
+            processo.get("phase") or "",
+            processo.get("status") or "",
+            _nomes(partes, lambda parte: parte.get("side") == "Active"),
+            _nomes(partes, lambda parte: parte.get("side") == "Passive"),
+            _nomes(processo.get("classifications")),
+            _nomes(processo.get("subjects")),
+            _nomes(processo.get("courts")),
+        ]
+
+
+def _iterar(consulta: Callable[[Session], Query]) -> Iterator[Tuple[JuditResult, List[Any]]]:
+    """
+    Percorre (resultado, processos) com sessão própria (o gerador vive além da requisição)
+    Os processos comprimidos são lidos numa consulta por bloco de LINHAS_POR_LOTE
+    """
+    db = SessionLocal()
+    try:
+        bloco: List[JuditResult] = []
+        for resultado in consulta(db).order_by(JuditResult.id).yield_per(LINHAS_POR_LOTE):
+            bloco.append(resultado)
+            if len(bloco) >= LINHAS_POR_LOTE:
+                yield from _com_processos(db, bloco)
+                bloco = []
+        yield from _com_processos(db, bloco)
+    finally:
+        db.close()
+
+
+def _com_processos(db: Session, bloco: List[JuditResult]) -> Iterator[Tuple[JuditResult, List[Any]]]:
+    processos = judit_storage.carregar_processos(db, bloco)
+    for resultado in bloco:
+        yield resultado, processos.get(resultado.id, [])
+
+
+def gerar_ndjson(consulta: Callable[[Session], Query]) -> Iterator[bytes]:
+    """Um objeto JSON por resultado, com os processos completos"""
+    for resultado, processos in _iterar(consulta):
+        yield (json.dumps({
+            "id": resultado.id,
+            "deal_id": resultado.deal_id,
+            "documento": resultado.documento,
+            "doc_type": resultado.doc_type,
+            "cpf": resultado.cpf,
+            "cnpj": resultado.cnpj,
+            "nome": resultado.nome,
+            "empresa": resultado.empresa,
+            "status": resultado.status,
+            "qtd_processos": resultado.qtd_processos,
+            "processos": processos,
+            "erro": resultado.erro,
+            "processado_at": resultado.processado_at.isoformat() if resultado.processado_at else None,
+        }, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def gerar_csv(consulta: Callable[[Session], Query]) -> Iterator[bytes]:
+    """CSV separado por ";" com BOM (abre direto no Excel em português)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=";")
+
+    buffer.write("\ufeff")
+    escritor.writerow(COLUNAS)
+
+    for resultado, processos in _iterar(consulta):
+        for linha in _linhas_planilha(resultado, processos):
+            escritor.writerow(linha)
+        if buffer.tell() >= TAMANHO_BLOCO:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def gerar_xlsx(consulta: Callable[[Session], Query]) -> Iterator[bytes]:
+    """Planilha em modo write-only, enviada em blocos a partir de um arquivo temporário"""
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet("Resultados")
+    planilha.append(COLUNAS)
+
+    for resultado, processos in _iterar(consulta):
+        for linha in _linhas_planilha(resultado, processos):
+            planilha.append(linha)
+
+    descritor, caminho = tempfile.mkstemp(suffix=".xlsx")
+    os.close(descritor)
+    try:
+        workbook.save(caminho)
+        with open(caminho, "rb") as arquivo:
+            while True:
+                bloco = arquivo.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                yield bloco
+    finally:
+        os.remove(caminho)
+
+
+GERADORES = {
+    "ndjson": gerar_ndjson,
+    "csv": gerar_csv,
+    "xlsx": gerar_xlsx,
+}
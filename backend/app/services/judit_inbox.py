@@ -0,0 +1,132 @@
+"""
+Caixa de entrada durável dos callbacks Judit.io
+
+O endpoint /webhook apenas grava o payload bruto em judit_webhook_inbox e
+responde; o processamento é feito em blocos (FOR UPDATE SKIP LOCKED) pela
+API ou pelo worker. Reenvios idênticos da Judit são descartados na gravação
+pela chave (sha256 do payload).
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, or_, and_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.judit import JuditWebhookInbox
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def chave_payload(payload: Dict[str, Any]) -> str:
+    """sha256 do payload em forma canônica"""
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def registrar(db: Session, payload: Dict[str, Any]) -> bool:
+    """
+    Grava o callback na caixa de entrada e faz commit
+
+    Returns:
+        False quando o mesmo payload já havia sido recebido
+    """
+    webhook_payload = payload.get("payload") or {}
+    linha = {
+        "chave": chave_payload(payload),
+        "judit_request_id": webhook_payload.get("request_id"),
+        "response_type": webhook_payload.get("response_type"),
+        "payload": payload,
+        "status": "pendente",
+        "tentativas": 0,
+    }
+
+    dialeto = db.get_bind().dialect.name
+    if dialeto == "postgresql":
+        stmt = postgresql.insert(JuditWebhookInbox).values(linha).on_conflict_do_nothing(
+            index_elements=[JuditWebhookInbox.chave]
+        )
+    elif dialeto == "sqlite":
+        stmt = sqlite.insert(JuditWebhookInbox).values(linha).on_conflict_do_nothing(
+            index_elements=[JuditWebhookInbox.chave]
+        )
+    else:
+        if db.query(JuditWebhookInbox.id).filter(JuditWebhookInbox.chave == linha["chave"]).first():
+            return False
+        stmt = insert(JuditWebhookInbox).values(linha)
+
+    resultado = db.execute(stmt)
+    db.commit()
+    return bool(resultado.rowcount)
+
+
+def _filtro_disponivel(agora: datetime):
+    """Callbacks pendentes ou cujo lease expirou"""
+    return or_(
+        JuditWebhookInbox.status == "pendente",
+        and_(
+            JuditWebhookInbox.status == "processando",
+            JuditWebhookInbox.lease_ate < agora
+        )
+    )
+
+
+def reivindicar(db: Session, worker_id: str, limite: Optional[int] = None) -> List[JuditWebhookInbox]:
+    """Reivindica até `limite` callbacks, na ordem de chegada (mesmo esquema da judit_queue)"""
+    limite = limite or settings.JUDIT_INBOX_TAMANHO_LOTE
+    agora = _agora()
+    lease_ate = agora + timedelta(seconds=settings.JUDIT_FILA_LEASE_SEGUNDOS)
+
+    ids = [
+        row.id for row in db.query(JuditWebhookInbox.id)
+        .filter(_filtro_disponivel(agora))
+        .order_by(JuditWebhookInbox.id)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+        .all()
+    ]
+    if not ids:
+        db.commit()
+        return []
+
+    db.execute(
+        update(JuditWebhookInbox)
+        .where(JuditWebhookInbox.id.in_(ids), _filtro_disponivel(agora))
+        .values(
+            status="processando",
+            worker_id=worker_id,
+            lease_ate=lease_ate,
+            tentativas=JuditWebhookInbox.tentativas + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    return (
+        db.query(JuditWebhookInbox)
+        .filter(
+            JuditWebhookInbox.id.in_(ids),
+            JuditWebhookInbox.worker_id == worker_id,
+            JuditWebhookInbox.lease_ate == lease_ate
+        )
+        .order_by(JuditWebhookInbox.id)
+        .all()
+    )
+
+
+def finalizar(db: Session, ids: List[int], status: str = "processado", erro: Optional[str] = None):
+    """Marca callbacks como finalizados (não faz commit: vai junto com os resultados)"""
+    if not ids:
+        return
+    db.execute(
+        update(JuditWebhookInbox)
+        .where(JuditWebhookInbox.id.in_(ids))
+        .values(status=status, erro=erro, processado_at=_agora())
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,259 @@
+"""
+Ingestão dos processos Judit.io em tabelas normalizadas
+
+Cada resultado gravado é "explodido" em:
+- lawsuits: um registro por número CNJ (campos filtráveis + payload completo)
+- lawsuit_parties: partes do processo, com documento só com dígitos
+- judit_result_lawsuits: vínculo resultado/negócio -> processo
+
+Assim consultas entre lotes ("negócios com processo trabalhista ativo no
+TRT2") viram buscas por índice em vez de varrer os JSONs em Python.
+
+lawsuits guarda a versão mais recente de cada processo, para as consultas; o
+que cada resultado recebeu da Judit continua em judit_storage. Um processo
+sem nenhum vínculo (lotes excluídos ou meses arquivados) é apagado junto com
+as partes por desvincular.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models.judit import JuditLawsuit, JuditLawsuitParty, JuditResultLawsuit
+
+# (result_id, batch_id, deal_id, processos)
+ItemIngestao = Tuple[int, str, Optional[str], List[Dict[str, Any]]]
+
+TAMANHO_BLOCO = 500
+
+
+def _digitos(valor: Any) -> str:
+    return ''.join(filter(str.isdigit, str(valor or '')))
+
+
+def _texto(valor: Any, tamanho: int) -> Optional[str]:
+    """Texto truncado para a coluna (None quando vazio)"""
+    if valor in (None, ""):
+        return None
+    return str(valor)[:tamanho]
+
+
+def _primeiro_nome(itens: Any) -> Optional[str]:
+    for item in itens or []:
+        if isinstance(item, dict) and item.get("name"):
+            return _texto(item["name"], 255)
+    return None
+
+
+def _data(valor: Any) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        data = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+
+def _valor(valor: Any) -> Optional[float]:
+    if valor in (None, ""):
+        return None
+    if isinstance(valor, dict):
+        valor = valor.get("value")
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalizar(processo: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Colunas de lawsuits a partir de um processo da Judit (None sem número CNJ)"""
+    if not isinstance(processo, dict) or not processo.get("code"):
+        return None
+    return {
+        "cnj": _texto(processo["code"], 30),
+        "nome": processo.get("name"),
+        "tribunal": _texto(processo.get("tribunal_acronym"), 20),
+        "justica": _texto(processo.get("justice_description") or processo.get("justice"), 50),
+        "instancia": _texto(processo.get("instance"), 20),
+        "classe": _primeiro_nome(processo.get("classifications")),
+        "assunto": _primeiro_nome(processo.get("subjects")),
+        "status": _texto(processo.get("status"), 50),
+        "fase": _texto(processo.get("phase"), 100),
+        "valor": _valor(processo.get("amount")),
+        "data_distribuicao": _data(processo.get("distribution_date")),
+        "payload": processo,
+    }
+
+
+def _partes(lawsuit_id: int, processo: Dict[str, Any]) -> List[Dict[str, Any]]:
+    partes = []
+    for parte in processo.get("parties") or []:
+        if not isinstance(parte, dict):
+            continue
+        documento = _digitos(parte.get("main_document"))
+        if not documento:
+            for doc in parte.get("documents") or []:
+                if isinstance(doc, dict) and _digitos(doc.get("document")):
+                    documento = _digitos(doc.get("document"))
+                    break
+        partes.append({
+            "lawsuit_id": lawsuit_id,
+            "nome": _texto(parte.get("name"), 255),
+            "documento": _texto(documento, 20),
+            "lado": _texto(parte.get("side"), 20),
+            "tipo": _texto(parte.get("person_type"), 50),
+        })
+    return partes
+
+
+def _upsert_lawsuits(db: Session, linhas: List[Dict[str, Any]]) -> Dict[str, int]:
+    """INSERT ... ON CONFLICT (cnj) DO UPDATE; retorna {cnj: id}"""
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialeto == "postgresql" else sqlite
+        stmt = modulo.insert(JuditLawsuit).values(linhas)
+        colunas = {
+            coluna: getattr(stmt.excluded, coluna)
+            for coluna in linhas[0] if coluna != "cnj"
+        }
+        colunas["updated_at"] = datetime.now(timezone.utc)
+        stmt = stmt.on_conflict_do_update(index_elements=[JuditLawsuit.cnj], set_=colunas)
+        return {row.cnj: row.id for row in db.execute(stmt.returning(JuditLawsuit.id, JuditLawsuit.cnj))}
+
+    existentes = {
+        lawsuit.cnj: lawsuit for lawsuit in
+        db.query(JuditLawsuit).filter(JuditLawsuit.cnj.in_([linha["cnj"] for linha in linhas]))
+    }
+    for linha in linhas:
+        lawsuit = existentes.get(linha["cnj"])
+        if lawsuit is None:
+            lawsuit = existentes[linha["cnj"]] = JuditLawsuit(**linha)
+            db.add(lawsuit)
+        else:
+            for coluna, valor in linha.items():
+                setattr(lawsuit, coluna, valor)
+    db.flush()
+    return {cnj: lawsuit.id for cnj, lawsuit in existentes.items()}
+
+
+def _vincular(db: Session, vinculos: List[Dict[str, Any]]):
+    """Insere vínculos resultado/processo ignorando os já existentes"""
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialeto == "postgresql" else sqlite
+        db.execute(modulo.insert(JuditResultLawsuit).values(vinculos).on_conflict_do_nothing(
+            index_elements=[JuditResultLawsuit.result_id, JuditResultLawsuit.lawsuit_id]
+        ))
+        return
+
+    existentes = set(db.execute(
+        select(JuditResultLawsuit.result_id, JuditResultLawsuit.lawsuit_id)
+        .where(JuditResultLawsuit.result_id.in_({vinculo["result_id"] for vinculo in vinculos}))
+    ).all())
+    novos = [v for v in vinculos if (v["result_id"], v["lawsuit_id"]) not in existentes]
+    if novos:
+        db.execute(insert(JuditResultLawsuit).values(novos))
+
+
+def ingerir(db: Session, itens: Iterable[ItemIngestao], sobrescrever: bool = True) -> int:
+    """
+    Normaliza os processos dos resultados informados (não faz commit)
+    Com sobrescrever=False (restauração de arquivos) processos já gravados
+    mantêm a versão atual e só recebem os vínculos
+
+    Returns:
+        Quantidade de processos distintos gravados/atualizados
+    """
+    por_cnj: Dict[str, Dict[str, Any]] = {}
+    referencias: List[Tuple[int, str, Optional[str], str]] = []
+
+    for result_id, batch_id, deal_id, processos in itens:
+        for processo in processos or []:
+            linha = normalizar(processo)
+            if linha is None:
+                continue
+            por_cnj[linha["cnj"]] = linha
+            referencias.append((result_id, batch_id, deal_id, linha["cnj"]))
+
+    if not por_cnj:
+        return 0
+
+    # Ordem fixa por CNJ evita deadlock entre workers gravando os mesmos processos
+    linhas = [por_cnj[cnj] for cnj in sorted(por_cnj)]
+    ids: Dict[str, int] = {}
+    if not sobrescrever:
+        ids = dict(db.execute(
+            select(JuditLawsuit.cnj, JuditLawsuit.id).where(JuditLawsuit.cnj.in_(list(por_cnj)))
+        ).all())
+        linhas = [linha for linha in linhas if linha["cnj"] not in ids]
+
+    if linhas:
+        gravados = _upsert_lawsuits(db, linhas)
+        ids.update(gravados)
+
+        # Partes sempre refletem a versão mais recente do processo
+        db.execute(delete(JuditLawsuitParty).where(JuditLawsuitParty.lawsuit_id.in_(list(gravados.values()))))
+        partes = [parte for linha in linhas for parte in _partes(ids[linha["cnj"]], linha["payload"])]
+        if partes:
+            db.execute(insert(JuditLawsuitParty).values(partes))
+
+    vinculos = {
+        (result_id, ids[cnj]): {
+            "result_id": result_id,
+            "lawsuit_id": ids[cnj],
+            "batch_id": batch_id,
+            "deal_id": deal_id or None,
+        }
+        for result_id, batch_id, deal_id, cnj in referencias
+    }
+    _vincular(db, list(vinculos.values()))
+
+    return len(linhas)
+
+
+def desvincular(db: Session, *condicoes) -> int:
+    """
+    Remove os vínculos que atendem às condições e apaga os processos que
+    ficaram sem nenhum vínculo, com as partes (não faz commit)
+
+    Returns:
+        Quantidade de processos apagados
+    """
+    candidatos = db.execute(
+        select(JuditResultLawsuit.lawsuit_id).where(*condicoes).distinct()
+    ).scalars().all()
+    db.execute(delete(JuditResultLawsuit).where(*condicoes).execution_options(synchronize_session=False))
+    if not candidatos:
+        return 0
+
+    # Mesma ordem (CNJ) de ingerir: a trava impede que uma ingestão concorrente
+    # vincule um processo enquanto ele é apagado, sem deadlock entre as duas
+    ids = [
+        lawsuit_id for lawsuit_id, _ in sorted(
+            db.execute(select(JuditLawsuit.id, JuditLawsuit.cnj).where(JuditLawsuit.id.in_(candidatos))).all(),
+            key=lambda linha: linha[1]
+        )
+    ]
+    apagados = 0
+    for posicao in range(0, len(ids), TAMANHO_BLOCO):
+        bloco = db.execute(
+            select(JuditLawsuit.id)
+            .where(JuditLawsuit.id.in_(ids[posicao:posicao + TAMANHO_BLOCO]))
+            .order_by(JuditLawsuit.cnj)
+            .with_for_update()
+        ).scalars().all()
+        orfaos = db.execute(
+            select(JuditLawsuit.id).where(
+                JuditLawsuit.id.in_(bloco),
+                ~exists().where(JuditResultLawsuit.lawsuit_id == JuditLawsuit.id)
+            )
+        ).scalars().all()
+        if orfaos:
+            db.execute(delete(JuditLawsuitParty).where(JuditLawsuitParty.lawsuit_id.in_(orfaos)))
+            apagados += db.execute(
+                delete(JuditLawsuit).where(JuditLawsuit.id.in_(orfaos)).execution_options(synchronize_session=False)
+            ).rowcount or 0
+    return apagados
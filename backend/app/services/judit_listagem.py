@@ -0,0 +1,119 @@
+"""
+Listagem paginada dos lotes Judit.io (/batches) com cache de curta duração
+
+As páginas ficam em memória por JUDIT_BATCHES_CACHE_SEGUNDOS e são
+invalidadas quando um lote muda de status ou surge um lote novo no
+barramento de progresso (no PostgreSQL o barramento recebe os eventos de
+todas as instâncias e do worker). Cada página leva um ETag com o hash do
+conteúdo: If-None-Match igual ao da página em cache responde 304 sem ir
+ao banco.
+"""
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ..core.config import settings
+from .judit_progress import barramento_progresso
+
+
+def codificar_cursor(created_at: Optional[datetime], batch_id: int) -> str:
+    """Cursor opaco com a posição (created_at, id) do último lote da página"""
+    bruto = f"{created_at.isoformat() if created_at else ''}|{batch_id}"
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Inverso de codificar_cursor (ValueError se inválido)"""
+    try:
+        data, batch_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return (datetime.fromisoformat(data) if data else None), int(batch_id)
+    except (TypeError, UnicodeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+def gerar_etag(corpo: Dict[str, Any]) -> str:
+    conteudo = json.dumps(corpo, sort_keys=True, default=str).encode("utf-8")
+    return f'"{hashlib.sha1(conteudo).hexdigest()}"'
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match (lista separada por vírgulas, aceita W/ e *) contém o ETag?"""
+    if not if_none_match:
+        return False
+    candidatos = {valor.strip().removeprefix("W/") for valor in if_none_match.split(",")}
+    return "*" in candidatos or etag in candidatos
+
+
+class CacheListagem:
+    """Páginas de /batches em memória, com validade curta e invalidação por eventos"""
+
+    def __init__(self, ttl_segundos: Optional[float] = None, tamanho: int = 256):
+        self.ttl = settings.JUDIT_BATCHES_CACHE_SEGUNDOS if ttl_segundos is None else ttl_segundos
+        self.tamanho = tamanho
+        self._paginas: "OrderedDict[Hashable, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._status: Dict[str, str] = {}
+        self._geracao = 0
+        self._lock = threading.Lock()
+
+    @property
+    def geracao(self) -> int:
+        """Muda a cada invalidação (ler antes da consulta e repassar a guardar)"""
+        return self._geracao
+
+    def obter(self, chave: Hashable) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(etag, corpo) da página, ou None se ausente/expirada"""
+        with self._lock:
+            entrada = self._paginas.get(chave)
+            if entrada is None:
+                return None
+            expira, etag, corpo = entrada
+            if expira < time.monotonic():
+                del self._paginas[chave]
+                return None
+            self._paginas.move_to_end(chave)
+            return etag, corpo
+
+    def guardar(self, chave: Hashable, corpo: Dict[str, Any], geracao: int) -> str:
+        """
+        Guarda a página e retorna o ETag; não guarda se houve invalidação
+        desde que a consulta começou (a página pode estar desatualizada)
+        """
+        etag = gerar_etag(corpo)
+        if self.ttl <= 0:
+            return etag
+        with self._lock:
+            if geracao != self._geracao:
+                return etag
+            self._paginas[chave] = (time.monotonic() + self.ttl, etag, corpo)
+            self._paginas.move_to_end(chave)
+            while len(self._paginas) > self.tamanho:
+                self._paginas.popitem(last=False)
+            for lote in corpo.get("data", []):
+                self._status[lote["batch_id"]] = lote["status"]
+        return etag
+
+    def invalidar(self):
+        with self._lock:
+            self._paginas.clear()
+            self._status.clear()
+            self._geracao += 1
+
+    def observar(self, evento: Dict[str, Any]):
+        """Ouvinte do barramento: invalida quando o status de um lote muda (ou o lote é novo)"""
+        status = evento.get("status")
+        if status is None:
+            return
+        with self._lock:
+            if not self._paginas or self._status.get(evento.get("batch_id")) == status:
+                return
+        self.invalidar()
+
+
+# Instância compartilhada pelo processo
+cache_listagem = CacheListagem()
+barramento_progresso.ouvir(cache_listagem.observar)
@@ -0,0 +1,169 @@
+"""
+Progresso dos lotes Judit.io em tempo real (alimenta o SSE de /status/{batch_id}/stream)
+
+O GravadorResultados e as mudanças de status do lote publicam um snapshot
+do lote a cada gravação. Em PostgreSQL a publicação é um NOTIFY, que chega
+a todas as instâncias da API e também sai do worker separado; uma thread
+com LISTEN repassa os eventos aos assinantes locais. Nos demais bancos o
+evento é entregue direto aos assinantes do próprio processo.
+"""
+import asyncio
+import json
+import select
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+CANAL = "judit_progresso"
+STATUS_FINAIS = ("concluído", "erro")
+
+
+def snapshot(batch: Any) -> Dict[str, Any]:
+    """
+    Estado do lote para o stream (aceita JuditBatch ou linha de RETURNING
+    com os mesmos atributos)
+    """
+    processados = batch.processados or 0
+    total = batch.total or 0
+
+    throughput = getattr(batch, "throughput", None)
+    iniciado = getattr(batch, "iniciado_at", None)
+    if not throughput and iniciado is not None and processados:
+        if iniciado.tzinfo is None:
+            iniciado = iniciado.replace(tzinfo=timezone.utc)
+        duracao = (datetime.now(timezone.utc) - iniciado).total_seconds()
+        throughput = processados / duracao if duracao > 0 else None
+
+    restantes = max(total - processados, 0)
+    eta = round(restantes / throughput, 1) if throughput and batch.status not in STATUS_FINAIS else None
+
+    return {
+        "batch_id": batch.batch_id,
+        "status": batch.status,
+        "total": total,
+        "processados": processados,
+        "sucesso": batch.sucesso or 0,
+        "erro": batch.erro or 0,
+        "throughput": round(throughput, 2) if throughput else None,
+        "eta_segundos": eta if restantes else 0,
+    }
+
+
+class BarramentoProgresso:
+    """Pub/sub em memória: cada conexão SSE assina o lote que acompanha"""
+
+    def __init__(self):
+        self._assinantes: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._ouvintes: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._escuta: Optional[threading.Thread] = None
+        self._parar_escuta = threading.Event()
+
+    def assinar(self, batch_id: str) -> asyncio.Queue:
+        """Registra uma fila para os eventos do lote (chamar dentro do event loop)"""
+        fila: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._assinantes.setdefault(batch_id, set()).add((asyncio.get_running_loop(), fila))
+        return fila
+
+    def cancelar(self, batch_id: str, fila: asyncio.Queue):
+        with self._lock:
+            assinantes = self._assinantes.get(batch_id, set())
+            for assinante in [a for a in assinantes if a[1] is fila]:
+                assinantes.discard(assinante)
+            if not assinantes:
+                self._assinantes.pop(batch_id, None)
+
+    def ouvir(self, ouvinte: Callable[[Dict[str, Any]], None]):
+        """Registra uma função chamada com todos os eventos, de qualquer lote (ex.: invalidar caches)"""
+        with self._lock:
+            self._ouvintes.append(ouvinte)
+
+    def entregar(self, evento: Dict[str, Any]):
+        """Entrega o evento aos assinantes locais (seguro a partir de qualquer thread)"""
+        with self._lock:
+            assinantes = list(self._assinantes.get(evento.get("batch_id"), ()))
+            ouvintes = list(self._ouvintes)
+        for ouvinte in ouvintes:
+            try:
+                ouvinte(evento)
+            except Exception as e:
+                print(f"[JUDIT] Erro em ouvinte de progresso: {str(e)}")
+        for loop, fila in assinantes:
+            try:
+                loop.call_soon_threadsafe(fila.put_nowait, evento)
+            except RuntimeError:
+                # Event loop já encerrado: a conexão caiu
+                self.cancelar(evento.get("batch_id"), fila)
+
+    def publicar(self, db: Session, eventos: List[Dict[str, Any]]):
+        """
+        Publica snapshots já gravados (chamar após o commit)
+        PostgreSQL: NOTIFY (entregue pela thread de escuta de cada instância da API)
+        """
+        if not eventos:
+            return
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                for evento in eventos:
+                    db.execute(
+                        text("SELECT pg_notify(:canal, :dados)"),
+                        {"canal": CANAL, "dados": json.dumps(evento, default=str)}
+                    )
+                db.commit()
+            else:
+                for evento in eventos:
+                    self.entregar(evento)
+        except Exception as e:
+            # Progresso é best-effort: nunca derruba a gravação dos resultados
+            db.rollback()
+            print(f"[JUDIT] Erro ao publicar progresso: {str(e)}")
+
+    def iniciar_escuta(self, engine):
+        """Inicia a thread de LISTEN (somente PostgreSQL)"""
+        if engine.dialect.name != "postgresql" or (self._escuta and self._escuta.is_alive()):
+            return
+        self._parar_escuta.clear()
+        self._escuta = threading.Thread(target=self._escutar, args=(engine,), name="judit-progresso", daemon=True)
+        self._escuta.start()
+
+    def parar_escuta(self):
+        self._parar_escuta.set()
+
+    def _escutar(self, engine):
+        while not self._parar_escuta.is_set():
+            conexao = None
+            try:
+                conexao = engine.raw_connection()
+                driver = conexao.driver_connection
+                driver.autocommit = True
+                with driver.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CANAL}")
+
+                while not self._parar_escuta.is_set():
+                    if select.select([driver], [], [], 5) == ([], [], []):
+                        continue
+                    driver.poll()
+                    while driver.notifies:
+                        notificacao = driver.notifies.pop(0)
+                        try:
+                            self.entregar(json.loads(notificacao.payload))
+                        except ValueError:
+                            pass
+            except Exception as e:
+                print(f"[JUDIT] Escuta de progresso interrompida: {str(e)}")
+                time.sleep(5)
+            finally:
+                if conexao is not None:
+                    try:
+                        conexao.invalidate()
+                    except Exception:
+                        pass
+
+
+# Instância compartilhada pelo processo
+barramento_progresso = BarramentoProgresso()
@@ -0,0 +1,127 @@
+"""
+Fila durável de processamento Judit.io
+
+Cada registro de um lote vira uma linha em judit_queue. Workers reivindicam
+itens com SELECT ... FOR UPDATE SKIP LOCKED e recebem um lease; se o processo
+morrer no meio do lote, os itens voltam para a fila quando o lease expira.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, or_, and_, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.judit import JuditQueueItem
+
+# Status que ainda exigem processamento
+STATUS_ABERTOS = ("pendente", "processando")
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enfileirar(db: Session, batch_id: str, dados: List[Dict[str, Any]]):
+    """Persiste os registros do lote na fila (não faz commit)"""
+    if not dados:
+        return
+    db.execute(
+        insert(JuditQueueItem),
+        [
+            {
+                "batch_id": batch_id,
+                "posicao": idx,
+                "registro": registro,
+                "status": "pendente",
+                "tentativas": 0
+            }
+            for idx, registro in enumerate(dados)
+        ]
+    )
+
+
+def _filtro_disponivel(agora: datetime):
+    """Itens pendentes ou cujo lease expirou"""
+    return or_(
+        JuditQueueItem.status == "pendente",
+        and_(
+            JuditQueueItem.status == "processando",
+            JuditQueueItem.lease_ate < agora
+        )
+    )
+
+
+def reivindicar(
+    db: Session,
+    worker_id: str,
+    limite: Optional[int] = None,
+    batch_id: Optional[str] = None
+) -> List[JuditQueueItem]:
+    """
+    Reivindica até `limite` itens disponíveis para o worker
+
+    Usa FOR UPDATE SKIP LOCKED (PostgreSQL) para que vários workers drenem
+    a fila em paralelo sem disputar as mesmas linhas.
+    """
+    limite = limite or settings.JUDIT_FILA_TAMANHO_LOTE
+    agora = _agora()
+    lease_ate = agora + timedelta(seconds=settings.JUDIT_FILA_LEASE_SEGUNDOS)
+
+    query = db.query(JuditQueueItem.id).filter(_filtro_disponivel(agora))
+    if batch_id:
+        query = query.filter(JuditQueueItem.batch_id == batch_id)
+
+    ids = [
+        row.id for row in query
+        .order_by(JuditQueueItem.id)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+        .all()
+    ]
+    if not ids:
+        db.commit()
+        return []
+
+    # O filtro é repetido no UPDATE para não roubar itens em bancos sem SKIP LOCKED
+    db.execute(
+        update(JuditQueueItem)
+        .where(JuditQueueItem.id.in_(ids), _filtro_disponivel(agora))
+        .values(
+            status="processando",
+            worker_id=worker_id,
+            lease_ate=lease_ate,
+            tentativas=JuditQueueItem.tentativas + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    return (
+        db.query(JuditQueueItem)
+        .filter(
+            JuditQueueItem.id.in_(ids),
+            JuditQueueItem.worker_id == worker_id,
+            JuditQueueItem.lease_ate == lease_ate
+        )
+        .order_by(JuditQueueItem.id)
+        .all()
+    )
+
+
+def itens_abertos(db: Session, batch_id: str) -> int:
+    """Quantidade de itens do lote ainda não finalizados"""
+    return db.query(JuditQueueItem).filter(
+        JuditQueueItem.batch_id == batch_id,
+        JuditQueueItem.status.in_(STATUS_ABERTOS)
+    ).count()
+
+
+def batches_pendentes(db: Session) -> List[str]:
+    """Lotes com itens disponíveis para processamento"""
+    return [
+        row.batch_id for row in db.query(JuditQueueItem.batch_id)
+        .filter(_filtro_disponivel(_agora()))
+        .distinct()
+        .all()
+    ]
@@ -0,0 +1,468 @@
+"""
+Particionamento mensal e retenção de judit_results / judit_requests
+
+No PostgreSQL as duas tabelas são particionadas por mês (processado_at e
+created_at, ver a migração partition_results_010). A manutenção:
+- cria as partições dos próximos JUDIT_PARTICOES_A_FRENTE meses (linhas
+  do mês que estavam na partição DEFAULT são movidas para a nova partição);
+- com JUDIT_RETENCAO_MESES > 0, arquiva os meses mais antigos em
+  JUDIT_ARQUIVO_DIR (Parquet quando pyarrow está instalado, senão NDJSON
+  comprimido com gzip) e remove a partição (DETACH + DROP), mantendo o
+  tamanho das tabelas "quentes" limitado. Linhas que caíram na partição
+  DEFAULT (fora das partições mensais) também são arquivadas, por mês.
+
+Os arquivos de resultados são autocontidos (processos completos, sem
+referência aos blobs deduplicados) e podem ser devolvidos ao banco com
+restaurar. O mês restaurado fica registrado em judit_restauracoes e a
+retenção não o arquiva de novo antes de JUDIT_RESTAURACAO_DIAS. Em outros
+bancos o arquivamento apaga as linhas do mês.
+
+O startup cria as tabelas com Base.metadata.create_all, que não particiona:
+no PostgreSQL, enquanto a migração partition_results_010 não for aplicada, a
+retenção não roda (apagar meses linha a linha numa tabela desse tamanho é o que
+o particionamento existe para evitar) e a manutenção avisa no log.
+"""
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, JSON, delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.base import engine
+from ..models.judit import JuditRequest, JuditResult, JuditResultLawsuit, JuditResultPayload, JuditRestauracao
+from . import judit_lawsuits, judit_storage
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Dependência opcional
+    pyarrow = None
+
+# tabela -> (modelo, coluna de partição)
+TABELAS = {
+    "judit_results": (JuditResult, "processado_at"),
+    "judit_requests": (JuditRequest, "created_at"),
+}
+
+TAMANHO_BLOCO = 500
+
+# Trava consultiva para que só uma instância faça a manutenção por vez
+TRAVA_MANUTENCAO = 7310016
+
+_PADRAO_ARQUIVO = re.compile(r"^(?P<tabela>judit_\w+?)_(?P<ano>\d{4})_(?P<mes>\d{2})\.(?P<formato>parquet|ndjson\.gz)$")
+
+
+def _mes(data: datetime) -> date:
+    return date(data.year, data.month, 1)
+
+
+def _somar_mes(mes: date, meses: int = 1) -> date:
+    total = mes.year * 12 + mes.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _limites(mes: date) -> Tuple[datetime, datetime]:
+    inicio = datetime(mes.year, mes.month, 1, tzinfo=timezone.utc)
+    fim = _somar_mes(mes)
+    return inicio, datetime(fim.year, fim.month, 1, tzinfo=timezone.utc)
+
+
+def particionada(db: Session, tabela: str) -> bool:
+    """True se a tabela é particionada (só PostgreSQL)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:tabela)"),
+        {"tabela": tabela}
+    ).first() is not None
+
+
+def particoes(db: Session, tabela: str) -> List[Tuple[str, date]]:
+    """Partições mensais existentes: [(nome, mês)] em ordem cronológica"""
+    nomes = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:tabela)"
+    ), {"tabela": tabela}).scalars()
+
+    padrao = re.compile(rf"^{tabela}_(\d{{4}})_(\d{{2}})$")
+    mensais = []
+    for nome in nomes:
+        encontrado = padrao.match(nome)
+        if encontrado:
+            mensais.append((nome, date(int(encontrado.group(1)), int(encontrado.group(2)), 1)))
+    return sorted(mensais, key=lambda particao: particao[1])
+
+
+def _criar_particao(db: Session, tabela: str, mes: date) -> str:
+    """
+    Cria a partição do mês (não faz commit)
+
+    O PostgreSQL recusa a partição se a DEFAULT tem linhas do mês: nesse caso
+    a partição é criada avulsa, recebe as linhas movidas da DEFAULT e só
+    então é anexada (ATTACH PARTITION), tudo na mesma transação.
+    """
+    nome = f"{tabela}_{mes:%Y_%m}"
+    if db.execute(text("SELECT to_regclass(:nome)"), {"nome": nome}).scalar() is not None:
+        return nome
+
+    limites = f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{_somar_mes(mes).isoformat()}')"
+    _, coluna = TABELAS[tabela]
+    padrao = f"{tabela}_default"
+    inicio, fim = _limites(mes)
+    no_padrao = f"{coluna} >= :inicio AND {coluna} < :fim"
+    ocupada = False
+    if db.execute(text("SELECT to_regclass(:nome)"), {"nome": padrao}).scalar() is not None:
+        ocupada = db.execute(
+            text(f"SELECT 1 FROM {padrao} WHERE {no_padrao} LIMIT 1"), {"inicio": inicio, "fim": fim}
+        ).first() is not None
+
+    if not ocupada:
+        db.execute(text(f"CREATE TABLE {nome} PARTITION OF {tabela} {limites}"))
+        return nome
+
+    db.execute(text(f"CREATE TABLE {nome} (LIKE {tabela} INCLUDING DEFAULTS)"))
+    movidas = db.execute(text(
+        f"WITH movidas AS (DELETE FROM {padrao} WHERE {no_padrao} RETURNING *) "
+        f"INSERT INTO {nome} SELECT * FROM movidas"
+    ), {"inicio": inicio, "fim": fim}).rowcount
+    db.execute(text(f"ALTER TABLE {tabela} ATTACH PARTITION {nome} {limites}"))
+    print(f"[JUDIT] Partição {nome}: {movidas} linhas movidas da partição DEFAULT")
+    return nome
+
+
+def garantir_particoes(db: Session, meses_a_frente: Optional[int] = None) -> List[str]:
+    """Cria as partições do mês atual e dos próximos meses que ainda não existem"""
+    meses_a_frente = settings.JUDIT_PARTICOES_A_FRENTE if meses_a_frente is None else meses_a_frente
+    atual = _mes(datetime.now(timezone.utc))
+    criadas = []
+
+    for tabela in TABELAS:
+        if not particionada(db, tabela):
+            continue
+        existentes = {mes for _, mes in particoes(db, tabela)}
+        for deslocamento in range(meses_a_frente + 1):
+            mes = _somar_mes(atual, deslocamento)
+            if mes not in existentes:
+                criadas.append(_criar_particao(db, tabela, mes))
+
+    db.commit()
+    for nome in criadas:
+        print(f"[JUDIT] Partição criada: {nome}")
+    return criadas
+
+
+# ---------------------------------------------------------------------------
+# Arquivos (Parquet / NDJSON.gz)
+# ---------------------------------------------------------------------------
+
+def _colunas(modelo) -> List[Any]:
+    return list(modelo.__table__.columns)
+
+
+def _esquema_parquet(modelo):
+    tipos = []
+    for coluna in _colunas(modelo):
+        if isinstance(coluna.type, Integer):
+            tipo = pyarrow.int64()
+        elif isinstance(coluna.type, Float):
+            tipo = pyarrow.float64()
+        elif isinstance(coluna.type, Boolean):
+            tipo = pyarrow.bool_()
+        elif isinstance(coluna.type, DateTime):
+            tipo = pyarrow.timestamp("us", tz="UTC")
+        else:
+            tipo = pyarrow.string()  # Textos e JSON (serializado)
+        tipos.append(pyarrow.field(coluna.name, tipo))
+    return pyarrow.schema(tipos)
+
+
+def _para_arquivo(modelo, linha: Dict[str, Any], parquet: bool) -> Dict[str, Any]:
+    """Converte JSON (e datas no NDJSON) para valores gravados no arquivo"""
+    saida = {}
+    for coluna in _colunas(modelo):
+        valor = linha.get(coluna.name)
+        if valor is not None and isinstance(coluna.type, JSON) and parquet:
+            valor = json.dumps(valor, ensure_ascii=False, default=str)
+        elif isinstance(valor, datetime) and not parquet:
+            valor = valor.isoformat()
+        saida[coluna.name] = valor
+    return saida
+
+
+def _do_arquivo(modelo, linha: Dict[str, Any], parquet: bool) -> Dict[str, Any]:
+    """Inverso de _para_arquivo"""
+    saida = {}
+    for coluna in _colunas(modelo):
+        valor = linha.get(coluna.name)
+        if isinstance(valor, str) and isinstance(coluna.type, JSON) and parquet:
+            valor = json.loads(valor)
+        elif isinstance(valor, str) and isinstance(coluna.type, DateTime):
+            valor = datetime.fromisoformat(valor)
+        saida[coluna.name] = valor
+    return saida
+
+
+def _escrever(caminho: str, modelo, blocos: Iterable[List[Dict[str, Any]]]) -> int:
+    """Grava os blocos de linhas no arquivo (extensão define o formato); retorna o total"""
+    total = 0
+    temporario = caminho + ".parcial"
+
+    if caminho.endswith(".parquet"):
+        esquema = _esquema_parquet(modelo)
+        with pyarrow.parquet.ParquetWriter(temporario, esquema, compression="zstd") as escritor:
+            for bloco in blocos:
+                linhas = [_para_arquivo(modelo, linha, True) for linha in bloco]
+                escritor.write_table(pyarrow.Table.from_pylist(linhas, schema=esquema))
+                total += len(linhas)
+    else:
+        with gzip.open(temporario, "wt", encoding="utf-8") as arquivo:
+            for bloco in blocos:
+                for linha in bloco:
+                    arquivo.write(json.dumps(_para_arquivo(modelo, linha, False), ensure_ascii=False, default=str) + "\n")
+                total += len(bloco)
+
+    # Só aparece com o nome final depois de completo
+    os.replace(temporario, caminho)
+    return total
+
+
+def _ler(caminho: str, modelo) -> Iterator[List[Dict[str, Any]]]:
+    """Blocos de linhas de um arquivo gerado por _escrever"""
+    if caminho.endswith(".parquet"):
+        if pyarrow is None:
+            raise RuntimeError("Arquivo Parquet: instale o pacote pyarrow para restaurar")
+        for lote in pyarrow.parquet.ParquetFile(caminho).iter_batches(batch_size=TAMANHO_BLOCO):
+            yield [_do_arquivo(modelo, linha, True) for linha in lote.to_pylist()]
+        return
+
+    bloco = []
+    with gzip.open(caminho, "rt", encoding="utf-8") as arquivo:
+        for texto in arquivo:
+            if texto.strip():
+                bloco.append(_do_arquivo(modelo, json.loads(texto), False))
+            if len(bloco) >= TAMANHO_BLOCO:
+                yield bloco
+                bloco = []
+    if bloco:
+        yield bloco
+
+
+# ---------------------------------------------------------------------------
+# Arquivamento e restauração
+# ---------------------------------------------------------------------------
+
+def _meses_padrao(db: Session, tabela: str, coluna: str, corte: date) -> List[date]:
+    """Meses anteriores ao corte com linhas na partição DEFAULT"""
+    padrao = f"{tabela}_default"
+    if db.execute(text("SELECT to_regclass(:nome)"), {"nome": padrao}).scalar() is None:
+        return []
+    inicios = db.execute(
+        text(f"SELECT DISTINCT date_trunc('month', {coluna} AT TIME ZONE 'UTC') FROM {padrao} WHERE {coluna} < :corte"),
+        {"corte": _limites(corte)[0]}
+    ).scalars()
+    return [_mes(inicio) for inicio in inicios]
+
+
+def _meses_antigos(db: Session, tabela: str, modelo, coluna: str, corte: date) -> List[date]:
+    """Meses anteriores ao corte que ainda têm dados (ou partição)"""
+    if particionada(db, tabela):
+        mensais = {mes for _, mes in particoes(db, tabela) if mes < corte}
+        return sorted(mensais | set(_meses_padrao(db, tabela, coluna, corte)))
+
+    campo = getattr(modelo, coluna)
+    inicio = db.query(func.min(campo)).filter(campo < _limites(corte)[0]).scalar()
+    if inicio is None:
+        return []
+    meses, mes = [], _mes(inicio)
+    while mes < corte:
+        de, ate = _limites(mes)
+        if db.query(modelo.id).filter(campo >= de, campo < ate).first():
+            meses.append(mes)
+        mes = _somar_mes(mes)
+    return meses
+
+
+def _arquivar_mes(db: Session, tabela: str, modelo, coluna: str, mes: date, diretorio: str) -> Optional[str]:
+    inicio, fim = _limites(mes)
+    campo = getattr(modelo, coluna)
+    ids: List[int] = []
+    blobs: List[Optional[List[int]]] = []
+
+    def blocos():
+        consulta = (
+            db.query(modelo)
+            .filter(campo >= inicio, campo < fim)
+            .order_by(modelo.id)
+            .yield_per(TAMANHO_BLOCO)
+        )
+        bloco = []
+        for registro in consulta:
+            bloco.append(registro)
+            if len(bloco) >= TAMANHO_BLOCO:
+                yield _linhas_arquivo(db, modelo, bloco, ids, blobs)
+                bloco = []
+        if bloco:
+            yield _linhas_arquivo(db, modelo, bloco, ids, blobs)
+
+    os.makedirs(diretorio, exist_ok=True)
+    extensao = "parquet" if pyarrow is not None else "ndjson.gz"
+    # Se uma execução anterior caiu antes do commit, o arquivo é regravado com os mesmos dados
+    caminho = os.path.join(diretorio, f"{tabela}_{mes:%Y_%m}.{extensao}")
+    total = _escrever(caminho, modelo, blocos())
+    if not total:
+        os.remove(caminho)
+        caminho = None
+
+    try:
+        # Resultados arquivados deixam de referenciar blobs, payloads e vínculos normalizados
+        # (processos que ficaram sem referência são apagados)
+        if modelo is JuditResult:
+            judit_storage.liberar_blobs(db, blobs)
+            for posicao in range(0, len(ids), TAMANHO_BLOCO):
+                bloco_ids = ids[posicao:posicao + TAMANHO_BLOCO]
+                db.execute(delete(JuditResultPayload).where(JuditResultPayload.result_id.in_(bloco_ids)))
+                judit_lawsuits.desvincular(db, JuditResultLawsuit.result_id.in_(bloco_ids))
+
+        nome = f"{tabela}_{mes:%Y_%m}"
+        if particionada(db, tabela) and nome in {particao for particao, _ in particoes(db, tabela)}:
+            db.execute(text(f"ALTER TABLE {tabela} DETACH PARTITION {nome}"))
+            db.execute(text(f"DROP TABLE {nome}"))
+        else:
+            # Sem partição própria (outros bancos ou linhas na partição DEFAULT)
+            db.execute(delete(modelo).where(campo >= inicio, campo < fim).execution_options(synchronize_session=False))
+        db.execute(delete(JuditRestauracao).where(JuditRestauracao.tabela == tabela, JuditRestauracao.mes == mes))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    print(f"[JUDIT] {tabela} {mes:%Y-%m}: {total} linhas arquivadas" + (f" em {caminho}" if caminho else ""))
+    return caminho
+
+
+def _linhas_arquivo(db: Session, modelo, registros: List[Any], ids: List[int], blobs: List[Any]) -> List[Dict[str, Any]]:
+    """Linhas de um bloco; resultados saem com os processos completos"""
+    linhas = [{coluna.name: getattr(registro, coluna.name) for coluna in _colunas(modelo)} for registro in registros]
+    if modelo is JuditResult:
+        processos = judit_storage.carregar_processos(db, registros)
+        for registro, linha in zip(registros, linhas):
+            ids.append(registro.id)
+            blobs.append(registro.processos_blobs)
+            linha.update(processos=processos[registro.id], processos_blobs=None, processos_comprimidos=False)
+    return linhas
+
+
+def _restaurados(db: Session, tabela: str) -> List[date]:
+    """Meses restaurados da tabela que ainda não expiraram"""
+    agora = datetime.now(timezone.utc)
+    return [
+        restauracao.mes for restauracao in db.query(JuditRestauracao).filter(JuditRestauracao.tabela == tabela)
+        if (restauracao.expira_em if restauracao.expira_em.tzinfo else restauracao.expira_em.replace(tzinfo=timezone.utc)) > agora
+    ]
+
+
+def arquivar(db: Session, meses: Optional[int] = None, diretorio: Optional[str] = None) -> List[str]:
+    """
+    Arquiva e remove os meses mais antigos que a retenção (mês atual incluso na conta)
+    Meses restaurados só voltam a ser arquivados depois de expirar a restauração
+    Returns:
+        Caminhos dos arquivos gerados
+    """
+    meses = settings.JUDIT_RETENCAO_MESES if meses is None else meses
+    diretorio = diretorio or settings.JUDIT_ARQUIVO_DIR
+    if meses <= 0:
+        return []
+
+    corte = _somar_mes(_mes(datetime.now(timezone.utc)), -(meses - 1))
+    postgres = db.get_bind().dialect.name == "postgresql"
+    arquivos = []
+    for tabela, (modelo, coluna) in TABELAS.items():
+        if postgres and not particionada(db, tabela):
+            print(
+                f"[JUDIT] Retenção ignorada: {tabela} não é particionada "
+                f"(aplique a migração partition_results_010)"
+            )
+            continue
+        restaurados = _restaurados(db, tabela)
+        for mes in _meses_antigos(db, tabela, modelo, coluna, corte):
+            if mes in restaurados:
+                continue
+            caminho = _arquivar_mes(db, tabela, modelo, coluna, mes, diretorio)
+            if caminho:
+                arquivos.append(caminho)
+    return arquivos
+
+
+def restaurar(db: Session, caminho: str, dias: Optional[float] = None) -> int:
+    """
+    Devolve ao banco as linhas de um arquivo gerado por arquivar; retorna o total
+    O mês fica fora da retenção por `dias` (JUDIT_RESTAURACAO_DIAS por padrão)
+    """
+    dias = settings.JUDIT_RESTAURACAO_DIAS if dias is None else dias
+    encontrado = _PADRAO_ARQUIVO.match(os.path.basename(caminho))
+    if not encontrado or encontrado.group("tabela") not in TABELAS:
+        raise ValueError(f"Arquivo não reconhecido: {caminho}")
+
+    tabela = encontrado.group("tabela")
+    modelo, _ = TABELAS[tabela]
+    mes = date(int(encontrado.group("ano")), int(encontrado.group("mes")), 1)
+    total = 0
+
+    try:
+        if particionada(db, tabela):
+            _criar_particao(db, tabela, mes)
+
+        for linhas in _ler(caminho, modelo):
+            if modelo is JuditResult:
+                originais = [(linha["id"], linha["batch_id"], linha["deal_id"], linha["processos"]) for linha in linhas]
+                comprimidos = judit_storage.preparar(db, linhas)
+                db.execute(insert(JuditResult), linhas)
+                judit_storage.gravar_comprimidos(db, {
+                    linha["id"]: comprimido for linha, comprimido in zip(linhas, comprimidos) if comprimido
+                })
+                # Processos já conhecidos mantêm a versão mais recente
+                judit_lawsuits.ingerir(db, [item for item in originais if item[3]], sobrescrever=False)
+            else:
+                db.execute(insert(modelo), linhas)
+            total += len(linhas)
+        expira_em = datetime.now(timezone.utc) + timedelta(days=dias)
+        db.merge(JuditRestauracao(tabela=tabela, mes=mes, arquivo=caminho, expira_em=expira_em))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    print(f"[JUDIT] {tabela} {mes:%Y-%m}: {total} linhas restauradas de {caminho} (retenção volta em {expira_em:%Y-%m-%d})")
+    return total
+
+
+def manutencao() -> List[str]:
+    """
+    Cria as próximas partições e aplica a retenção configurada
+    No PostgreSQL só uma instância executa por vez (pg_try_advisory_lock); a
+    sessão fica presa a uma conexão para que a trava valha entre os commits
+    """
+    with engine.connect() as conexao:
+        db = Session(bind=conexao)
+        postgres = conexao.dialect.name == "postgresql"
+        try:
+            if postgres and not db.execute(select(func.pg_try_advisory_lock(TRAVA_MANUTENCAO))).scalar():
+                db.commit()
+                return []
+            try:
+                garantir_particoes(db)
+                return arquivar(db)
+            finally:
+                if postgres:
+                    db.execute(select(func.pg_advisory_unlock(TRAVA_MANUTENCAO)))
+                    db.commit()
+        except Exception as e:
+            print(f"[JUDIT] Erro na manutenção de partições: {e}")
+            return []
+        finally:
+            db.close()
@@ -1,12 +1,29 @@
+import asyncio
 import httpx
+import json
 import os
-import time
-from typing import List, Dict, Any
-from datetime import datetime
+import socket
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import uuid
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
-from ..models.judit import JuditBatch, JuditRequest, JuditResult
+from ..core.config import settings
+from ..models.judit import JuditBatch, JuditRequest, JuditResult, JuditQueueItem, JuditWebhookInbox
 from ..db.base import SessionLocal
+from .judit_dispatcher import DespachanteJudit, coalescedor_requisicoes
+from .rate_limiter import obter_limitador
+from . import judit_queue, judit_inbox, judit_lawsuits, judit_storage, judit_coalescencia
+from .judit_writer import GravadorResultados, COLUNAS_PROGRESSO
+from .judit_cache import cache_consultas, chave_busca
+from .judit_progress import barramento_progresso, snapshot
+
+# Lotes que ainda podem mudar de status sem novos registros
+STATUS_LOTE_ABERTOS = ("processando", "aguardando_webhooks")
+
+# Status de GET /requests/{request_id} na Judit
+STATUS_JUDIT_CONCLUIDO = ("completed",)
+STATUS_JUDIT_FALHA = ("cancelled", "failed", "error")
 
 class JuditService:
     def __init__(self):
@@ -14,354 +31,755 @@ class JuditService:
         self.requests_url = "https://requests.prod.judit.io"
         self.lawsuits_url = "https://lawsuits.production.judit.io"
         self.webhook_url = os.getenv("JUDIT_WEBHOOK_URL")
+        self.max_concorrencia = settings.JUDIT_MAX_CONCORRENCIA
+        self.max_tentativas = settings.RATE_LIMIT_MAX_TENTATIVAS
+        self.max_tentativas_fila = settings.JUDIT_FILA_MAX_TENTATIVAS
+        self.limitador = obter_limitador("judit")
+        self.cache = cache_consultas
+        self.coalescedor = coalescedor_requisicoes
+    
+    def _montar_busca(self, registro: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Extrai CPF/CNPJ do registro e monta o bloco "search" do payload
+        Retorna None quando o registro não tem documento
+        """
+        cpf = registro.get("CPF", "").strip()
+        cnpj = registro.get("CNPJ", "").strip()
+        
+        # Remove formatação
+        cpf_limpo = ''.join(filter(str.isdigit, cpf)) if cpf else ""
+        cnpj_limpo = ''.join(filter(str.isdigit, cnpj)) if cnpj else ""
+        
+        # Determina qual documento usar (prioriza CNPJ se ambos existirem)
+        if cnpj_limpo:
+            documento = cnpj_limpo
+            doc_type = "cnpj"
+            search_type = "cpf"  # Busca por CPF mas filtra por CNPJ
+            search_key = cpf_limpo if cpf_limpo else cnpj_limpo
+        elif cpf_limpo:
+            documento = cpf_limpo
+            doc_type = "cpf"
+            search_type = "cpf"
+            search_key = cpf_limpo
+        else:
+            return None
         
-    def processar_com_webhook(
+        search = {
+            "search_type": search_type,
+            "search_key": search_key
+        }
+        
+        # Se tiver CNPJ, adiciona filtro para buscar processos onde o CNPJ aparece
+        if cnpj_limpo and cpf_limpo:
+            search["search_params"] = {
+                "filter": {
+                    "party_documents": [cnpj_limpo]
+                }
+            }
+            print(f"[JUDIT] Buscando CPF {cpf_limpo} filtrado por CNPJ {cnpj_limpo}")
+        
+        return {
+            "documento": documento,
+            "doc_type": doc_type,
+            "cpf_limpo": cpf_limpo,
+            "cnpj_limpo": cnpj_limpo,
+            "search": search
+        }
+    
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "api-key": self.api_key,
+            "Content-Type": "application/json"
+        }
+    
+    def _novo_cliente(self) -> httpx.AsyncClient:
+        """Cliente HTTP assíncrono com pool dimensionado para a concorrência configurada"""
+        return httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=self.max_concorrencia,
+                max_keepalive_connections=self.max_concorrencia
+            )
+        )
+    
+    def _novo_despachante(self) -> DespachanteJudit:
+        return DespachanteJudit(self.max_concorrencia)
+    
+    async def _post(self, client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        POST para a Judit passando pelo limitador adaptativo
+        Respostas 429/503 são retentadas em vez de virarem erro do registro
+        """
+        return await self._requisitar(client, "POST", url, json=payload)
+    
+    async def _requisitar(self, client: httpx.AsyncClient, metodo: str, url: str, **kwargs) -> httpx.Response:
+        """Requisição à Judit com limitador adaptativo e retentativa de 429/503"""
+        for tentativa in range(1, self.max_tentativas + 1):
+            await self.limitador.aguardar_async()
+            response = await client.request(metodo, url, headers=self._headers(), **kwargs)
+            espera = self.limitador.registrar_resposta(response.status_code, response.headers)
+            if espera is None or tentativa == self.max_tentativas:
+                return response
+            print(f"[JUDIT] HTTP {response.status_code}, retentando ({tentativa}/{self.max_tentativas - 1})")
+        return response
+    
+    async def _post_json(self, client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        """POST que retorna (status, corpo JSON ou None) - formato compartilhável entre chamadas coalescidas"""
+        return self._json(await self._post(client, url, payload))
+    
+    async def _get_json(self, client: httpx.AsyncClient, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Any]:
+        """GET que retorna (status, corpo JSON ou None)"""
+        return self._json(await self._requisitar(client, "GET", url, params=params))
+    
+    @staticmethod
+    def _json(response: httpx.Response) -> Tuple[int, Any]:
+        try:
+            corpo = response.json()
+        except ValueError:
+            corpo = None
+        return response.status_code, corpo
+    
+    def _worker_id(self) -> str:
+        return f"{socket.gethostname()}-{os.getpid()}"
+    
+    def processar_fila(self, batch_id: Optional[str] = None, worker_id: Optional[str] = None) -> int:
+        """
+        Drena a fila durável (de um lote ou de todos) e retorna quantos itens foram processados
+        Versão síncrona para uso em BackgroundTasks/threads
+        """
+        return asyncio.run(self.drenar_fila(batch_id, worker_id))
+    
+    async def drenar_fila(
         self,
-        batch_id: str,
-        dados: List[Dict[str, Any]],
-        with_attachments: bool = True
-    ):
+        batch_id: Optional[str] = None,
+        worker_id: Optional[str] = None,
+        parar: Optional[asyncio.Event] = None
+    ) -> int:
         """
-        Processa dados com busca em tempo real (on-demand = true)
-        Usa webhook para receber respostas assíncronas
+        Reivindica itens da fila em blocos e despacha cada bloco concorrentemente
+        on_demand=true envia para /requests (webhook); on_demand=false consulta /lawsuits
+        Lotes híbridos consultam /lawsuits e escalonam para /requests quem precisa
+        Com `parar` sinalizado, termina o bloco em andamento e retorna
+        
+        O banco só é acessado na thread do gravador (gravador.no_banco); o
+        event loop fica livre para as chamadas HTTP
         """
-        db = SessionLocal()
+        worker_id = worker_id or self._worker_id()
+        # Lotes e itens são lidos no event loop depois dos commits da thread do gravador
+        db = SessionLocal(expire_on_commit=False)
+        gravador = GravadorResultados(db, worker_id=worker_id)
+        total_processado = 0
+        
+        async def gravar_periodicamente():
+            # Garante a gravação a cada T ms mesmo com respostas lentas
+            while True:
+                await asyncio.sleep(gravador.intervalo)
+                if gravador.precisa_gravar():
+                    await self._gravar_bloco(gravador)
+        
+        tarefa_gravacao = asyncio.create_task(gravar_periodicamente())
         
         try:
-            with httpx.Client(timeout=30.0) as client:
-                for idx, registro in enumerate(dados):
-                    try:
-                        # Extrai CPF/CNPJ do registro
-                        cpf = registro.get("CPF", "").strip()
-                        cnpj = registro.get("CNPJ", "").strip()
-                        
-                        # Remove formatação
-                        cpf_limpo = ''.join(filter(str.isdigit, cpf)) if cpf else ""
-                        cnpj_limpo = ''.join(filter(str.isdigit, cnpj)) if cnpj else ""
-                        
-                        # Determina qual documento usar (prioriza CNPJ se ambos existirem)
-                        if cnpj_limpo:
-                            documento = cnpj_limpo
-                            doc_type = "cnpj"
-                            search_type = "cpf"  # Busca por CPF mas filtra por CNPJ
-                            search_key = cpf_limpo if cpf_limpo else cnpj_limpo
-                        elif cpf_limpo:
-                            documento = cpf_limpo
-                            doc_type = "cpf"
-                            search_type = "cpf"
-                            search_key = cpf_limpo
-                        else:
-                            print(f"[JUDIT] Registro {idx+1}: Sem CPF/CNPJ")
-                            continue
-                        
-                        request_id = str(uuid.uuid4())
-                        
-                        # Prepara payload para API Judit
-                        payload = {
-                            "search": {
-                                "search_type": search_type,
-                                "search_key": search_key
-                            },
-                            "callback_url": self.webhook_url,
-                            "with_attachments": with_attachments
-                        }
-                        
-                        # Se tiver CNPJ, adiciona filtro para buscar processos onde o CNPJ aparece
-                        if cnpj_limpo and cpf_limpo:
-                            payload["search"]["search_params"] = {
-                                "filter": {
-                                    "party_documents": [cnpj_limpo]
-                                }
-                            }
-                            print(f"[JUDIT] Buscando CPF {cpf_limpo} filtrado por CNPJ {cnpj_limpo}")
-                        
-                        headers = {
-                            "api-key": self.api_key,
-                            "Content-Type": "application/json"
-                        }
-                        
-                        response = client.post(
-                            f"{self.requests_url}/requests",
-                            json=payload,
-                            headers=headers
-                        )
-                        
-                        if response.status_code in [200, 201]:
-                            result = response.json()
-                            judit_request_id = result.get("request_id")
-                            
-                            # Salva requisição no banco
-                            req = JuditRequest(
-                                batch_id=batch_id,
-                                request_id=request_id,
-                                judit_request_id=judit_request_id,
-                                documento=documento,
-                                doc_type=doc_type,
-                                cpf=cpf_limpo if cpf_limpo else None,
-                                cnpj=cnpj_limpo if cnpj_limpo else None,
-                                nome=registro.get("Título", registro.get("Pessoa", "")),
-                                empresa=registro.get("Organização", ""),
-                                status="aguardando"
-                            )
-                            db.add(req)
-                            db.commit()
-                            
-                            print(f"[JUDIT] Requisição enviada: {documento} - ID: {judit_request_id}")
-                        else:
-                            print(f"[JUDIT] Erro ao enviar {documento}: {response.status_code}")
-                            self._registrar_erro(db, batch_id, documento, f"HTTP {response.status_code}")
-                        
-                        # Delay de 1 segundo entre requisições para evitar rate limiting
-                        time.sleep(1)
+            async with self._novo_cliente() as client:
+                while not (parar and parar.is_set()):
+                    itens, batches = await gravador.no_banco(self._reivindicar_bloco, db, worker_id, batch_id)
+                    if not itens:
+                        break
                     
-                    except Exception as e:
-                        print(f"[JUDIT] Erro no registro {idx+1}: {str(e)}")
-                        self._registrar_erro(db, batch_id, registro.get("CPF", registro.get("CNPJ", "?")), str(e))
-                
-                # Atualiza status do batch
-                batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
-                if batch:
-                    batch.status = "aguardando_webhooks"
-                    db.commit()
-                
-                print(f"[JUDIT] Batch {batch_id}: Todas as requisições enviadas")
+                    grupos = self._agrupar_itens(gravador, batches, itens)
+                    
+                    async def processar(grupo: List[Tuple[JuditBatch, JuditQueueItem, Dict[str, Any]]]):
+                        await self._processar_grupo(client, gravador, grupo)
+                        if gravador.precisa_gravar():
+                            await self._gravar_bloco(gravador)
+                    
+                    await self._novo_despachante().executar(grupos, processar)
+                    await self._gravar_bloco(gravador)
+                    total_processado += len(itens)
+                    
+                    await gravador.no_banco(self._finalizar_batches, db, list(batches))
         
         except Exception as e:
-            print(f"[JUDIT] Erro geral no batch {batch_id}: {str(e)}")
-            batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
-            if batch:
-                batch.status = "erro"
-                db.commit()
+            print(f"[JUDIT] Erro geral ao drenar a fila: {str(e)}")
+            await gravador.no_banco(db.rollback)
         finally:
-            db.close()
+            tarefa_gravacao.cancel()
+            # Depois de qualquer gravação que ainda esteja na thread do gravador
+            await gravador.no_banco(db.close)
+            gravador.fechar()
+        
+        return total_processado
     
-    def processar_banco_dados(
+    def _reivindicar_bloco(
         self,
-        batch_id: str,
-        dados: List[Dict[str, Any]],
-        with_attachments: bool = True
+        db: Session,
+        worker_id: str,
+        batch_id: Optional[str] = None
+    ) -> Tuple[List[JuditQueueItem], Dict[str, JuditBatch]]:
+        """
+        Reivindica o próximo bloco da fila e carrega os lotes dos itens
+        Os objetos saem da sessão: um rollback na thread do gravador não os
+        expira, então o event loop nunca dispara consultas ao lê-los
+        """
+        itens = judit_queue.reivindicar(db, worker_id, batch_id=batch_id)
+        if not itens:
+            return [], {}
+        batches = self._carregar_batches(db, {item.batch_id for item in itens})
+        for objeto in [*itens, *batches.values()]:
+            db.expunge(objeto)
+        return itens, batches
+    
+    def _finalizar_batches(self, db: Session, batch_ids: List[str]):
+        """Finaliza os lotes do bloco cuja fila foi esvaziada (relidos na sessão)"""
+        for batch in db.query(JuditBatch).filter(JuditBatch.batch_id.in_(batch_ids)).all():
+            self._finalizar_batch(db, batch)
+    
+    async def _gravar_bloco(self, gravador: GravadorResultados):
+        """Grava o bloco pendente na thread do gravador; o loop segue acumulando o próximo"""
+        await gravador.no_banco(self._gravar, gravador.retirar())
+    
+    def _gravar(self, gravador: GravadorResultados):
+        """Grava o bloco pendente; em caso de falha os itens voltam à fila pelo lease"""
+        try:
+            gravador.gravar()
+        except Exception as e:
+            print(f"[JUDIT] Erro ao gravar resultados em bloco: {str(e)}")
+    
+    def _carregar_batches(self, db: Session, batch_ids) -> Dict[str, JuditBatch]:
+        """Carrega os lotes dos itens reivindicados e marca o início do despacho"""
+        batches = db.query(JuditBatch).filter(JuditBatch.batch_id.in_(batch_ids)).all()
+        for batch in batches:
+            if batch.iniciado_at is None:
+                batch.iniciado_at = datetime.now(timezone.utc)
+        db.commit()
+        return {batch.batch_id: batch for batch in batches}
+    
+    def _agrupar_itens(
+        self,
+        gravador: GravadorResultados,
+        batches: Dict[str, JuditBatch],
+        itens: List[JuditQueueItem]
+    ) -> List[List[Tuple[JuditBatch, JuditQueueItem, Dict[str, Any]]]]:
+        """
+        Agrupa os itens do bloco por busca idêntica (mesmo modo, documento,
+        filtro e with_attachments); cada grupo gera uma única chamada externa
+        Itens sem lote, sem documento ou sem tentativas restantes são finalizados aqui
+        """
+        grupos: Dict[str, List[Tuple[JuditBatch, JuditQueueItem, Dict[str, Any]]]] = {}
+        
+        for item in itens:
+            batch = batches.get(item.batch_id)
+            registro = item.registro or {}
+            
+            if batch is None:
+                print(f"[JUDIT] Lote {item.batch_id} não encontrado, descartando item {item.id}")
+                gravador.finalizar_item(item.id, "erro")
+                continue
+            
+            if item.tentativas > self.max_tentativas_fila:
+                self._registrar_erro(
+                    gravador, batch.batch_id, registro.get("CPF", registro.get("CNPJ", "?")),
+                    "Número máximo de tentativas excedido", item_fila_id=item.id
+                )
+                continue
+            
+            busca = self._montar_busca(registro)
+            if not busca:
+                print(f"[JUDIT] Registro {(item.posicao or 0)+1}: Sem CPF/CNPJ")
+                gravador.finalizar_item(item.id)
+                continue
+            
+            # Reenvios da reconciliação vão direto para o on-demand (mesmo em lotes híbridos)
+            busca["on_demand"] = bool(batch.on_demand or registro.get("on_demand"))
+            modo = "requests" if busca["on_demand"] else "lawsuits"
+            chave = f"{modo}:{chave_busca(busca['search'], batch.with_attachments)}"
+            grupos.setdefault(chave, []).append((batch, item, busca))
+        
+        return list(grupos.values())
+    
+    async def _processar_grupo(
+        self,
+        client: httpx.AsyncClient,
+        gravador: GravadorResultados,
+        grupo: List[Tuple[JuditBatch, JuditQueueItem, Dict[str, Any]]]
+    ):
+        """Processa um grupo de itens com a mesma busca; o resultado é replicado para cada item"""
+        try:
+            if grupo[0][2]["on_demand"]:
+                await self._enviar_on_demand(client, gravador, grupo)
+            else:
+                await self._consultar_banco(client, gravador, grupo)
+        
+        except Exception as e:
+            for batch, item, busca in grupo:
+                print(f"[JUDIT] Erro no registro {(item.posicao or 0)+1}: {str(e)}")
+                self._registrar_erro(gravador, batch.batch_id, busca["documento"], str(e), item_fila_id=item.id)
+    
+    async def _enviar_on_demand(
+        self,
+        client: httpx.AsyncClient,
+        gravador: GravadorResultados,
+        grupo: List[Tuple[JuditBatch, JuditQueueItem, Dict[str, Any]]]
     ):
         """
-        Processa dados com busca no banco de dados (on-demand = false)
-        Resposta síncrona - mais rápido
+        Busca em tempo real: envia para /requests e aguarda o webhook
+        Todos os itens do grupo compartilham o mesmo judit_request_id
+        """
+        batch, _, busca = grupo[0]
+        documento = busca["documento"]
+        
+        # Prepara payload para API Judit
+        payload = {
+            "search": busca["search"],
+            "callback_url": self.webhook_url,
+            "with_attachments": batch.with_attachments
+        }
+        
+        chave = f"requests:{chave_busca(busca['search'], batch.with_attachments)}"
+        (status_code, result), compartilhado = await self.coalescedor.executar(
+            chave, lambda: self._post_json(client, f"{self.requests_url}/requests", payload)
+        )
+        
+        if status_code in [200, 201]:
+            judit_request_id = (result or {}).get("request_id")
+            
+            # Salva uma requisição por item; o webhook replica o resultado para todas
+            for batch, item, busca in grupo:
+                registro = item.registro or {}
+                gravador.adicionar_requisicao(
+                    item_fila_id=item.id,
+                    batch_id=batch.batch_id,
+                    request_id=str(uuid.uuid4()),
+                    judit_request_id=judit_request_id,
+                    deal_id=registro.get("ID", ""),
+                    documento=busca["documento"],
+                    doc_type=busca["doc_type"],
+                    cpf=busca["cpf_limpo"] or None,
+                    cnpj=busca["cnpj_limpo"] or None,
+                    nome=registro.get("Título", registro.get("Pessoa", "")),
+                    empresa=registro.get("Organização", ""),
+                    status="aguardando"
+                )
+            
+            origem = " (coalescida)" if compartilhado else ""
+            print(f"[JUDIT] Requisição enviada{origem}: {documento} - ID: {judit_request_id} - {len(grupo)} registro(s)")
+        else:
+            print(f"[JUDIT] Erro ao enviar {documento}: {status_code}")
+            for batch, item, busca in grupo:
+                self._registrar_erro(
+                    gravador, batch.batch_id, busca["documento"], f"HTTP {status_code}", item_fila_id=item.id
+                )
+    
+    async def _consultar_banco(
+        self,
+        client: httpx.AsyncClient,
+        gravador: GravadorResultados,
+        grupo: List[Tuple[JuditBatch, JuditQueueItem, Dict[str, Any]]]
+    ):
+        """
+        Busca no banco de dados da Judit: resposta síncrona em /lawsuits
+        Uma única consulta atende todos os itens do grupo; só o primeiro conta
+        como cache miss, os demais foram servidos sem chamada própria
+        """
+        batch, _, busca = grupo[0]
+        documento = busca["documento"]
+        
+        # Consulta repetida (mesmo documento/filtro em outro lote) sai do cache, sem chamada externa
+        chave = chave_busca(busca["search"], batch.with_attachments)
+        processos_cache = await gravador.no_banco(self.cache.obter, gravador.db, chave)
+        
+        if processos_cache is not None:
+            status_code, result, chamou = 200, {"lawsuits": processos_cache}, False
+        else:
+            # Prepara payload (SEM callback_url = banco de dados)
+            payload = {
+                "search": busca["search"],
+                "with_attachments": batch.with_attachments
+            }
+            
+            (status_code, result), compartilhado = await self.coalescedor.executar(
+                f"lawsuits:{chave}",
+                lambda: self._post_json(client, f"{self.lawsuits_url}/lawsuits", payload)
+            )
+            chamou = not compartilhado
+            
+            # Só quem fez a chamada grava o cache
+            if status_code == 200 and chamou:
+                gravador.adicionar_cache(
+                    self.cache.linha(chave, busca["search"], batch.with_attachments, (result or {}).get("lawsuits", []))
+                )
+        
+        if status_code != 200:
+            error_msg = f"HTTP {status_code}"
+            if result is not None:
+                error_msg = f"{error_msg} - {result}"
+            print(f"[JUDIT] Erro ao consultar {documento}: {error_msg}")
+        
+        # Modo híbrido: sem resultado ou desatualizado vai para o on-demand, até o limite do lote
+        escalar = self._precisa_escalonar(status_code, result)
+        escalonados = []
+        
+        for indice, (batch, item, busca) in enumerate(grupo):
+            gravador.registrar_consulta_cache(batch.batch_id, hit=not (chamou and indice == 0))
+            
+            if (escalar and batch.hibrido
+                    and await gravador.no_banco(self._reservar_escalonamento, gravador.db, batch.batch_id)):
+                escalonados.append((batch, item, busca))
+                continue
+            
+            if status_code != 200:
+                self._registrar_erro(gravador, batch.batch_id, busca["documento"], error_msg, item_fila_id=item.id)
+                continue
+            
+            # Processa resultado imediatamente (resposta síncrona)
+            self._processar_resultado_banco(
+                gravador,
+                batch.batch_id,
+                item.registro or {},
+                busca["documento"],
+                busca["doc_type"],
+                result or {},
+                busca["cpf_limpo"],
+                busca["cnpj_limpo"],
+                item_fila_id=item.id
+            )
+        
+        origem = "cache" if processos_cache is not None else ("coalescida" if not chamou else "")
+        sufixo = f" ({origem})" if origem else ""
+        print(f"[JUDIT] Processado{sufixo}: {documento} - {len(grupo)} registro(s)")
+        
+        if escalonados:
+            print(f"[JUDIT] Escalonando {documento} para on-demand - {len(escalonados)} registro(s)")
+            try:
+                await self._enviar_on_demand(client, gravador, escalonados)
+            except Exception as e:
+                # Só os escalonados: os demais itens do grupo já têm resultado
+                for batch, item, busca in escalonados:
+                    self._registrar_erro(gravador, batch.batch_id, busca["documento"], str(e), item_fila_id=item.id)
+    
+    def _precisa_escalonar(self, status_code: int, result: Any) -> bool:
+        """Resposta do banco de dados que justifica a busca on-demand no modo híbrido"""
+        if status_code == 404:
+            return True
+        if status_code != 200:
+            return False
+        processos = (result or {}).get("lawsuits", [])
+        return not processos or self._desatualizado(processos)
+    
+    @staticmethod
+    def _desatualizado(processos: List[Any]) -> bool:
+        """
+        Nenhum processo atualizado nos últimos JUDIT_HIBRIDO_DESATUALIZADO_DIAS dias
+        (updated_at ou data da última movimentação); sem datas, não há como saber
+        """
+        dias = settings.JUDIT_HIBRIDO_DESATUALIZADO_DIAS
+        if dias <= 0:
+            return False
+        
+        datas = []
+        for processo in processos:
+            if not isinstance(processo, dict):
+                continue
+            for valor in (processo.get("updated_at"), (processo.get("last_step") or {}).get("step_date")):
+                try:
+                    data = datetime.fromisoformat(str(valor).replace("Z", "+00:00")) if valor else None
+                except ValueError:
+                    data = None
+                if data:
+                    datas.append(data if data.tzinfo else data.replace(tzinfo=timezone.utc))
+        
+        return bool(datas) and max(datas) < datetime.now(timezone.utc) - timedelta(days=dias)
+    
+    def _reservar_escalonamento(self, db: Session, batch_id: str) -> bool:
+        """
+        Reserva uma vaga de escalonamento no lote (UPDATE condicional, seguro
+        entre workers); False quando o limite do lote já foi atingido
+        """
+        resultado = db.execute(
+            update(JuditBatch)
+            .where(
+                JuditBatch.batch_id == batch_id,
+                func.coalesce(JuditBatch.escalonados, 0)
+                < func.coalesce(JuditBatch.max_escalonamentos, JuditBatch.total)
+            )
+            .values(escalonados=func.coalesce(JuditBatch.escalonados, 0) + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return bool(resultado.rowcount)
+    
+    def _finalizar_batch(self, db: Session, batch: JuditBatch) -> bool:
+        """
+        Atualiza o status do lote quando a fila dele foi esvaziada
+        Lotes "aguardando_webhooks" sem requisições pendentes também são
+        concluídos (os contadores não fecham quando há registros sem documento)
+        """
+        db.refresh(batch)
+        if batch.status not in STATUS_LOTE_ABERTOS or judit_queue.itens_abertos(db, batch.batch_id):
+            return False
+        
+        # Verifica se todas as requisições foram processadas ou estão aguardando
+        requisicoes_pendentes = db.query(JuditRequest).filter(
+            JuditRequest.batch_id == batch.batch_id,
+            JuditRequest.status == "aguardando"
+        ).count()
+        
+        if batch.status == "aguardando_webhooks":
+            if requisicoes_pendentes > 0:
+                return False
+            batch.status = "concluído"
+            print(f"[JUDIT] Batch {batch.batch_id}: Todas as requisições respondidas")
+        elif requisicoes_pendentes > 0:
+            batch.status = "aguardando_webhooks"
+            print(f"[JUDIT] Batch {batch.batch_id}: {requisicoes_pendentes} requisições aguardando resposta")
+        else:
+            batch.status = "concluído"
+            print(f"[JUDIT] Batch {batch.batch_id}: Processamento concluído")
+        
+        # A vazão é a do despacho original (lotes reabertos pela reconciliação mantêm a sua)
+        if batch.finalizado_at is None:
+            self._registrar_throughput(batch)
+        db.commit()
+        barramento_progresso.publicar(db, [snapshot(batch)])
+        return True
+    
+    def _registrar_throughput(self, batch: JuditBatch):
+        """Registra a vazão obtida no despacho do lote (registros/s desde o início)"""
+        agora = datetime.now(timezone.utc)
+        batch.finalizado_at = agora
+        
+        iniciado = batch.iniciado_at
+        if iniciado is None:
+            return
+        if iniciado.tzinfo is None:
+            iniciado = iniciado.replace(tzinfo=timezone.utc)
+        
+        duracao = (agora - iniciado).total_seconds()
+        throughput = batch.total / duracao if duracao > 0 else float(batch.total)
+        batch.throughput = round(throughput, 2)
+        print(f"[JUDIT] Batch {batch.batch_id}: {throughput:.2f} registros/s")
+    
+    def processar_webhook(self, payload: Dict[str, Any]) -> int:
+        """
+        Registra um callback da Judit.io na caixa de entrada e processa os pendentes
+        Versão síncrona para uso direto; o endpoint /webhook só registra
+        """
+        db = SessionLocal()
+        try:
+            judit_inbox.registrar(db, payload)
+        finally:
+            db.close()
+        return self.processar_inbox()
+    
+    def processar_inbox(self, worker_id: Optional[str] = None) -> int:
+        """
+        Processa em blocos os callbacks pendentes da caixa de entrada
+        Cada bloco grava resultados, contadores e status dos callbacks num único commit
         """
+        worker_id = worker_id or self._worker_id()
         db = SessionLocal()
+        total = 0
         
         try:
-            with httpx.Client(timeout=30.0) as client:
-                for idx, registro in enumerate(dados):
-                    try:
-                        cpf = registro.get("CPF", "").strip()
-                        cnpj = registro.get("CNPJ", "").strip()
-                        
-                        # Remove formatação
-                        cpf_limpo = ''.join(filter(str.isdigit, cpf)) if cpf else ""
-                        cnpj_limpo = ''.join(filter(str.isdigit, cnpj)) if cnpj else ""
-                        
-                        # Determina qual documento usar (prioriza CNPJ se ambos existirem)
-                        if cnpj_limpo:
-                            documento = cnpj_limpo
-                            doc_type = "cnpj"
-                            search_type = "cpf"  # Busca por CPF mas filtra por CNPJ
-                            search_key = cpf_limpo if cpf_limpo else cnpj_limpo
-                        elif cpf_limpo:
-                            documento = cpf_limpo
-                            doc_type = "cpf"
-                            search_type = "cpf"
-                            search_key = cpf_limpo
-                        else:
-                            print(f"[JUDIT] Registro {idx+1}: Sem CPF/CNPJ")
-                            continue
-                        
-                        # Prepara payload (SEM callback_url = banco de dados)
-                        payload = {
-                            "search": {
-                                "search_type": search_type,
-                                "search_key": search_key
-                            },
-                            "with_attachments": with_attachments
-                        }
-                        
-                        # Se tiver CNPJ, adiciona filtro para buscar processos onde o CNPJ aparece
-                        if cnpj_limpo and cpf_limpo:
-                            payload["search"]["search_params"] = {
-                                "filter": {
-                                    "party_documents": [cnpj_limpo]
-                                }
-                            }
-                            print(f"[JUDIT] Buscando CPF {cpf_limpo} filtrado por CNPJ {cnpj_limpo}")
-                        
-                        headers = {
-                            "api-key": self.api_key,
-                            "Content-Type": "application/json"
-                        }
-                        
-                        response = client.post(
-                            f"{self.lawsuits_url}/lawsuits",
-                            json=payload,
-                            headers=headers
-                        )
-                        
-                        if response.status_code == 200:
-                            result = response.json()
-                            
-                            # Processa resultado imediatamente (resposta síncrona)
-                            self._processar_resultado_banco(
-                                db,
-                                batch_id,
-                                registro,
-                                documento,
-                                doc_type,
-                                result,
-                                cpf_limpo,
-                                cnpj_limpo
-                            )
-                            
-                            print(f"[JUDIT] Processado: {documento}")
-                        else:
-                            error_msg = f"HTTP {response.status_code}"
-                            try:
-                                error_detail = response.json()
-                                error_msg = f"{error_msg} - {error_detail}"
-                            except:
-                                pass
-                            print(f"[JUDIT] Erro ao consultar {documento}: {error_msg}")
-                            self._registrar_erro(db, batch_id, documento, error_msg)
-                        
-                        # Delay de 1 segundo entre requisições para evitar rate limiting
-                        time.sleep(1)
-                    
-                    except Exception as e:
-                        print(f"[JUDIT] Erro no registro {idx+1}: {str(e)}")
-                        self._registrar_erro(db, batch_id, registro.get("CPF", registro.get("CNPJ", "?")), str(e))
+            while True:
+                callbacks = judit_inbox.reivindicar(db, worker_id)
+                if not callbacks:
+                    break
                 
-                # Atualiza status do batch
-                batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
-                if batch:
-                    # Verifica se todas as requisições foram processadas ou estão aguardando
-                    requisicoes_pendentes = db.query(JuditRequest).filter(
-                        JuditRequest.batch_id == batch_id,
-                        JuditRequest.status == "aguardando"
-                    ).count()
-                    
-                    if requisicoes_pendentes > 0:
-                        batch.status = "aguardando_webhooks"
-                        print(f"[JUDIT] Batch {batch_id}: {requisicoes_pendentes} requisições aguardando resposta")
-                    else:
-                        batch.status = "concluído"
-                        print(f"[JUDIT] Batch {batch_id}: Processamento concluído")
-                    
-                    db.commit()
+                try:
+                    batch_ids = self._aplicar_callbacks(db, callbacks)
+                except Exception as e:
+                    db.rollback()
+                    print(f"[WEBHOOK] Erro ao processar bloco de {len(callbacks)} callbacks: {str(e)}")
+                    # Reaplica um a um para isolar o callback com problema
+                    batch_ids = set()
+                    for callback in callbacks:
+                        try:
+                            batch_ids |= self._aplicar_callbacks(db, [callback])
+                        except Exception as e:
+                            db.rollback()
+                            print(f"[WEBHOOK] Erro ao processar callback {callback.id}: {str(e)}")
+                            judit_inbox.finalizar(db, [callback.id], "erro", str(e))
+                            db.commit()
+                
+                for batch_id in batch_ids:
+                    self._atualizar_contadores(db, batch_id)
+                total += len(callbacks)
         
         except Exception as e:
-            print(f"[JUDIT] Erro geral no batch {batch_id}: {str(e)}")
-            batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
-            if batch:
-                batch.status = "erro"
-                db.commit()
+            print(f"[WEBHOOK] Erro geral ao processar a caixa de entrada: {str(e)}")
+            db.rollback()
         finally:
             db.close()
+        
+        return total
     
-    def processar_webhook(self, payload: Dict[str, Any]):
+    def _aplicar_callbacks(self, db: Session, callbacks: List[JuditWebhookInbox]) -> set:
         """
-        Processa callback recebido do webhook da Judit.io
+        Aplica um bloco de callbacks e retorna os lotes afetados
+        Callbacks do mesmo request_id são agrupados (a Judit envia um "lawsuit" por processo)
         """
-        db = SessionLocal()
+        gravador = GravadorResultados(db)
+        lotes = set()
         
-        try:
-            reference_id = payload.get("reference_id")
-            webhook_payload = payload.get("payload", {})
+        por_requisicao: Dict[str, List[JuditWebhookInbox]] = {}
+        for callback in callbacks:
+            por_requisicao.setdefault(callback.judit_request_id, []).append(callback)
+        
+        for request_id, grupo in por_requisicao.items():
+            ids = [callback.id for callback in grupo]
+            print(f"[WEBHOOK] Processando: request_id={request_id}, callbacks={len(grupo)}")
             
-            request_id = webhook_payload.get("request_id")
-            response_type = webhook_payload.get("response_type")
-            response_data = webhook_payload.get("response_data", {})
+            # Registros com a mesma busca compartilham o request_id
+            requisicoes = db.query(JuditRequest).filter(
+                JuditRequest.judit_request_id == request_id
+            ).all() if request_id else []
             
-            print(f"[WEBHOOK] Processando: request_id={request_id}, type={response_type}")
+            if not requisicoes:
+                # A requisição pode ainda não ter sido gravada: fica para depois do lease
+                if all(callback.tentativas >= self.max_tentativas_fila for callback in grupo):
+                    print(f"[WEBHOOK] Requisição não encontrada: {request_id}")
+                    judit_inbox.finalizar(db, ids, "erro", "Requisição não encontrada")
+                continue
             
-            # Busca a requisição
-            requisicao = db.query(JuditRequest).filter(
-                JuditRequest.judit_request_id == request_id
-            ).first()
+            processos, erro = self._extrair_respostas(
+                (callback.response_type, (callback.payload or {}).get("payload", {}).get("response_data", {}))
+                for callback in grupo
+            )
             
-            if not requisicao:
-                print(f"[WEBHOOK] Requisição não encontrada: {request_id}")
-                return
+            if not processos and not erro:
+                # Só avisos: a requisição continua "aguardando" e a reconciliação
+                # consulta a situação dela na Judit
+                print(f"[WEBHOOK] Callbacks sem processos nem erro: request_id={request_id}")
+                judit_inbox.finalizar(db, ids, "ignorado", "Callback sem processos nem erro")
+                continue
             
-            batch_id = requisicao.batch_id
+            for requisicao in requisicoes:
+                if processos:
+                    self._processar_resultado_webhook(gravador, requisicao, processos)
+                else:
+                    self._registrar_erro_webhook(gravador, requisicao, erro)
+                lotes.add(requisicao.batch_id)
             
+            judit_inbox.finalizar(db, ids)
+        
+        gravador.gravar()
+        db.commit()
+        return lotes
+    
+    @staticmethod
+    def _extrair_respostas(respostas) -> Tuple[List[Any], Optional[str]]:
+        """
+        (processos, erro) de uma sequência de (response_type, response_data)
+        Mesmo formato nos callbacks do webhook e em GET /responses
+        """
+        processos = []
+        erro = None
+        for response_type, response_data in respostas:
             # Processa de acordo com o tipo de resposta
             if response_type == "lawsuit":
                 # Sucesso - processo encontrado
-                self._processar_resultado_webhook(db, requisicao, response_data)
+                processos.extend(response_data if isinstance(response_data, list) else [response_data])
             elif response_type == "application_error":
                 # Erro
-                error_message = response_data.get("message", "Erro desconhecido")
-                self._registrar_erro(db, batch_id, requisicao.documento, error_message)
-            
-            # Atualiza contadores
-            self._atualizar_contadores(db, batch_id)
-        
-        except Exception as e:
-            print(f"[WEBHOOK] Erro ao processar: {str(e)}")
-        finally:
-            db.close()
+                erro = (response_data or {}).get("message", "Erro desconhecido")
+        return processos, erro
+    
+    def _marcar_requisicao(self, db: Session, requisicao: JuditRequest, status: str) -> bool:
+        """
+        Sai de "aguardando" para `status` com UPDATE condicional
+        Só o primeiro callback de cada requisição consegue: reenvios não contam de novo
+        """
+        resultado = db.execute(
+            update(JuditRequest)
+            .where(JuditRequest.id == requisicao.id, JuditRequest.status == "aguardando")
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(resultado.rowcount)
+    
+    @staticmethod
+    def _chave_processo(processo: Any) -> str:
+        """Identifica um processo para não duplicá-lo em callbacks repetidos"""
+        if isinstance(processo, dict) and processo.get("code"):
+            return str(processo["code"])
+        return json.dumps(processo, sort_keys=True, default=str)
     
     def _processar_resultado_webhook(
         self,
-        db: Session,
+        gravador: GravadorResultados,
         requisicao: JuditRequest,
-        response_data: Dict[str, Any]
+        processos: List[Any]
     ):
         """Processa resultado recebido via webhook"""
-        processos = []
+        unicos = {}
+        for processo in processos:
+            unicos.setdefault(self._chave_processo(processo), processo)
+        processos = list(unicos.values())
         
-        if isinstance(response_data, list):
-            processos = response_data
-        else:
-            processos = [response_data]
+        if self._marcar_requisicao(gravador.db, requisicao, "concluído"):
+            # Primeiro resultado da requisição: conta como sucesso no lote
+            gravador.adicionar_resultado(
+                batch_id=requisicao.batch_id,
+                request_id=requisicao.request_id,
+                deal_id=requisicao.deal_id,
+                documento=requisicao.documento,
+                doc_type=requisicao.doc_type,
+                nome=requisicao.nome,
+                empresa=requisicao.empresa,
+                status="sucesso",
+                qtd_processos=len(processos),
+                processos=processos
+            )
+            print(f"[WEBHOOK] Resultado recebido: {requisicao.documento} - {len(processos)} processos")
+            return
         
-        resultado = JuditResult(
+        # Requisição já concluída: processos adicionais são mesclados sem contar de novo
+        resultado = gravador.db.query(JuditResult).filter(
+            JuditResult.request_id == requisicao.request_id
+        ).first()
+        if resultado is None:
+            return
+        
+        existentes = list(judit_storage.carregar_processos(gravador.db, [resultado])[resultado.id])
+        conhecidos = {self._chave_processo(processo) for processo in existentes}
+        novos = [processo for chave, processo in unicos.items() if chave not in conhecidos]
+        if novos:
+            judit_storage.atualizar_processos(gravador.db, resultado, existentes + novos)
+            judit_lawsuits.ingerir(gravador.db, [(resultado.id, resultado.batch_id, resultado.deal_id, novos)])
+            print(f"[WEBHOOK] {len(novos)} processos adicionados a {requisicao.documento}")
+    
+    def _registrar_erro_webhook(self, gravador: GravadorResultados, requisicao: JuditRequest, erro: str):
+        """Registra erro recebido via webhook (uma única vez por requisição)"""
+        if not self._marcar_requisicao(gravador.db, requisicao, "erro"):
+            return
+        gravador.adicionar_resultado(
             batch_id=requisicao.batch_id,
             request_id=requisicao.request_id,
+            deal_id=requisicao.deal_id,
             documento=requisicao.documento,
-            doc_type=requisicao.doc_type,
-            nome=requisicao.nome,
-            empresa=requisicao.empresa,
-            status="sucesso",
-            qtd_processos=len(processos),
-            processos=processos
+            status="erro",
+            erro=erro
         )
-        db.add(resultado)
-        
-        # Atualiza requisição
-        requisicao.status = "concluído"
-        
-        # Atualiza batch
-        batch = db.query(JuditBatch).filter(JuditBatch.batch_id == requisicao.batch_id).first()
-        if batch:
-            batch.processados += 1
-            batch.sucesso += 1
-        
-        db.commit()
-        
-        print(f"[WEBHOOK] Resultado salvo: {requisicao.documento} - {len(processos)} processos")
     
     def _processar_resultado_banco(
         self,
-        db: Session,
+        gravador: GravadorResultados,
         batch_id: str,
         registro: Dict[str, Any],
         documento: str,
         doc_type: str,
         result: Dict[str, Any],
         cpf_limpo: str = None,
-        cnpj_limpo: str = None
+        cnpj_limpo: str = None,
+        item_fila_id: Optional[int] = None
     ):
         """Processa resultado da consulta no banco de dados"""
         # O endpoint /lawsuits retorna os processos em "lawsuits"
         processos = result.get("lawsuits", [])
         
-        resultado = JuditResult(
+        gravador.adicionar_resultado(
+            item_fila_id=item_fila_id,
             batch_id=batch_id,
             deal_id=registro.get("ID", ""),  # ID do negócio no Pipedrive
             documento=documento,
@@ -374,49 +792,297 @@ class JuditService:
             qtd_processos=len(processos),
             processos=processos
         )
-        db.add(resultado)
-        
-        # Atualiza batch
-        batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
-        if batch:
-            batch.processados += 1
-            batch.sucesso += 1
-        
-        db.commit()
     
     def _registrar_erro(
         self,
-        db: Session,
+        gravador: GravadorResultados,
         batch_id: str,
         documento: str,
-        erro: str
+        erro: str,
+        item_fila_id: Optional[int] = None
     ):
         """Registra erro no processamento"""
-        resultado = JuditResult(
+        gravador.adicionar_resultado(
+            item_fila_id=item_fila_id,
             batch_id=batch_id,
             documento=documento,
             status="erro",
             erro=erro
         )
-        db.add(resultado)
+    
+    def _atualizar_contadores(self, db: Session, batch_id: str):
+        """Verifica se o batch foi concluído (UPDATE condicional, sem reler o lote)"""
+        row = db.execute(
+            update(JuditBatch)
+            .where(
+                JuditBatch.batch_id == batch_id,
+                JuditBatch.processados >= JuditBatch.total,
+                JuditBatch.status != "concluído"
+            )
+            .values(status="concluído")
+            .returning(*COLUNAS_PROGRESSO)
+            .execution_options(synchronize_session=False)
+        ).first()
+        db.commit()
+        
+        # Se processou tudo, marca como concluído
+        if row:
+            print(f"[JUDIT] Batch {batch_id} concluído: {row.processados}/{row.total}")
+            barramento_progresso.publicar(db, [snapshot(row)])
+    
+    def reconciliar(self, worker_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Varredura de recuperação de requisições sem callback e lotes parados
+        Versão síncrona para uso em threads/executor (ver _reconciliar)
+        """
+        try:
+            return asyncio.run(self._reconciliar(worker_id))
+        except Exception as e:
+            print(f"[JUDIT] Erro na reconciliação: {str(e)}")
+            return {}
+    
+    async def _reconciliar(self, worker_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Recupera o que um restart ou um callback perdido deixou para trás:
+        - requisições "aguardando" há mais de JUDIT_RECONCILIACAO_AGUARDANDO_MINUTOS
+          são consultadas em GET /requests/{id}: as concluídas na Judit recebem as
+          respostas de GET /responses como se o webhook tivesse chegado; as que
+          falharam, não existem ou seguem pendentes há mais de
+          JUDIT_RECONCILIACAO_REENVIO_HORAS voltam para a fila
+        - a fila é drenada (itens reenfileirados e leases vencidos)
+        - lotes "processando"/"aguardando_webhooks" sem pendências são finalizados
+        - reservas antigas de judit_consultas_em_voo são removidas
         
-        # Atualiza batch
-        batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
-        if batch:
-            batch.processados += 1
-            batch.erro += 1
+        As transições usam os mesmos UPDATEs condicionais do webhook, então
+        várias instâncias varrendo ao mesmo tempo não contam nem reenviam duas vezes
+        """
+        worker_id = worker_id or self._worker_id()
+        totais = {"respondidas": 0, "reenfileiradas": 0, "pendentes": 0, "lotes_finalizados": 0}
+        db = SessionLocal()
         
-        db.commit()
+        try:
+            grupos = self._requisicoes_paradas(db)
+            if grupos:
+                consultas: Dict[Optional[str], Tuple[str, List[Any], Optional[str]]] = {}
+                
+                async def consultar(judit_request_id: Optional[str]):
+                    consultas[judit_request_id] = await self._consultar_requisicao(client, judit_request_id)
+                
+                async with self._novo_cliente() as client:
+                    await self._novo_despachante().executar(list(grupos), consultar)
+                
+                gravador = GravadorResultados(db)
+                lotes = set()
+                reenviar: List[JuditRequest] = []
+                limite_reenvio = datetime.now(timezone.utc) - timedelta(hours=settings.JUDIT_RECONCILIACAO_REENVIO_HORAS)
+                
+                for judit_request_id, requisicoes in grupos.items():
+                    situacao, processos, erro = consultas.get(judit_request_id, ("indisponivel", [], None))
+                    
+                    if situacao == "concluida":
+                        for requisicao in requisicoes:
+                            if erro and not processos:
+                                self._registrar_erro_webhook(gravador, requisicao, erro)
+                            else:
+                                # Concluída sem processos também encerra a requisição (0 processos)
+                                self._processar_resultado_webhook(gravador, requisicao, processos)
+                            lotes.add(requisicao.batch_id)
+                        totais["respondidas"] += len(requisicoes)
+                    elif situacao == "falha" or (
+                        situacao == "pendente"
+                        and min(self._utc(requisicao.created_at) for requisicao in requisicoes) < limite_reenvio
+                    ):
+                        reenviar.extend(requisicoes)
+                    else:
+                        totais["pendentes"] += len(requisicoes)
+                
+                reabertos = self._reenfileirar(db, gravador, reenviar)
+                totais["reenfileiradas"] = sum(reabertos.values())
+                lotes |= {requisicao.batch_id for requisicao in reenviar}
+                
+                # Resultados, requisições reenviadas e itens novos da fila num único commit
+                gravador.gravar()
+                db.commit()
+                
+                for batch_id in lotes:
+                    self._atualizar_contadores(db, batch_id)
+                if reabertos:
+                    barramento_progresso.publicar(db, [
+                        snapshot(batch) for batch in
+                        db.query(JuditBatch).filter(JuditBatch.batch_id.in_(list(reabertos)))
+                    ])
+            
+            # Itens reenfileirados e leases vencidos por uma queda (o worker separado também drenaria)
+            if judit_queue.batches_pendentes(db):
+                await self.drenar_fila(worker_id=worker_id)
+            
+            totais["lotes_finalizados"] = self._finalizar_lotes_parados(db)
+            judit_coalescencia.limpar(db)
+        
+        except Exception as e:
+            print(f"[JUDIT] Erro na reconciliação: {str(e)}")
+            db.rollback()
+        finally:
+            db.close()
+        
+        if any(totais.values()):
+            print(
+                f"[JUDIT] Reconciliação: {totais['respondidas']} respondidas, "
+                f"{totais['reenfileiradas']} reenfileiradas, {totais['pendentes']} ainda pendentes, "
+                f"{totais['lotes_finalizados']} lotes finalizados"
+            )
+        return totais
     
-    def _atualizar_contadores(self, db: Session, batch_id: str):
-        """Atualiza contadores e verifica se batch foi concluído"""
-        batch = db.query(JuditBatch).filter(JuditBatch.batch_id == batch_id).first()
+    @staticmethod
+    def _utc(momento: Optional[datetime]) -> datetime:
+        if momento is None:
+            return datetime.now(timezone.utc)
+        return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+    
+    def _requisicoes_paradas(self, db: Session) -> Dict[Optional[str], List[JuditRequest]]:
+        """
+        Requisições "aguardando" mais antigas que o limite, agrupadas por judit_request_id
+        (até JUDIT_RECONCILIACAO_TAMANHO_LOTE ids por varredura; as mais antigas primeiro)
+        """
+        limite = datetime.now(timezone.utc) - timedelta(minutes=settings.JUDIT_RECONCILIACAO_AGUARDANDO_MINUTOS)
+        paradas = (
+            db.query(JuditRequest.judit_request_id)
+            .filter(JuditRequest.status == "aguardando", JuditRequest.created_at < limite)
+            .group_by(JuditRequest.judit_request_id)
+            .order_by(func.min(JuditRequest.created_at))
+            .limit(settings.JUDIT_RECONCILIACAO_TAMANHO_LOTE)
+            .all()
+        )
+        ids = [row.judit_request_id for row in paradas]
+        if not ids:
+            return {}
         
-        if not batch:
-            return
+        filtro = JuditRequest.judit_request_id.in_([i for i in ids if i is not None])
+        if None in ids:
+            # Envio aceito sem request_id na resposta: não há o que consultar, só reenviar
+            filtro = filtro | JuditRequest.judit_request_id.is_(None)
         
-        # Se processou tudo, marca como concluído
-        if batch.processados >= batch.total:
-            batch.status = "concluído"
-            db.commit()
-            print(f"[JUDIT] Batch {batch_id} concluído: {batch.processados}/{batch.total}")
+        grupos: Dict[Optional[str], List[JuditRequest]] = {}
+        for requisicao in db.query(JuditRequest).filter(
+            JuditRequest.status == "aguardando", JuditRequest.created_at < limite, filtro
+        ):
+            grupos.setdefault(requisicao.judit_request_id, []).append(requisicao)
+        return grupos
+    
+    async def _consultar_requisicao(
+        self,
+        client: httpx.AsyncClient,
+        judit_request_id: Optional[str]
+    ) -> Tuple[str, List[Any], Optional[str]]:
+        """
+        Situação de uma requisição na Judit: (situacao, processos, erro)
+        situacao: "concluida" (com as respostas), "falha" (cancelada/inexistente),
+        "pendente" (ainda em andamento) ou "indisponivel" (tentar na próxima varredura)
+        """
+        if not judit_request_id:
+            return "falha", [], None
+        
+        try:
+            status_code, corpo = await self._get_json(client, f"{self.requests_url}/requests/{judit_request_id}")
+            if status_code == 404:
+                return "falha", [], None
+            if status_code != 200:
+                print(f"[JUDIT] Erro ao consultar requisição {judit_request_id}: HTTP {status_code}")
+                return "indisponivel", [], None
+            
+            status = str((corpo or {}).get("status", "")).lower()
+            if status in STATUS_JUDIT_FALHA:
+                return "falha", [], None
+            if status not in STATUS_JUDIT_CONCLUIDO:
+                return "pendente", [], None
+            
+            # Respostas paginadas: cada item tem o mesmo formato do callback
+            respostas = []
+            pagina = 1
+            while True:
+                status_code, corpo = await self._get_json(
+                    client, f"{self.requests_url}/responses",
+                    {"request_id": judit_request_id, "page": pagina, "page_size": 100}
+                )
+                if status_code != 200:
+                    print(f"[JUDIT] Erro ao buscar respostas de {judit_request_id}: HTTP {status_code}")
+                    return "indisponivel", [], None
+                corpo = corpo or {}
+                respostas.extend(
+                    (resposta.get("response_type"), resposta.get("response_data", {}))
+                    for resposta in corpo.get("page_data", [])
+                )
+                if pagina >= (corpo.get("page_count") or 1):
+                    break
+                pagina += 1
+            
+            processos, erro = self._extrair_respostas(respostas)
+            return "concluida", processos, erro
+        
+        except httpx.HTTPError as e:
+            print(f"[JUDIT] Erro ao consultar requisição {judit_request_id}: {str(e)}")
+            return "indisponivel", [], None
+    
+    def _reenfileirar(
+        self,
+        db: Session,
+        gravador: GravadorResultados,
+        requisicoes: List[JuditRequest]
+    ) -> Dict[str, int]:
+        """
+        Devolve à fila as buscas de requisições sem resposta (status "reenviado")
+        Após JUDIT_FILA_MAX_TENTATIVAS reenvios do mesmo documento no lote, registra erro
+        Retorna {batch_id: registros reenfileirados} (não faz commit)
+        """
+        if not requisicoes:
+            return {}
+        
+        reenvios = {
+            (row.batch_id, row.documento): row.quantidade for row in
+            db.query(JuditRequest.batch_id, JuditRequest.documento, func.count().label("quantidade"))
+            .filter(
+                JuditRequest.batch_id.in_({requisicao.batch_id for requisicao in requisicoes}),
+                JuditRequest.status == "reenviado"
+            )
+            .group_by(JuditRequest.batch_id, JuditRequest.documento)
+        }
+        
+        registros: Dict[str, List[Dict[str, Any]]] = {}
+        for requisicao in requisicoes:
+            if reenvios.get((requisicao.batch_id, requisicao.documento), 0) >= self.max_tentativas_fila:
+                print(f"[JUDIT] Sem resposta da Judit para {requisicao.documento} após {self.max_tentativas_fila} reenvios")
+                self._registrar_erro_webhook(gravador, requisicao, "Sem resposta da Judit após reenvios")
+                continue
+            if not self._marcar_requisicao(db, requisicao, "reenviado"):
+                continue
+            # Mesmo formato da planilha enviada em /processar (ver _montar_busca)
+            registros.setdefault(requisicao.batch_id, []).append({
+                "ID": requisicao.deal_id or "",
+                "CPF": requisicao.cpf or "",
+                "CNPJ": requisicao.cnpj or "",
+                "Título": requisicao.nome or "",
+                "Organização": requisicao.empresa or "",
+                "on_demand": True,
+            })
+        
+        for batch_id, dados in registros.items():
+            judit_queue.enfileirar(db, batch_id, dados)
+            print(f"[JUDIT] Batch {batch_id}: {len(dados)} requisições sem resposta reenfileiradas")
+        
+        if registros:
+            # O lote volta a "processando" para ser finalizado quando a fila esvaziar
+            db.execute(
+                update(JuditBatch)
+                .where(JuditBatch.batch_id.in_(list(registros)), JuditBatch.status == "aguardando_webhooks")
+                .values(status="processando")
+                .execution_options(synchronize_session=False)
+            )
+        return {batch_id: len(dados) for batch_id, dados in registros.items()}
+    
+    def _finalizar_lotes_parados(self, db: Session) -> int:
+        """Finaliza lotes em andamento sem itens na fila nem requisições pendentes"""
+        finalizados = 0
+        for batch in db.query(JuditBatch).filter(JuditBatch.status.in_(STATUS_LOTE_ABERTOS)).all():
+            if self._finalizar_batch(db, batch):
+                finalizados += 1
+        return finalizados
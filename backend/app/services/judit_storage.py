@@ -0,0 +1,277 @@
+"""
+Armazenamento dos processos de cada resultado Judit.io
+
+Com JUDIT_DEDUPLICAR_PROCESSOS (padrão), cada processo é gravado uma única
+vez em judit_lawsuit_blobs, endereçado pelo sha256 do CNJ + conteúdo; o
+resultado guarda só a lista de IDs (processos_blobs). O mesmo processo
+encontrado para vários CPFs ou em vários lotes vira uma linha só, com um
+contador de referências que permite apagar os blobs órfãos ao excluir lotes.
+
+Sem deduplicação, com JUDIT_COMPRIMIR_PROCESSOS_ACIMA_KB > 0, listas de
+processos maiores que o limite saem de judit_results.processos e são
+gravadas comprimidas (zstd, ou zlib quando o pacote zstandard não está
+instalado) em judit_result_payloads.
+
+A leitura é preguiçosa: a listagem nunca toca nas tabelas laterais e quem
+precisa dos processos usa carregar_processos.
+"""
+import hashlib
+import json
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.judit import JuditLawsuitBlob, JuditResult, JuditResultPayload
+
+try:
+    import zstandard
+except ImportError:  # Dependência opcional
+    zstandard = None
+
+CODEC_PADRAO = "zstd" if zstandard is not None else "zlib"
+
+TAMANHO_BLOCO = 500
+
+
+def _serializar(processos: List[Any]) -> bytes:
+    return json.dumps(processos, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def comprimir(processos: List[Any], bruto: Optional[bytes] = None) -> Tuple[str, int, bytes]:
+    """(codec, tamanho original, bytes comprimidos)"""
+    bruto = bruto if bruto is not None else _serializar(processos)
+    if zstandard is not None:
+        return "zstd", len(bruto), zstandard.ZstdCompressor(level=10).compress(bruto)
+    return "zlib", len(bruto), zlib.compress(bruto, 6)
+
+
+def descomprimir(codec: str, dados: bytes) -> List[Any]:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Processos comprimidos com zstd: instale o pacote zstandard")
+        bruto = zstandard.ZstdDecompressor().decompress(dados)
+    elif codec == "zlib":
+        bruto = zlib.decompress(dados)
+    else:
+        raise ValueError(f"Codec desconhecido: {codec}")
+    return json.loads(bruto)
+
+
+def separar(linha: Dict[str, Any]) -> Optional[Tuple[str, int, bytes]]:
+    """
+    Comprime os processos da linha de judit_results se passarem do limite
+    A linha passa a ter processos=None e processos_comprimidos=True
+    """
+    limite = settings.JUDIT_COMPRIMIR_PROCESSOS_ACIMA_KB * 1024
+    processos = linha.get("processos")
+    if limite <= 0 or not processos:
+        return None
+
+    bruto = _serializar(processos)
+    if len(bruto) <= limite:
+        return None
+
+    linha["processos"] = None
+    linha["processos_comprimidos"] = True
+    return comprimir(processos, bruto)
+
+
+def _cnj(processo: Any) -> Optional[str]:
+    codigo = processo.get("code") if isinstance(processo, dict) else None
+    return str(codigo)[:30] if codigo else None
+
+
+def hash_processo(processo: Any) -> str:
+    """sha256 do CNJ + conteúdo canônico (chaves ordenadas) do processo"""
+    conteudo = json.dumps(processo, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{_cnj(processo) or ''}\n{conteudo}".encode("utf-8")).hexdigest()
+
+
+def _upsert_blobs(db: Session, linhas: List[Dict[str, Any]]) -> Dict[str, int]:
+    """INSERT ... ON CONFLICT (hash) DO UPDATE refcount = refcount + novo; retorna {hash: id}"""
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialeto == "postgresql" else sqlite
+        stmt = modulo.insert(JuditLawsuitBlob).values(linhas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JuditLawsuitBlob.hash],
+            set_={"refcount": JuditLawsuitBlob.refcount + stmt.excluded.refcount}
+        )
+        return {
+            row.hash: row.id
+            for row in db.execute(stmt.returning(JuditLawsuitBlob.id, JuditLawsuitBlob.hash))
+        }
+
+    existentes = {
+        blob.hash: blob for blob in
+        db.query(JuditLawsuitBlob).filter(JuditLawsuitBlob.hash.in_([linha["hash"] for linha in linhas]))
+    }
+    for linha in linhas:
+        blob = existentes.get(linha["hash"])
+        if blob is None:
+            existentes[linha["hash"]] = JuditLawsuitBlob(**linha)
+            db.add(existentes[linha["hash"]])
+        else:
+            blob.refcount = (blob.refcount or 0) + linha["refcount"]
+    db.flush()
+    return {hash_: blob.id for hash_, blob in existentes.items()}
+
+
+def referenciar_blobs(db: Session, listas: List[List[Any]]) -> List[List[int]]:
+    """
+    Grava os processos de cada lista como blobs (uma linha por conteúdo distinto)
+    e soma as novas referências; retorna os IDs de cada lista, na mesma ordem
+    (não faz commit)
+    """
+    blobs: Dict[str, Dict[str, Any]] = {}
+    hashes_por_lista = []
+    for processos in listas:
+        hashes = []
+        for processo in processos or []:
+            hash_ = hash_processo(processo)
+            blob = blobs.setdefault(hash_, {"hash": hash_, "cnj": _cnj(processo), "dados": processo, "refcount": 0})
+            blob["refcount"] += 1
+            hashes.append(hash_)
+        hashes_por_lista.append(hashes)
+
+    if not blobs:
+        return [[] for _ in listas]
+
+    # Ordem fixa de hash: workers gravando em paralelo travam as linhas na mesma sequência
+    ids = _upsert_blobs(db, [blobs[hash_] for hash_ in sorted(blobs)])
+    return [[ids[hash_] for hash_ in hashes] for hashes in hashes_por_lista]
+
+
+def liberar_blobs(db: Session, listas: Iterable[Optional[List[int]]]) -> int:
+    """
+    Desconta as referências das listas de IDs e apaga os blobs que ficaram
+    sem nenhuma (não faz commit); retorna quantos blobs foram apagados
+    """
+    contagem = Counter(blob_id for ids in listas for blob_id in (ids or []))
+    if not contagem:
+        return 0
+
+    # Um UPDATE por quantidade de referências descontadas
+    por_quantidade: Dict[int, List[int]] = {}
+    for blob_id, quantidade in contagem.items():
+        por_quantidade.setdefault(quantidade, []).append(blob_id)
+    for quantidade, ids in por_quantidade.items():
+        db.execute(
+            update(JuditLawsuitBlob)
+            .where(JuditLawsuitBlob.id.in_(ids))
+            .values(refcount=JuditLawsuitBlob.refcount - quantidade)
+            .execution_options(synchronize_session=False)
+        )
+
+    return db.execute(
+        delete(JuditLawsuitBlob)
+        .where(JuditLawsuitBlob.id.in_(list(contagem)), JuditLawsuitBlob.refcount <= 0)
+        .execution_options(synchronize_session=False)
+    ).rowcount or 0
+
+
+def preparar(db: Session, linhas: List[Dict[str, Any]]) -> List[Optional[Tuple[str, int, bytes]]]:
+    """
+    Prepara as linhas de judit_results para o INSERT (altera as linhas)
+    - deduplicação: processos viram blobs e a linha guarda processos_blobs
+    - compressão: retorna, por linha, o payload a gravar com gravar_comprimidos
+    """
+    if not settings.JUDIT_DEDUPLICAR_PROCESSOS:
+        return [separar(linha) for linha in linhas]
+
+    com_processos = [linha for linha in linhas if linha.get("processos")]
+    for linha, ids in zip(com_processos, referenciar_blobs(db, [linha["processos"] for linha in com_processos])):
+        linha["processos"] = None
+        linha["processos_blobs"] = ids
+    return [None] * len(linhas)
+
+
+def gravar_comprimidos(db: Session, comprimidos: Dict[int, Tuple[str, int, bytes]]):
+    """Grava/substitui os payloads comprimidos por result_id (não faz commit)"""
+    if not comprimidos:
+        return
+    db.execute(delete(JuditResultPayload).where(JuditResultPayload.result_id.in_(list(comprimidos))))
+    db.execute(insert(JuditResultPayload).values([
+        {"result_id": result_id, "codec": codec, "tamanho_original": tamanho, "dados": dados}
+        for result_id, (codec, tamanho, dados) in comprimidos.items()
+    ]))
+
+
+def carregar_processos(db: Session, linhas: Iterable[Any]) -> Dict[int, List[Any]]:
+    """
+    Processos por id de resultado; as linhas precisam de id, processos,
+    processos_comprimidos e processos_blobs (blobs e comprimidos são lidos
+    numa consulta cada)
+    """
+    processos: Dict[int, List[Any]] = {}
+    comprimidos = []
+    com_blobs = {}
+    for linha in linhas:
+        if getattr(linha, "processos_blobs", None):
+            com_blobs[linha.id] = linha.processos_blobs
+        elif getattr(linha, "processos_comprimidos", False):
+            comprimidos.append(linha.id)
+        else:
+            processos[linha.id] = linha.processos or []
+
+    if com_blobs:
+        ids = {blob_id for blob_ids in com_blobs.values() for blob_id in blob_ids}
+        dados = dict(db.execute(
+            select(JuditLawsuitBlob.id, JuditLawsuitBlob.dados).where(JuditLawsuitBlob.id.in_(ids))
+        ).all())
+        for result_id, blob_ids in com_blobs.items():
+            processos[result_id] = [dados[blob_id] for blob_id in blob_ids if blob_id in dados]
+
+    if comprimidos:
+        for payload in db.query(JuditResultPayload).filter(JuditResultPayload.result_id.in_(comprimidos)):
+            processos[payload.result_id] = descomprimir(payload.codec, payload.dados)
+        for result_id in comprimidos:
+            processos.setdefault(result_id, [])
+
+    return processos
+
+
+def atualizar_processos(db: Session, resultado: Any, processos: List[Any]):
+    """Substitui os processos de um resultado já gravado, no modo de armazenamento atual"""
+    # As novas referências entram antes de liberar as antigas (blobs em comum não são apagados)
+    antigos = resultado.processos_blobs
+    linha = {"processos": processos, "processos_blobs": None}
+    comprimido = preparar(db, [linha])[0]
+    liberar_blobs(db, [antigos])
+
+    resultado.qtd_processos = len(processos)
+    resultado.processos = linha["processos"]
+    resultado.processos_blobs = linha["processos_blobs"]
+    resultado.processos_comprimidos = comprimido is not None
+    if comprimido:
+        gravar_comprimidos(db, {resultado.id: comprimido})
+    else:
+        db.execute(delete(JuditResultPayload).where(JuditResultPayload.result_id == resultado.id))
+
+
+def liberar_lote(db: Session, batch_id: str) -> int:
+    """
+    Libera o armazenamento dos resultados de um lote antes de excluí-los:
+    desconta as referências dos blobs (apagando os órfãos) e remove os
+    payloads comprimidos (não faz commit); retorna quantos blobs foram apagados
+    """
+    listas = db.execute(
+        select(JuditResult.processos_blobs)
+        .where(JuditResult.batch_id == batch_id, JuditResult.processos_blobs.is_not(None))
+        .execution_options(yield_per=TAMANHO_BLOCO)
+    ).scalars()
+    apagados = liberar_blobs(db, list(listas))
+
+    db.execute(
+        delete(JuditResultPayload)
+        .where(JuditResultPayload.result_id.in_(
+            select(JuditResult.id).where(JuditResult.batch_id == batch_id)
+        ))
+        .execution_options(synchronize_session=False)
+    )
+    return apagados
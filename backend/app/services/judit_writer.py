@@ -0,0 +1,308 @@
+"""
+Gravação em bloco dos resultados Judit.io
+
+Os resultados, requisições e finalizações de itens da fila são acumulados em
+memória e gravados juntos (INSERT multi-linha + um UPDATE de contadores por
+lote) a cada N linhas ou T milissegundos, num único commit. Após o commit,
+o progresso dos lotes afetados é publicado no barramento (ver judit_progress).
+Os processos dos resultados são normalizados (judit_lawsuits) e deduplicados
+(judit_storage) na mesma transação.
+
+Como o item da fila só muda de status no mesmo commit que grava o resultado,
+uma queda antes da gravação deixa o item "processando"; ele volta para a fila
+quando o lease expira e é reprocessado, sem duplicar linhas. A finalização só
+vale para itens ainda "processando" e reivindicados por este worker: se o
+lease expirou e outro worker pegou o item, o resultado deste é descartado.
+
+No despacho assíncrono (drenar_fila) todo acesso à sessão passa por
+no_banco, que executa numa thread própria do gravador: o event loop só
+acumula linhas em memória e nunca espera o banco, e a sessão nunca é usada
+por duas threads ao mesmo tempo. retirar() entrega o bloco pendente para
+gravação nessa thread enquanto o loop continua acumulando o próximo.
+"""
+import asyncio
+import copy
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.judit import JuditBatch, JuditRequest, JuditResult, JuditQueueItem, JuditCache
+from .judit_progress import barramento_progresso, snapshot
+from . import judit_lawsuits, judit_storage
+
+# Colunas preenchidas pelo gravador (todas as linhas de um INSERT precisam das mesmas chaves)
+COLUNAS_RESULTADO = (
+    "batch_id", "request_id", "deal_id", "documento", "doc_type", "cpf", "cnpj",
+    "nome", "empresa", "status", "qtd_processos", "processos", "processos_comprimidos",
+    "processos_blobs", "erro"
+)
+COLUNAS_REQUISICAO = (
+    "batch_id", "request_id", "judit_request_id", "deal_id", "documento", "doc_type",
+    "cpf", "cnpj", "nome", "empresa", "status"
+)
+
+# Colunas do lote retornadas pelos UPDATEs de contadores (snapshot de progresso)
+COLUNAS_PROGRESSO = (
+    JuditBatch.batch_id, JuditBatch.status, JuditBatch.processados, JuditBatch.total,
+    JuditBatch.sucesso, JuditBatch.erro, JuditBatch.throughput, JuditBatch.iniciado_at
+)
+
+
+def incrementar_contadores(
+    db: Session,
+    batch_id: str,
+    sucesso: int = 0,
+    erro: int = 0,
+    cache_hits: int = 0,
+    cache_misses: int = 0
+) -> Optional[Any]:
+    """
+    Incrementa os contadores do lote com um único UPDATE atômico
+    (seguro com webhooks e workers escrevendo em paralelo)
+
+    Returns:
+        Linha com batch_id, status, processados, total, sucesso, erro,
+        throughput e iniciado_at após o incremento, ou None se o lote não existe
+    """
+    return db.execute(
+        update(JuditBatch)
+        .where(JuditBatch.batch_id == batch_id)
+        .values(
+            processados=JuditBatch.processados + sucesso + erro,
+            sucesso=JuditBatch.sucesso + sucesso,
+            erro=JuditBatch.erro + erro,
+            cache_hits=func.coalesce(JuditBatch.cache_hits, 0) + cache_hits,
+            cache_misses=func.coalesce(JuditBatch.cache_misses, 0) + cache_misses
+        )
+        .returning(*COLUNAS_PROGRESSO)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+
+class GravadorResultados:
+    """Acumula linhas e grava em bloco com um commit por grupo"""
+
+    def __init__(
+        self,
+        db: Session,
+        max_linhas: Optional[int] = None,
+        intervalo_ms: Optional[int] = None,
+        worker_id: Optional[str] = None
+    ):
+        self.db = db
+        self.worker_id = worker_id
+        self.max_linhas = max_linhas or settings.JUDIT_GRAVACAO_MAX_LINHAS
+        self.intervalo = (intervalo_ms or settings.JUDIT_GRAVACAO_INTERVALO_MS) / 1000.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._limpar()
+
+    def _limpar(self):
+        self._resultados: List[Dict[str, Any]] = []
+        self._requisicoes: List[Dict[str, Any]] = []
+        # Item da fila de cada resultado/requisição (None quando não vem da fila)
+        self._itens_resultados: List[Optional[int]] = []
+        self._itens_requisicoes: List[Optional[int]] = []
+        self._itens: Dict[str, List[int]] = defaultdict(list)
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._contadores: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"sucesso": 0, "erro": 0, "cache_hits": 0, "cache_misses": 0}
+        )
+        self._ultima_gravacao = time.monotonic()
+
+    @property
+    def pendentes(self) -> int:
+        return (
+            len(self._resultados)
+            + len(self._requisicoes)
+            + len(self._cache)
+            + sum(len(ids) for ids in self._itens.values())
+        )
+
+    def adicionar_resultado(self, item_fila_id: Optional[int] = None, **campos):
+        """Agenda um JuditResult; status "sucesso"/"erro" também alimenta os contadores do lote"""
+        linha = {coluna: campos.get(coluna) for coluna in COLUNAS_RESULTADO}
+        linha["processos_comprimidos"] = bool(linha["processos_comprimidos"])
+        self._resultados.append(linha)
+        self._itens_resultados.append(item_fila_id)
+
+        contador = "erro" if linha["status"] == "erro" else "sucesso"
+        self._contadores[linha["batch_id"]][contador] += 1
+
+        if item_fila_id is not None:
+            self._itens["erro" if contador == "erro" else "concluído"].append(item_fila_id)
+
+    def adicionar_requisicao(self, item_fila_id: Optional[int] = None, **campos):
+        """Agenda um JuditRequest (busca on-demand aguardando webhook)"""
+        self._requisicoes.append({coluna: campos.get(coluna) for coluna in COLUNAS_REQUISICAO})
+        self._itens_requisicoes.append(item_fila_id)
+        if item_fila_id is not None:
+            self._itens["concluído"].append(item_fila_id)
+
+    def adicionar_cache(self, linha: Optional[Dict[str, Any]]):
+        """Agenda a gravação (upsert) de uma resposta no cache de consultas"""
+        if linha:
+            self._cache[linha["chave"]] = linha
+
+    def registrar_consulta_cache(self, batch_id: str, hit: bool):
+        """Contabiliza um acerto/erro de cache no lote"""
+        self._contadores[batch_id]["cache_hits" if hit else "cache_misses"] += 1
+
+    def finalizar_item(self, item_fila_id: int, status: str = "concluído"):
+        """Agenda a finalização de um item da fila sem resultado associado"""
+        self._itens[status].append(item_fila_id)
+
+    def retirar(self) -> "GravadorResultados":
+        """Novo gravador (mesma sessão) com o que está pendente; este recomeça vazio"""
+        bloco = copy.copy(self)
+        bloco._executor = None
+        self._limpar()
+        return bloco
+
+    async def no_banco(self, funcao: Callable[..., Any], *args) -> Any:
+        """Executa funcao(*args) na thread do gravador, fora do event loop"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="judit-gravador")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+
+    def fechar(self):
+        """Encerra a thread do gravador (depois do que já foi enviado a ela)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def precisa_gravar(self) -> bool:
+        if not self.pendentes:
+            return False
+        return (
+            self.pendentes >= self.max_linhas
+            or time.monotonic() - self._ultima_gravacao >= self.intervalo
+        )
+
+    def gravar(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Grava tudo o que está pendente em uma única transação
+
+        Returns:
+            {batch_id: (processados, total)} dos lotes cujos contadores mudaram
+        """
+        if not self.pendentes:
+            self._ultima_gravacao = time.monotonic()
+            return {}
+
+        progresso = {}
+        eventos = []
+        try:
+            # Primeiro os itens: o UPDATE trava as linhas até o commit, então
+            # nenhum outro worker as reivindica entre a conferência e a gravação
+            self._descartar_perdidos(self._finalizar_itens())
+
+            if self._resultados:
+                # Processos vão para os blobs deduplicados ou comprimidos (linhas copiadas:
+                # a normalização abaixo usa os processos originais)
+                linhas = [dict(linha) for linha in self._resultados]
+                comprimidos = judit_storage.preparar(self.db, linhas)
+                ids = self.db.execute(
+                    insert(JuditResult).returning(JuditResult.id, sort_by_parameter_order=True),
+                    linhas
+                ).scalars().all()
+                judit_storage.gravar_comprimidos(self.db, {
+                    result_id: comprimido for result_id, comprimido in zip(ids, comprimidos) if comprimido
+                })
+                judit_lawsuits.ingerir(self.db, [
+                    (result_id, linha["batch_id"], linha["deal_id"], linha["processos"])
+                    for result_id, linha in zip(ids, self._resultados) if linha["processos"]
+                ])
+            if self._requisicoes:
+                self.db.execute(insert(JuditRequest).values(self._requisicoes))
+
+            if self._cache:
+                self._gravar_cache(list(self._cache.values()))
+
+            for batch_id, contadores in self._contadores.items():
+                row = incrementar_contadores(self.db, batch_id, **contadores)
+                if row and (contadores["sucesso"] or contadores["erro"]):
+                    progresso[batch_id] = (row.processados, row.total)
+                    eventos.append(snapshot(row))
+
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self._limpar()
+
+        barramento_progresso.publicar(self.db, eventos)
+        return progresso
+
+    def _finalizar_itens(self) -> set:
+        """
+        Finaliza os itens ainda "processando" por este worker e descarta o
+        registro (a linha da planilha só é lida até o item ser processado)
+
+        Returns:
+            ids dos itens que não foram finalizados (lease perdido)
+        """
+        perdidos = set()
+        for status, ids in self._itens.items():
+            condicoes = [JuditQueueItem.id.in_(ids), JuditQueueItem.status == "processando"]
+            if self.worker_id:
+                condicoes.append(JuditQueueItem.worker_id == self.worker_id)
+            finalizados = set(self.db.execute(
+                update(JuditQueueItem)
+                .where(*condicoes)
+                .values(status=status, registro=None)
+                .returning(JuditQueueItem.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all())
+            perdidos.update(set(ids) - finalizados)
+        return perdidos
+
+    def _descartar_perdidos(self, perdidos: set):
+        """Tira do bloco os resultados e requisições de itens cujo lease foi perdido"""
+        if not perdidos:
+            return
+        print(f"[JUDIT] {len(perdidos)} item(ns) da fila com lease perdido; resultados descartados")
+
+        resultados, itens_resultados = [], []
+        for linha, item_id in zip(self._resultados, self._itens_resultados):
+            if item_id in perdidos:
+                contador = "erro" if linha["status"] == "erro" else "sucesso"
+                self._contadores[linha["batch_id"]][contador] -= 1
+            else:
+                resultados.append(linha)
+                itens_resultados.append(item_id)
+        self._resultados, self._itens_resultados = resultados, itens_resultados
+
+        self._requisicoes = [
+            linha for linha, item_id in zip(self._requisicoes, self._itens_requisicoes)
+            if item_id not in perdidos
+        ]
+
+    def _gravar_cache(self, linhas: List[Dict[str, Any]]):
+        """Upsert das respostas no cache (INSERT ... ON CONFLICT (chave) DO UPDATE)"""
+        dialeto = self.db.get_bind().dialect.name
+        if dialeto == "postgresql":
+            stmt = postgresql.insert(JuditCache).values(linhas)
+        elif dialeto == "sqlite":
+            stmt = sqlite.insert(JuditCache).values(linhas)
+        else:
+            chaves = [linha["chave"] for linha in linhas]
+            self.db.query(JuditCache).filter(JuditCache.chave.in_(chaves)).delete(synchronize_session=False)
+            self.db.execute(insert(JuditCache).values(linhas))
+            return
+
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[JuditCache.chave],
+            set_={
+                "qtd_processos": stmt.excluded.qtd_processos,
+                "processos": stmt.excluded.processos,
+                "expira_at": stmt.excluded.expira_at,
+                "created_at": func.now(),
+            }
+        ))
@@ -2,15 +2,35 @@ import os
 from datetime import datetime
 import logging
 from typing import Dict, List, Optional, Union
-import requests
 from dotenv import load_dotenv
 import json
 import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from ..core.config import settings
+from .rate_limiter import SessaoLimitada
 
 # Configura o logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('pipedrive_api')
 
+# IDs dos campos personalizados de CPF (pessoa) e CNPJ (organização) - específicos da conta Pipedrive
+CPF_FIELD_ID = 'e3c63a9658469cbb216157a807cadcf263637383'
+CNPJ_FIELD_ID = '9d4c76c6dfc415d520cee2837699e3ace1045be9'
+
+
+def nome_confere(nome: Optional[str], nome_pipedrive: Optional[str]) -> bool:
+    """
+    Validação de nome do check de CPF/CNPJ (API e espelho): um nome contém o
+    outro, sem diferenciar maiúsculas; sem nome informado, qualquer nome confere
+    """
+    nome_busca = (nome or '').strip().upper()
+    if not nome_busca:
+        return True
+    nome_registro = (nome_pipedrive or '').strip().upper()
+    return nome_busca in nome_registro or nome_registro in nome_busca
+
 class PipedriveAPI:
     """
     Classe para gerenciar a integração com a API do Pipedrive.
@@ -34,7 +54,7 @@ class PipedriveAPI:
         logger.info(f"Domain: {self.domain if self.domain else 'NÃO ENCONTRADO'}")
         
         # IDs dos campos personalizados - CRÍTICO: Esses IDs são específicos da conta Pipedrive
-        self.cpf_field_id = 'e3c63a9658469cbb216157a807cadcf263637383'  # ID do campo CPF personalizado
+        self.cpf_field_id = CPF_FIELD_ID  # ID do campo CPF personalizado
         self.cpf_field_keys = [
             'e3c63a9658469cbb216157a807cadcf263637383',  # ID principal
             'cpf',                                      # Nome do campo
@@ -43,14 +63,21 @@ class PipedriveAPI:
         ]
         
         # CNPJ também é um campo personalizado
-        self.cnpj_field_id = '9d4c76c6dfc415d520cee2837699e3ace1045be9'  # ID do campo CNPJ personalizado
+        self.cnpj_field_id = CNPJ_FIELD_ID  # ID do campo CNPJ personalizado
         
         if not self.api_token or not self.domain:
             raise ValueError("Credenciais do Pipedrive não encontradas no arquivo .env")
         
         try:
             self.base_url = f"https://{self.domain}.pipedrive.com/api/v1"
-            self.session = requests.Session()
+            # API v2: listagem de pessoas/organizações por lista de IDs
+            self.base_url_v2 = f"https://{self.domain}.pipedrive.com/api/v2"
+            # Sessão com limitador adaptativo (respeita x-ratelimit-* e retenta 429)
+            self.session = SessaoLimitada('pipedrive')
+            # Pool keep-alive com *.pipedrive.com compartilhado pelas threads das rotas e dos lotes
+            # (sem retentativas no adaptador: 429/503 já são retentados pela sessão)
+            adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=settings.PIPEDRIVE_POOL_CONEXOES)
+            self.session.mount('https://', adaptador)
             self.session.headers.update({
                 'Accept': 'application/json',
                 'Content-Type': 'application/json'
@@ -537,15 +564,10 @@ class PipedriveAPI:
                     logger.info(f"[PIPEDRIVE] Pessoa ID={pessoa_id} não tem CPF cadastrado")
                     continue
                     
-                # Validação 2: Nome (se fornecido)
-                if nome and nome.strip():
-                    pessoa_nome = pessoa_detalhes.get('name', '').strip().upper()
-                    nome_busca = nome.strip().upper()
-                    
-                    # Verifica se o nome corresponde (pode ser parcial)
-                    if nome_busca not in pessoa_nome and pessoa_nome not in nome_busca:
-                        logger.info(f"[PIPEDRIVE] Nome não corresponde: '{nome_busca}' != '{pessoa_nome}'")
-                        continue
+                # Validação 2: Nome (se fornecido; pode ser parcial)
+                if not nome_confere(nome, pessoa_detalhes.get('name')):
+                    logger.info(f"[PIPEDRIVE] Nome não corresponde: '{nome}' != '{pessoa_detalhes.get('name')}'")
+                    continue
                         
                 # Validação 3: Organização (se fornecida)
                 if org_id is not None:
@@ -650,13 +672,8 @@ class PipedriveAPI:
                     continue
                     
                 # Validação 2: Nome (já garantida pela busca, mas verificamos novamente)
-                if nome and nome.strip():
-                    pessoa_nome = pessoa_detalhes.get('name', '').strip().upper()
-                    nome_busca = nome.strip().upper()
-                    
-                    # Verifica se o nome corresponde (pode ser parcial)
-                    if nome_busca not in pessoa_nome and pessoa_nome not in nome_busca:
-                        continue
+                if not nome_confere(nome, pessoa_detalhes.get('name')):
+                    continue
                         
                 # Validação 3: Organização (se fornecida)
                 if org_id is not None:
@@ -890,6 +907,82 @@ class PipedriveAPI:
             logger.error(f"Erro ao buscar campos personalizados: {str(e)}")
             raise
 
+    def obter_campos_em_lote(self, entidade: str, ids, campo: str) -> Dict[int, str]:
+        """
+        Obtém o valor de um campo personalizado para vários registros de uma vez.
+        
+        Busca pela API v2 (até 100 IDs por requisição, com as páginas em paralelo);
+        IDs que não vierem no lote são buscados um a um na API v1, também em paralelo.
+        Todas as requisições passam pelo limitador da sessão.
+        
+        Args:
+            entidade: 'persons' ou 'organizations'
+            ids: IDs dos registros (repetidos são ignorados)
+            campo: ID (hash) do campo personalizado
+            
+        Returns:
+            Dicionário {id: valor do campo} ('' quando o registro não tem o campo)
+        """
+        ids = sorted({int(i) for i in ids if i})
+        if not ids:
+            return {}
+        
+        valores: Dict[int, str] = {}
+        blocos = [ids[i:i + 100] for i in range(0, len(ids), 100)]
+        
+        def buscar_bloco(bloco: List[int]) -> Dict[int, str]:
+            try:
+                response = self.session.get(
+                    f"{self.base_url_v2}/{entidade}",
+                    params={
+                        'api_token': self.api_token,
+                        'ids': ','.join(str(i) for i in bloco),
+                        'limit': len(bloco)
+                    }
+                )
+                response.raise_for_status()
+                data = response.json()
+            except Exception as e:
+                logger.warning(f"[PIPEDRIVE] Erro ao buscar {entidade} em lote: {str(e)}")
+                return {}
+            
+            encontrados = {}
+            for registro in (data or {}).get('data') or []:
+                valor = (registro.get('custom_fields') or {}).get(campo)
+                if isinstance(valor, dict):
+                    valor = valor.get('value')
+                encontrados[registro.get('id')] = valor or ''
+            return encontrados
+        
+        def buscar_individual(registro_id: int) -> Dict[int, str]:
+            try:
+                response = self.session.get(
+                    f"{self.base_url}/{entidade}/{registro_id}",
+                    params={'api_token': self.api_token}
+                )
+                response.raise_for_status()
+                data = response.json()
+            except Exception as e:
+                logger.warning(f"[PIPEDRIVE] Erro ao buscar {entidade}/{registro_id}: {str(e)}")
+                return {}
+            
+            if data and data.get('success') and data.get('data'):
+                return {registro_id: data['data'].get(campo) or ''}
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=settings.PIPEDRIVE_MAX_CONCORRENCIA) as executor:
+            for encontrados in executor.map(buscar_bloco, blocos):
+                valores.update(encontrados)
+            
+            faltantes = [i for i in ids if i not in valores]
+            if faltantes:
+                logger.info(f"[PIPEDRIVE] {len(faltantes)} {entidade} fora do lote, buscando individualmente")
+                for encontrados in executor.map(buscar_individual, faltantes):
+                    valores.update(encontrados)
+        
+        logger.info(f"[PIPEDRIVE] {len(valores)}/{len(ids)} {entidade} carregados em lote")
+        return valores
+
     def buscar_negocios_com_dados_completos(self, pipeline_id: Optional[int] = None, 
                                            filter_id: Optional[int] = None,
                                            callback: Optional[callable] = None,
@@ -1942,7 +2035,6 @@ class PipedriveAPI:
         """
         try:
             import os
-            import requests
             import json
             
             # Verifica se o arquivo existe
@@ -1974,11 +2066,13 @@ class PipedriveAPI:
             logger.info(f"Enviando arquivo '{nome_arquivo}' para o negócio {deal_id}")
             logger.info(f"Dados: {data}")
             
-            # Faz a requisição POST
-            response = requests.post(
+            # Faz a requisição POST pela sessão compartilhada (pool e limitador de taxa);
+            # Content-Type None remove o application/json da sessão para o multipart ser montado
+            response = self.session.post(
                 url,
                 files=files,
-                data=data
+                data=data,
+                headers={'Content-Type': None}
             )
             
             # Log da resposta para depuração
@@ -2022,3 +2116,31 @@ class PipedriveAPI:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
 
+
+# Cliente único por processo: credenciais lidas, sessão e pool de conexões criados uma vez
+_cliente: Optional[PipedriveAPI] = None
+_cliente_lock = threading.Lock()
+
+
+def obter_cliente() -> PipedriveAPI:
+    """
+    PipedriveAPI compartilhado pelo processo (criado na inicialização da API)
+    
+    Raises:
+        ValueError: Se as credenciais do Pipedrive não estiverem configuradas
+    """
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                _cliente = PipedriveAPI()
+    return _cliente
+
+
+def fechar_cliente():
+    """Fecha as conexões do cliente compartilhado (encerramento da API)"""
+    global _cliente
+    with _cliente_lock:
+        if _cliente is not None:
+            _cliente.session.close()
+            _cliente = None
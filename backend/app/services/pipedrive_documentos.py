@@ -0,0 +1,176 @@
+"""
+Índice de CPF/CNPJ do espelho do Pipedrive (pipedrive_documentos)
+
+Cada documento encontrado no campo de CPF das pessoas e no campo de CNPJ das
+organizações vira uma linha só com os dígitos (campos com vários valores,
+como "111.111.111-11, 222.222.222-22", geram uma linha por valor). A tabela é
+mantida junto com o espelho: todo upsert/remoção de pessoas e organizações em
+pipedrive_sync (carga completa, incremental e webhook) reindexa os registros
+tocados.
+
+Para consultas em massa (check-pipedrive) o índice inteiro fica em memória
+como dicionário documento -> registros, recarregado a cada
+PIPEDRIVE_INDICE_CACHE_SEGUNDOS ou quando esta instância reindexa algo. A
+invalidação só acontece depois do commit da sessão que reindexou (evento
+after_commit): antes disso uma leitura concorrente ainda veria a tabela antiga
+e a guardaria como atual.
+"""
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.pipedrive import PipedrivePerson, PipedriveOrganization, PipedriveDocumento
+
+# Separadores de campos com vários documentos ("/" faz parte do CNPJ formatado)
+SEPARADORES = re.compile(r"[,;|\n]+")
+
+TIPOS = {11: "cpf", 14: "cnpj"}
+
+# Chave em Session.info: a sessão alterou pipedrive_documentos e ainda não fez commit
+ALTERADO = "pipedrive_documentos_alterado"
+
+# Modelo do espelho -> (entidade, coluna com o documento)
+ENTIDADES = {
+    PipedrivePerson: ("person", "cpf"),
+    PipedriveOrganization: ("organization", "cnpj"),
+}
+
+
+def normalizar(valor: Any) -> Optional[str]:
+    """Só os dígitos de um CPF/CNPJ (None se não tiver 11 ou 14 dígitos)"""
+    if valor is None:
+        return None
+    digitos = re.sub(r"\D", "", str(valor))
+    return digitos if len(digitos) in TIPOS else None
+
+
+def documentos(valor: Any) -> List[str]:
+    """Documentos normalizados de um campo (um ou vários valores separados por vírgula)"""
+    if valor in (None, ""):
+        return []
+    encontrados = []
+    for parte in SEPARADORES.split(str(valor)):
+        documento = normalizar(parte)
+        if documento and documento not in encontrados:
+            encontrados.append(documento)
+    return encontrados
+
+
+def indexar(db: Session, modelo, linhas: List[Dict[str, Any]]):
+    """Substitui os documentos dos registros upsertados (não faz commit)"""
+    if modelo not in ENTIDADES or not linhas:
+        return
+    entidade, coluna = ENTIDADES[modelo]
+    desindexar(db, modelo, [linha["id"] for linha in linhas])
+
+    novos = [
+        {"documento": documento, "tipo": TIPOS[len(documento)], "entidade": entidade, "entidade_id": linha["id"]}
+        for linha in linhas for documento in documentos(linha.get(coluna))
+    ]
+    if novos:
+        db.execute(insert(PipedriveDocumento), novos)
+    db.info[ALTERADO] = True
+
+
+def desindexar(db: Session, modelo, ids: Iterable[int]):
+    """Remove os documentos dos registros (não faz commit)"""
+    ids = list(ids)
+    if modelo not in ENTIDADES or not ids:
+        return
+    entidade, _ = ENTIDADES[modelo]
+    db.execute(delete(PipedriveDocumento).where(
+        PipedriveDocumento.entidade == entidade,
+        PipedriveDocumento.entidade_id.in_(ids)
+    ))
+    db.info[ALTERADO] = True
+
+
+def nomes(db: Session, registros: Iterable[Tuple[str, int]], tamanho_bloco: int = 1000) -> Dict[Tuple[str, int], Optional[str]]:
+    """Nome de cada (entidade, id) do índice, lido do espelho"""
+    por_entidade: Dict[str, List[int]] = {}
+    for entidade, entidade_id in registros:
+        por_entidade.setdefault(entidade, []).append(entidade_id)
+
+    encontrados: Dict[Tuple[str, int], Optional[str]] = {}
+    for modelo, (entidade, _) in ENTIDADES.items():
+        ids = sorted(set(por_entidade.get(entidade, [])))
+        for inicio in range(0, len(ids), tamanho_bloco):
+            for registro_id, nome in db.execute(
+                select(modelo.id, modelo.name).where(modelo.id.in_(ids[inicio:inicio + tamanho_bloco]))
+            ):
+                encontrados[(entidade, registro_id)] = nome
+    return encontrados
+
+
+def reindexar(db: Session, tamanho_bloco: int = 1000) -> int:
+    """Reconstrói o índice a partir das pessoas e organizações espelhadas e faz commit"""
+    db.execute(delete(PipedriveDocumento))
+    for modelo, (_, coluna) in ENTIDADES.items():
+        ultimo_id = 0
+        while True:
+            bloco = db.execute(
+                select(modelo.id, getattr(modelo, coluna))
+                .where(modelo.id > ultimo_id)
+                .order_by(modelo.id)
+                .limit(tamanho_bloco)
+            ).all()
+            if not bloco:
+                break
+            indexar(db, modelo, [{"id": registro_id, coluna: valor} for registro_id, valor in bloco])
+            ultimo_id = bloco[-1][0]
+    db.commit()
+    return db.query(PipedriveDocumento).count()
+
+
+class IndiceDocumentos:
+    """pipedrive_documentos em memória: documento -> [(entidade, id), ...]"""
+
+    def __init__(self, ttl_segundos: Optional[float] = None):
+        self.ttl = settings.PIPEDRIVE_INDICE_CACHE_SEGUNDOS if ttl_segundos is None else ttl_segundos
+        self._mapa: Optional[Dict[str, List[Tuple[str, int]]]] = None
+        self._expira = 0.0
+        self._geracao = 0
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        with self._lock:
+            self._mapa = None
+            self._geracao += 1
+
+    def obter(self, db: Session) -> Dict[str, List[Tuple[str, int]]]:
+        with self._lock:
+            if self._mapa is not None and self._expira > time.monotonic():
+                return self._mapa
+            geracao = self._geracao
+
+        mapa: Dict[str, List[Tuple[str, int]]] = {}
+        for documento, entidade, entidade_id in db.execute(
+            select(PipedriveDocumento.documento, PipedriveDocumento.entidade, PipedriveDocumento.entidade_id)
+        ):
+            mapa.setdefault(documento, []).append((entidade, entidade_id))
+
+        with self._lock:
+            # Invalidado durante a leitura: devolve o mapa lido, mas não guarda
+            if geracao == self._geracao:
+                self._mapa = mapa
+                self._expira = time.monotonic() + self.ttl
+        return mapa
+
+
+indice_documentos = IndiceDocumentos()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_apos_commit(db: Session):
+    if db.info.pop(ALTERADO, False):
+        indice_documentos.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_alteracao(db: Session):
+    db.info.pop(ALTERADO, None)
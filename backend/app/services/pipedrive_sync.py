@@ -0,0 +1,563 @@
+"""
+Espelho local do Pipedrive (negócios, pessoas, organizações, funis e filtros)
+
+A primeira sincronização é uma carga completa pelas listagens da API v1;
+as seguintes são incrementais por update_time (GET /recents desde o maior
+update_time já espelhado). Funis e filtros são pequenos e relidos inteiros;
+os negócios de cada filtro ".API" (os únicos exibidos em /filtros) são
+relidos a cada PIPEDRIVE_ESPELHO_FILTROS_MINUTOS, já que os filtros só
+podem ser avaliados pelo Pipedrive. Uma carga completa periódica
+(PIPEDRIVE_ESPELHO_COMPLETO_HORAS) remove o que foi apagado sem aparecer
+em /recents.
+
+Quem lê o espelho (carregar-negocios, buscar-nome, check-pipedrive) informa
+a idade dos dados com frescor(); antes da primeira carga completa as rotas
+continuam consultando a API. Os CPFs/CNPJs de pessoas e organizações são
+indexados em pipedrive_documentos a cada upsert (pipedrive_documentos).
+
+As cargas não sobrescrevem o que o webhook já trouxe de mais novo: registros
+cujo update_time é anterior ao do espelho ou ao último evento do webhook
+(pipedrive_webhook_versoes) só são marcados como vistos (ver upsert).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db.base import engine
+from . import pipedrive_documentos
+from .pipedrive import obter_cliente
+from ..models.pipedrive import (
+    PipedriveDeal, PipedrivePerson, PipedriveOrganization, PipedrivePipeline,
+    PipedriveFilter, PipedriveFilterDeal, PipedriveSync, PipedriveWebhookVersao
+)
+
+# Chave do pg_try_advisory_lock da sincronização
+TRAVA_SINCRONIZACAO = 7_230_020
+
+TAMANHO_PAGINA = 500
+
+# Entidades com update_time (incrementais via /recents): tipo em /recents -> (endpoint, modelo)
+INCREMENTAIS = {
+    "deal": ("deals", PipedriveDeal),
+    "person": ("persons", PipedrivePerson),
+    "organization": ("organizations", PipedriveOrganization),
+}
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _data(valor: Any) -> Optional[datetime]:
+    """update_time da API ("YYYY-MM-DD HH:MM:SS", UTC)"""
+    if not valor:
+        return None
+    try:
+        data = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return data if data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+
+def _id(valor: Any) -> Optional[int]:
+    """ID de person_id/org_id/owner_id (número ou objeto com "value")"""
+    if isinstance(valor, dict):
+        valor = valor.get("value") or valor.get("id")
+    try:
+        return int(valor) if valor else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _nome(valor: Any, padrao: Any = None) -> Optional[str]:
+    return valor.get("name") if isinstance(valor, dict) else padrao
+
+
+def _campo(registro: Dict[str, Any], campo: str) -> Optional[str]:
+    valor = registro.get(campo)
+    if isinstance(valor, dict):
+        valor = valor.get("value")
+    return str(valor) if valor not in (None, "") else None
+
+
+def _texto(valor: Any, tamanho: int) -> Optional[str]:
+    return str(valor)[:tamanho] if valor not in (None, "") else None
+
+
+def linha_deal(deal: Dict[str, Any], agora: datetime, **_) -> Dict[str, Any]:
+    try:
+        valor = float(deal["value"]) if deal.get("value") is not None else None
+    except (TypeError, ValueError):
+        valor = None
+    return {
+        "id": deal["id"],
+        "title": _texto(deal.get("title"), 500),
+        "status": deal.get("status"),
+        "value": valor,
+        "currency": deal.get("currency"),
+        "pipeline_id": deal.get("pipeline_id"),
+        "stage_id": deal.get("stage_id"),
+        "person_id": _id(deal.get("person_id")),
+        "person_name": _texto(_nome(deal.get("person_id"), deal.get("person_name")), 255),
+        "org_id": _id(deal.get("org_id")),
+        "org_name": _texto(_nome(deal.get("org_id"), deal.get("org_name")), 255),
+        "owner_name": _texto(_nome(deal.get("owner_id"), deal.get("owner_name")), 255),
+        "add_time": deal.get("add_time"),
+        "update_time": _data(deal.get("update_time")),
+        "dados": deal,
+        "sincronizado_at": agora,
+    }
+
+
+def linha_person(pessoa: Dict[str, Any], agora: datetime, cpf_field_id: str = "", **_) -> Dict[str, Any]:
+    return {
+        "id": pessoa["id"],
+        "name": _texto(pessoa.get("name"), 255),
+        "org_id": _id(pessoa.get("org_id")),
+        "cpf": _texto(_campo(pessoa, cpf_field_id), 255),
+        "update_time": _data(pessoa.get("update_time")),
+        "dados": pessoa,
+        "sincronizado_at": agora,
+    }
+
+
+def linha_organization(org: Dict[str, Any], agora: datetime, cnpj_field_id: str = "", **_) -> Dict[str, Any]:
+    return {
+        "id": org["id"],
+        "name": _texto(org.get("name"), 255),
+        "cnpj": _texto(_campo(org, cnpj_field_id), 255),
+        "update_time": _data(org.get("update_time")),
+        "dados": org,
+        "sincronizado_at": agora,
+    }
+
+
+def linha_pipeline(funil: Dict[str, Any], agora: datetime, **_) -> Dict[str, Any]:
+    return {"id": funil["id"], "name": _texto(funil.get("name"), 255), "dados": funil, "sincronizado_at": agora}
+
+
+def linha_filter(filtro: Dict[str, Any], agora: datetime, **_) -> Dict[str, Any]:
+    return {
+        "id": filtro["id"],
+        "name": _texto(filtro.get("name"), 255),
+        "type": filtro.get("type"),
+        "dados": filtro,
+        "sincronizado_at": agora,
+    }
+
+
+LINHAS: Dict[Any, Callable[..., Dict[str, Any]]] = {
+    PipedriveDeal: linha_deal,
+    PipedrivePerson: linha_person,
+    PipedriveOrganization: linha_organization,
+    PipedrivePipeline: linha_pipeline,
+    PipedriveFilter: linha_filter,
+}
+
+
+# Modelos com update_time (as cargas comparam versões antes de sobrescrever)
+LINHAS_INCREMENTAIS = {modelo for _, modelo in INCREMENTAIS.values()}
+
+
+def _campos(api) -> Dict[str, str]:
+    return {"cpf_field_id": api.cpf_field_id, "cnpj_field_id": api.cnpj_field_id}
+
+
+def _descartar_obsoletas(db: Session, modelo, linhas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Tira as linhas com update_time anterior ao do espelho ou ao último evento
+    do webhook aplicado ao registro; as que existem só ganham sincronizado_at
+    (a carga completa não as remove) (não faz commit)
+    """
+    objeto = next(tipo for tipo, (_, incremental) in INCREMENTAIS.items() if incremental is modelo)
+    ids = [linha["id"] for linha in linhas]
+    atuais = dict(db.execute(select(modelo.id, modelo.update_time).where(modelo.id.in_(ids))).all())
+    versoes = dict(db.execute(
+        select(PipedriveWebhookVersao.objeto_id, PipedriveWebhookVersao.evento_at)
+        .where(PipedriveWebhookVersao.objeto == objeto, PipedriveWebhookVersao.objeto_id.in_(ids))
+    ).all())
+
+    novas, obsoletas = [], []
+    for linha in linhas:
+        update_time = linha["update_time"]
+        marcos = [_utc(momento) for momento in (atuais.get(linha["id"]), versoes.get(linha["id"])) if momento]
+        if update_time and any(marco > update_time for marco in marcos):
+            obsoletas.append(linha["id"])
+        else:
+            novas.append(linha)
+
+    if obsoletas:
+        db.execute(
+            update(modelo).where(modelo.id.in_(obsoletas))
+            .values(sincronizado_at=linhas[0]["sincronizado_at"])
+            .execution_options(synchronize_session=False)
+        )
+    return novas
+
+
+def upsert(db: Session, modelo, linhas: List[Dict[str, Any]], versionado: bool = False):
+    """
+    INSERT ... ON CONFLICT (id) DO UPDATE com todas as colunas (não faz commit)
+    versionado=True (cargas da API): não sobrescreve registros mais novos no espelho
+    """
+    if not linhas:
+        return
+    # Último registro de cada id vence (a mesma página pode repetir um id)
+    linhas = list({linha["id"]: linha for linha in linhas}.values())
+
+    versionado = versionado and modelo in LINHAS_INCREMENTAIS
+    if versionado:
+        linhas = _descartar_obsoletas(db, modelo, linhas)
+        if not linhas:
+            return
+
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialeto == "postgresql" else sqlite
+        stmt = modulo.insert(modelo).values(linhas)
+        # Repetido no conflito: um evento do webhook pode chegar depois da verificação
+        condicao = or_(
+            modelo.update_time.is_(None), stmt.excluded.update_time.is_(None),
+            modelo.update_time <= stmt.excluded.update_time
+        ) if versionado else None
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[modelo.id],
+            set_={coluna: stmt.excluded[coluna] for coluna in linhas[0] if coluna != "id"},
+            where=condicao
+        )
+        db.execute(stmt)
+    else:
+        for linha in linhas:
+            db.merge(modelo(**linha))
+    pipedrive_documentos.indexar(db, modelo, linhas)
+
+
+def remover(db: Session, modelo, ids: List[int]) -> int:
+    """Remove registros apagados no Pipedrive (não faz commit)"""
+    if not ids:
+        return 0
+    if modelo is PipedriveDeal:
+        db.execute(delete(PipedriveFilterDeal).where(PipedriveFilterDeal.deal_id.in_(ids)))
+    pipedrive_documentos.desindexar(db, modelo, ids)
+    return db.execute(delete(modelo).where(modelo.id.in_(ids))).rowcount or 0
+
+
+def apagado(registro: Optional[Dict[str, Any]]) -> bool:
+    """Registro excluído no Pipedrive (negócios "deleted", pessoas/organizações inativas)"""
+    return (
+        not registro
+        or registro.get("deleted") is True
+        or registro.get("is_deleted") is True
+        or registro.get("active_flag") is False
+        or registro.get("status") == "deleted"
+    )
+
+
+def _paginas(api, caminho: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """Páginas (dados, additional_data) de uma listagem v1 com start/limit"""
+    inicio = 0
+    while True:
+        response = api.session.get(
+            f"{api.base_url}/{caminho}",
+            params={"api_token": api.api_token, "start": inicio, "limit": TAMANHO_PAGINA, **(params or {})}
+        )
+        response.raise_for_status()
+        corpo = response.json() or {}
+        adicionais = corpo.get("additional_data") or {}
+        yield corpo.get("data") or [], adicionais
+
+        paginacao = adicionais.get("pagination") or {}
+        if not paginacao.get("more_items_in_collection"):
+            return
+        inicio = paginacao.get("next_start", inicio + TAMANHO_PAGINA)
+
+
+def _estado(db: Session, entidade: str) -> PipedriveSync:
+    estado = db.get(PipedriveSync, entidade)
+    if estado is None:
+        estado = PipedriveSync(entidade=entidade, registros=0)
+        db.add(estado)
+    return estado
+
+
+def _maior_update_time(db: Session, modelo) -> Optional[datetime]:
+    return db.execute(select(func.max(modelo.update_time))).scalar()
+
+
+def _carregar_lista(db: Session, api, modelo, caminho: str, params: Optional[Dict[str, Any]] = None) -> int:
+    """Carga completa de uma entidade: upsert página a página e remoção do que não veio"""
+    agora = _agora()
+    linha = LINHAS[modelo]
+    total = 0
+    for dados, _ in _paginas(api, caminho, params):
+        upsert(
+            db, modelo, [linha(registro, agora, **_campos(api)) for registro in dados if not apagado(registro)],
+            versionado=True
+        )
+        db.commit()
+        total += len(dados)
+
+    # O que não foi tocado nesta carga não existe mais no Pipedrive
+    antigos = db.execute(select(modelo.id).where(modelo.sincronizado_at < agora)).scalars().all()
+    remover(db, modelo, list(antigos))
+
+    estado = _estado(db, modelo.__tablename__.replace("pipedrive_", ""))
+    estado.completo_at = estado.sincronizado_at = agora
+    estado.registros = db.execute(select(func.count()).select_from(modelo)).scalar()
+    if hasattr(modelo, "update_time"):
+        estado.ultimo_update_time = _maior_update_time(db, modelo)
+    estado.erro = None
+    db.commit()
+    return total
+
+
+def entidade_filtro(filtro_id) -> str:
+    """Entidade em pipedrive_sync com o estado dos membros de um filtro"""
+    return f"filter_deals:{filtro_id}"
+
+
+def _carregar_filtros(db: Session, api) -> int:
+    """Membros dos filtros de negócios ".API" (avaliados pelo Pipedrive)"""
+    filtros = db.execute(
+        select(PipedriveFilter.id).where(PipedriveFilter.type == "deals", PipedriveFilter.name.contains(".API"))
+    ).scalars().all()
+
+    agora = _agora()
+    total = 0
+    for filtro_id in filtros:
+        estado = _estado(db, entidade_filtro(filtro_id))
+        membros = []
+        for dados, _ in _paginas(api, "deals", {"filter_id": filtro_id, "get_all_custom_fields": True}):
+            upsert(db, PipedriveDeal, [linha_deal(deal, agora) for deal in dados if not apagado(deal)], versionado=True)
+            membros += [deal["id"] for deal in dados if not apagado(deal)]
+        db.execute(delete(PipedriveFilterDeal).where(PipedriveFilterDeal.filtro_id == filtro_id))
+        if membros:
+            db.execute(PipedriveFilterDeal.__table__.insert(), [
+                {"filtro_id": filtro_id, "deal_id": deal_id} for deal_id in set(membros)
+            ])
+        estado.completo_at = estado.sincronizado_at = agora
+        estado.registros = len(set(membros))
+        db.commit()
+        total += len(membros)
+
+    # Filtros que deixaram de existir (ou de ser ".API") voltam a ser lidos pela API
+    db.execute(delete(PipedriveSync).where(
+        PipedriveSync.entidade.like(entidade_filtro("%")),
+        PipedriveSync.entidade.notin_([entidade_filtro(filtro_id) for filtro_id in filtros])
+    ))
+
+    estado = _estado(db, "filter_deals")
+    estado.completo_at = estado.sincronizado_at = agora
+    estado.registros = total
+    db.commit()
+    return total
+
+
+def carga_completa(db: Session, api) -> Dict[str, int]:
+    """Relê todas as entidades do Pipedrive"""
+    totais = {
+        "pipelines": _carregar_lista(db, api, PipedrivePipeline, "pipelines"),
+        "filters": _carregar_lista(db, api, PipedriveFilter, "filters"),
+        "organizations": _carregar_lista(db, api, PipedriveOrganization, "organizations"),
+        "persons": _carregar_lista(db, api, PipedrivePerson, "persons"),
+        "deals": _carregar_lista(db, api, PipedriveDeal, "deals", {"get_all_custom_fields": True}),
+    }
+    totais["filter_deals"] = _carregar_filtros(db, api)
+    return totais
+
+
+def sincronizar_incremental(db: Session, api) -> Dict[str, int]:
+    """Aplica o que mudou desde o maior update_time espelhado (GET /recents)"""
+    estados = {tipo: _estado(db, caminho) for tipo, (caminho, _) in INCREMENTAIS.items()}
+    marcos = [estado.ultimo_update_time for estado in estados.values() if estado.ultimo_update_time]
+    # Um segundo de sobreposição: o upsert é idempotente
+    desde = (min(marcos) if marcos else _agora() - timedelta(days=1)) - timedelta(seconds=1)
+
+    agora = _agora()
+    totais = {caminho: 0 for caminho, _ in INCREMENTAIS.values()}
+    params = {
+        "since_timestamp": desde.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "items": ",".join(INCREMENTAIS),
+    }
+    for dados, _ in _paginas(api, "recents", params):
+        por_tipo: Dict[str, Tuple[List[Dict[str, Any]], List[int]]] = {tipo: ([], []) for tipo in INCREMENTAIS}
+        for item in dados:
+            tipo = item.get("item")
+            if tipo not in por_tipo or not item.get("id"):
+                continue
+            registro = item.get("data")
+            if apagado(registro):
+                por_tipo[tipo][1].append(item["id"])
+            else:
+                por_tipo[tipo][0].append(LINHAS[INCREMENTAIS[tipo][1]](registro, agora, **_campos(api)))
+
+        for tipo, (linhas, apagados) in por_tipo.items():
+            caminho, modelo = INCREMENTAIS[tipo]
+            upsert(db, modelo, linhas, versionado=True)
+            remover(db, modelo, apagados)
+            totais[caminho] += len(linhas) + len(apagados)
+        db.commit()
+
+    for tipo, (caminho, modelo) in INCREMENTAIS.items():
+        estado = estados[tipo]
+        estado.sincronizado_at = agora
+        estado.ultimo_update_time = _maior_update_time(db, modelo) or estado.ultimo_update_time
+        estado.registros = db.execute(select(func.count()).select_from(modelo)).scalar()
+        estado.erro = None
+
+    # Funis e filtros não aparecem em /recents e são poucos: relidos inteiros
+    totais["pipelines"] = _carregar_lista(db, api, PipedrivePipeline, "pipelines")
+    totais["filters"] = _carregar_lista(db, api, PipedriveFilter, "filters")
+
+    filtros = db.get(PipedriveSync, "filter_deals")
+    intervalo = timedelta(minutes=settings.PIPEDRIVE_ESPELHO_FILTROS_MINUTOS)
+    if filtros is None or filtros.completo_at is None or _utc(filtros.completo_at) < agora - intervalo:
+        totais["filter_deals"] = _carregar_filtros(db, api)
+    db.commit()
+    return totais
+
+
+def _utc(momento: datetime) -> datetime:
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+def _iso(momento: Optional[datetime]) -> Optional[str]:
+    return _utc(momento).isoformat() if momento else None
+
+
+def precisa_carga_completa(db: Session) -> bool:
+    estado = db.get(PipedriveSync, "deals")
+    if estado is None or estado.completo_at is None:
+        return True
+    horas = settings.PIPEDRIVE_ESPELHO_COMPLETO_HORAS
+    return horas > 0 and _utc(estado.completo_at) < _agora() - timedelta(hours=horas)
+
+
+def sincronizar(completo: bool = False, api=None) -> Dict[str, int]:
+    """
+    Sincroniza o espelho (carga completa na primeira vez ou quando vencida)
+    No PostgreSQL só uma instância sincroniza por vez (pg_try_advisory_lock)
+    """
+    with engine.connect() as conexao:
+        db = Session(bind=conexao)
+        postgres = conexao.dialect.name == "postgresql"
+        try:
+            if postgres and not db.execute(select(func.pg_try_advisory_lock(TRAVA_SINCRONIZACAO))).scalar():
+                db.commit()
+                return {}
+            try:
+                if api is None:
+                    api = obter_cliente()
+                if completo or precisa_carga_completa(db):
+                    print("[PIPEDRIVE] Carga completa do espelho...")
+                    totais = carga_completa(db, api)
+                else:
+                    totais = sincronizar_incremental(db, api)
+                if any(totais.values()):
+                    print(f"[PIPEDRIVE] Espelho sincronizado: {totais}")
+                return totais
+            except Exception as e:
+                db.rollback()
+                estado = _estado(db, "deals")
+                estado.erro = str(e)[:500]
+                db.commit()
+                raise
+            finally:
+                if postgres:
+                    db.execute(select(func.pg_advisory_unlock(TRAVA_SINCRONIZACAO)))
+                    db.commit()
+        except Exception as e:
+            print(f"[PIPEDRIVE] Erro na sincronização do espelho: {e}")
+            return {}
+        finally:
+            db.close()
+
+
+def frescor(db: Session, entidades: Tuple[str, ...] = ("deals", "persons", "organizations")) -> Optional[Dict[str, Any]]:
+    """
+    Idade dos dados do espelho, incluída nas respostas que o leem
+    None enquanto as entidades não tiveram carga completa (as rotas usam a API)
+    """
+    estados = {estado.entidade: estado for estado in db.query(PipedriveSync)}
+    if any(entidade not in estados or estados[entidade].completo_at is None for entidade in entidades):
+        return None
+
+    # A entidade menos recente define a idade do espelho
+    sincronizado_at = min((
+        _utc(estados[entidade].sincronizado_at)
+        for entidade in entidades if estados[entidade].sincronizado_at
+    ), default=None)
+    return {
+        "fonte": "espelho",
+        "sincronizado_at": sincronizado_at.isoformat() if sincronizado_at else None,
+        "idade_segundos": round((_agora() - sincronizado_at).total_seconds()) if sincronizado_at else None,
+        "erro": estados["deals"].erro if "deals" in estados else None,
+        # Eventos do webhook mantêm o espelho atualizado entre as sincronizações
+        "ultimo_webhook_at": _iso(db.execute(select(func.max(PipedriveWebhookVersao.evento_at))).scalar()),
+    }
+
+
+def listar_negocios(
+    db: Session,
+    funil_id: Optional[int] = None,
+    filtro_id: Optional[int] = None,
+    limite: int = 10000
+) -> List[Dict[str, Any]]:
+    """Negócios no formato de /carregar-negocios, com CPF da pessoa e CNPJ da organização"""
+    query = (
+        db.query(PipedriveDeal, PipedrivePerson.cpf, PipedriveOrganization.cnpj)
+        .outerjoin(PipedrivePerson, PipedrivePerson.id == PipedriveDeal.person_id)
+        .outerjoin(PipedriveOrganization, PipedriveOrganization.id == PipedriveDeal.org_id)
+    )
+    if funil_id:
+        query = query.filter(PipedriveDeal.pipeline_id == funil_id)
+    if filtro_id:
+        query = query.join(PipedriveFilterDeal, PipedriveFilterDeal.deal_id == PipedriveDeal.id).filter(
+            PipedriveFilterDeal.filtro_id == filtro_id
+        )
+    return [
+        _serializar_negocio(deal, cpf, cnpj)
+        for deal, cpf, cnpj in query.order_by(PipedriveDeal.id).limit(limite)
+    ]
+
+
+def buscar_por_titulo(db: Session, termo: str) -> List[Dict[str, Any]]:
+    """Negócios com o título exato, sem diferenciar maiúsculas (como /deals/search com exact_match)"""
+    query = (
+        db.query(PipedriveDeal, PipedrivePerson.cpf, PipedriveOrganization.cnpj)
+        .outerjoin(PipedrivePerson, PipedrivePerson.id == PipedriveDeal.person_id)
+        .outerjoin(PipedriveOrganization, PipedriveOrganization.id == PipedriveDeal.org_id)
+        .filter(func.lower(PipedriveDeal.title) == termo.strip().lower())
+        .order_by(PipedriveDeal.id)
+    )
+    return [_serializar_negocio(deal, cpf, cnpj) for deal, cpf, cnpj in query]
+
+
+def _serializar_negocio(deal: PipedriveDeal, cpf: Optional[str], cnpj: Optional[str]) -> Dict[str, Any]:
+    return {
+        'id': deal.id,
+        'title': deal.title or '',
+        'person_name': deal.person_name or '',
+        'cpf': cpf or '',
+        'org_name': deal.org_name or '',
+        'cnpj': cnpj or '',
+        'status': deal.status or '',
+        'value': deal.value or 0,
+        'currency': deal.currency or 'BRL',
+        'add_time': deal.add_time or '',
+        'stage_id': deal.stage_id or '',
+        'pipeline_id': deal.pipeline_id or '',
+        'owner_name': deal.owner_name or ''
+    }
+
+
+def listar_funis(db: Session) -> List[Dict[str, Any]]:
+    return [funil.dados for funil in db.query(PipedrivePipeline).order_by(PipedrivePipeline.id)]
+
+
+def listar_filtros(db: Session) -> List[Dict[str, Any]]:
+    return [filtro.dados for filtro in db.query(PipedriveFilter).order_by(PipedriveFilter.id)]
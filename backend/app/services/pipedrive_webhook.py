@@ -0,0 +1,260 @@
+"""
+Webhook do Pipedrive: aplica ao espelho local os eventos added/updated/deleted
+de negócios, pessoas e organizações assim que acontecem
+
+Cada evento é aplicado numa transação própria, condicionada ao seu
+meta.timestamp: pipedrive_webhook_versoes guarda o instante do último evento
+aplicado a cada registro, e um evento mais antigo (entregue fora de ordem ou
+reenviado) é ignorado. Um "deleted" deixa a versão como marca, de modo que um
+"updated" atrasado não recria o registro. Aceita os formatos v1
+(current/previous, meta.object/meta.id) e v2 (data, meta.entity/meta.entity_id).
+
+Eventos que não puderam ser aplicados vão para pipedrive_webhook_falhas
+(dead-letter) e podem ser reaplicados com reprocessar_falhas().
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models.pipedrive import (
+    PipedriveDeal, PipedrivePerson, PipedriveOrganization, PipedriveWebhookVersao, PipedriveWebhookFalha
+)
+from . import pipedrive_sync
+from .pipedrive import CPF_FIELD_ID, CNPJ_FIELD_ID
+
+CAMPOS = {"cpf_field_id": CPF_FIELD_ID, "cnpj_field_id": CNPJ_FIELD_ID}
+
+# Ações v2 -> v1
+ACOES = {"create": "added", "change": "updated", "delete": "deleted"}
+
+
+class EventoInvalido(ValueError):
+    """Payload sem objeto, ação ou ID reconhecíveis"""
+
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def chave_payload(payload: Dict[str, Any]) -> str:
+    """sha256 do payload em forma canônica"""
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _momento(meta: Dict[str, Any]) -> datetime:
+    """meta.timestamp_micro / meta.timestamp (epoch, v1) ou ISO 8601 (v2)"""
+    if meta.get("timestamp_micro"):
+        return datetime.fromtimestamp(int(meta["timestamp_micro"]) / 1_000_000, tz=timezone.utc)
+    valor = meta.get("timestamp")
+    if isinstance(valor, (int, float)) or str(valor).isdigit():
+        return datetime.fromtimestamp(int(valor), tz=timezone.utc)
+    try:
+        momento = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return _agora()
+    return momento if momento.tzinfo else momento.replace(tzinfo=timezone.utc)
+
+
+def interpretar(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Objeto, ação, ID, instante e registro atual do evento"""
+    meta = payload.get("meta") or {}
+    if "entity" in meta:
+        # v2: campos personalizados em data.custom_fields
+        objeto = meta.get("entity")
+        acao = ACOES.get(meta.get("action"), meta.get("action"))
+        objeto_id = meta.get("entity_id")
+        registro = payload.get("data")
+        if registro and isinstance(registro.get("custom_fields"), dict):
+            registro = {**registro["custom_fields"], **registro}
+    else:
+        objeto = meta.get("object")
+        acao = meta.get("action")
+        objeto_id = meta.get("id")
+        registro = payload.get("current")
+
+    # Em "merged", current é o registro que permaneceu
+    if registro and registro.get("id") is not None:
+        objeto_id = registro["id"]
+    if not objeto or not acao or objeto_id is None:
+        raise EventoInvalido("Evento sem objeto, ação ou ID")
+
+    return {
+        "objeto": objeto,
+        "acao": acao,
+        "objeto_id": int(objeto_id),
+        "evento_at": _momento(meta),
+        "registro": registro,
+    }
+
+
+def _reservar(db: Session, evento: Dict[str, Any]) -> bool:
+    """
+    Registra o evento como a versão mais recente do registro (não faz commit)
+    False quando um evento mais novo já foi aplicado
+    """
+    linha = {
+        "objeto": evento["objeto"],
+        "objeto_id": evento["objeto_id"],
+        "evento_at": evento["evento_at"],
+        "acao": evento["acao"],
+    }
+
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialeto == "postgresql" else sqlite
+        stmt = modulo.insert(PipedriveWebhookVersao).values(linha)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PipedriveWebhookVersao.objeto, PipedriveWebhookVersao.objeto_id],
+            set_={"evento_at": stmt.excluded.evento_at, "acao": stmt.excluded.acao},
+            where=PipedriveWebhookVersao.evento_at <= stmt.excluded.evento_at
+        )
+        return bool(db.execute(stmt).rowcount)
+
+    atual = db.get(PipedriveWebhookVersao, (linha["objeto"], linha["objeto_id"]))
+    if atual is None:
+        db.add(PipedriveWebhookVersao(**linha))
+        return True
+    evento_at = atual.evento_at if atual.evento_at.tzinfo else atual.evento_at.replace(tzinfo=timezone.utc)
+    if evento_at > linha["evento_at"]:
+        return False
+    atual.evento_at, atual.acao = linha["evento_at"], linha["acao"]
+    return True
+
+
+def _completar_negocio(db: Session, linha: Dict[str, Any]):
+    """
+    Nomes de pessoa/organização/responsável que o evento não traz (v2 só envia IDs)
+    vêm do espelho, para que o upsert não os apague
+    """
+    if linha["person_id"] and not linha["person_name"]:
+        linha["person_name"] = db.execute(
+            select(PipedrivePerson.name).where(PipedrivePerson.id == linha["person_id"])
+        ).scalar()
+    if linha["org_id"] and not linha["org_name"]:
+        linha["org_name"] = db.execute(
+            select(PipedriveOrganization.name).where(PipedriveOrganization.id == linha["org_id"])
+        ).scalar()
+    if not linha["owner_name"]:
+        linha["owner_name"] = db.execute(
+            select(PipedriveDeal.owner_name).where(PipedriveDeal.id == linha["id"])
+        ).scalar()
+
+
+def aplicar(db: Session, evento: Dict[str, Any]) -> str:
+    """
+    Aplica o evento ao espelho e faz commit
+
+    Returns:
+        "aplicado", "ignorado" (evento mais antigo que o já aplicado) ou "desconhecido" (objeto fora do espelho)
+    """
+    if evento["objeto"] not in pipedrive_sync.INCREMENTAIS:
+        return "desconhecido"
+    _, modelo = pipedrive_sync.INCREMENTAIS[evento["objeto"]]
+
+    if not _reservar(db, evento):
+        db.rollback()
+        return "ignorado"
+
+    registro = evento["registro"]
+    if evento["acao"] == "deleted" or pipedrive_sync.apagado(registro):
+        pipedrive_sync.remover(db, modelo, [evento["objeto_id"]])
+    else:
+        linha = pipedrive_sync.LINHAS[modelo]({**registro, "id": evento["objeto_id"]}, _agora(), **CAMPOS)
+        if modelo is PipedriveDeal:
+            _completar_negocio(db, linha)
+        pipedrive_sync.upsert(db, modelo, [linha])
+    db.commit()
+    return "aplicado"
+
+
+def _registrar_falha(db: Session, payload: Dict[str, Any], evento: Optional[Dict[str, Any]], erro: str):
+    """Grava o evento em pipedrive_webhook_falhas (reenvios do mesmo payload somam tentativas) e faz commit"""
+    linha = {
+        "chave": chave_payload(payload),
+        "objeto": (evento or {}).get("objeto"),
+        "objeto_id": (evento or {}).get("objeto_id"),
+        "acao": (evento or {}).get("acao"),
+        "payload": payload,
+        "erro": erro,
+        "status": "pendente",
+        "tentativas": 1,
+    }
+
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("postgresql", "sqlite"):
+        modulo = postgresql if dialeto == "postgresql" else sqlite
+        stmt = modulo.insert(PipedriveWebhookFalha).values(linha)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PipedriveWebhookFalha.chave],
+            set_={
+                "erro": stmt.excluded.erro,
+                "status": "pendente",
+                "tentativas": PipedriveWebhookFalha.tentativas + 1,
+            }
+        )
+        db.execute(stmt)
+    else:
+        falha = db.query(PipedriveWebhookFalha).filter(PipedriveWebhookFalha.chave == linha["chave"]).first()
+        if falha:
+            falha.erro, falha.status, falha.tentativas = erro, "pendente", (falha.tentativas or 0) + 1
+        else:
+            db.add(PipedriveWebhookFalha(**linha))
+    db.commit()
+
+
+def registrar(db: Session, payload: Dict[str, Any]) -> str:
+    """
+    Aplica um evento recebido pelo webhook; em caso de erro ele vai para a dead-letter
+
+    Returns:
+        "aplicado", "ignorado", "desconhecido" ou "falha"
+    """
+    evento = None
+    try:
+        evento = interpretar(payload)
+        return aplicar(db, evento)
+    except Exception as e:
+        db.rollback()
+        print(f"[PIPEDRIVE] Webhook com erro, gravado em pipedrive_webhook_falhas: {e}")
+        _registrar_falha(db, payload, evento, str(e))
+        return "falha"
+
+
+def reprocessar_falhas(db: Session, limite: int = 100) -> Dict[str, int]:
+    """Reaplica os eventos pendentes da dead-letter, do mais antigo para o mais novo"""
+    falhas = db.execute(
+        select(PipedriveWebhookFalha.id, PipedriveWebhookFalha.payload)
+        .where(PipedriveWebhookFalha.status == "pendente")
+        .order_by(PipedriveWebhookFalha.id)
+        .limit(limite)
+    ).all()
+
+    totais = {"reprocessados": 0, "falhas": 0}
+    for falha_id, payload in falhas:
+        try:
+            aplicar(db, interpretar(payload))
+        except Exception as e:
+            db.rollback()
+            db.execute(
+                update(PipedriveWebhookFalha)
+                .where(PipedriveWebhookFalha.id == falha_id)
+                .values(erro=str(e), tentativas=PipedriveWebhookFalha.tentativas + 1)
+            )
+            db.commit()
+            totais["falhas"] += 1
+            continue
+        db.execute(
+            update(PipedriveWebhookFalha)
+            .where(PipedriveWebhookFalha.id == falha_id)
+            .values(status="reprocessado", reprocessado_at=_agora())
+        )
+        db.commit()
+        totais["reprocessados"] += 1
+    return totais
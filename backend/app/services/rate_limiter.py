@@ -0,0 +1,188 @@
+"""
+Limitador de taxa adaptativo compartilhado pelos clientes de APIs externas
+
+Cada provedor (Judit, Pipedrive, Assertiva, Invertexto) tem um token bucket
+próprio que cresce a taxa de forma aditiva a cada resposta bem-sucedida e
+a reduz de forma multiplicativa ao receber 429/503 (AIMD), respeitando os
+cabeçalhos Retry-After e x-ratelimit-* enviados pelo provedor.
+"""
+import asyncio
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+import requests
+
+from ..core.config import settings
+
+logger = logging.getLogger('rate_limiter')
+
+# Status que indicam limite de taxa/sobrecarga e devem ser retentados
+STATUS_RETENTAVEIS = (429, 503)
+
+
+class LimitadorAdaptativo:
+    """Token bucket com ajuste AIMD da taxa de requisições por segundo"""
+
+    def __init__(
+        self,
+        nome: str,
+        taxa_inicial: float,
+        taxa_minima: float = 0.2,
+        taxa_maxima: Optional[float] = None,
+        incremento: float = 0.5,
+        fator_reducao: float = 0.5
+    ):
+        self.nome = nome
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima or taxa_inicial * settings.RATE_LIMIT_FATOR_MAXIMO
+        self.taxa = min(max(taxa_inicial, taxa_minima), self.taxa_maxima)
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.capacidade = max(1.0, self.taxa)
+        self._tokens = self.capacidade
+        self._atualizado = time.monotonic()
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+    def _reservar(self) -> float:
+        """Reserva um token e retorna quantos segundos o chamador deve esperar"""
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado) * self.taxa)
+            self._atualizado = agora
+            self._tokens -= 1
+            espera = -self._tokens / self.taxa if self._tokens < 0 else 0.0
+            return max(espera, self._pausado_ate - agora)
+
+    def aguardar(self):
+        """Bloqueia até haver um token disponível"""
+        espera = self._reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+    async def aguardar_async(self):
+        """Versão assíncrona de aguardar()"""
+        espera = self._reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+    def _pausar(self, segundos: float):
+        with self._lock:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+
+    def registrar_resposta(self, status_code: int, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        Ajusta a taxa a partir da resposta recebida
+
+        Returns:
+            Segundos a aguardar antes de retentar, ou None se a resposta não deve ser retentada
+        """
+        espera_cabecalho = _ler_espera(headers)
+
+        if status_code in STATUS_RETENTAVEIS:
+            with self._lock:
+                self.taxa = max(self.taxa_minima, self.taxa * self.fator_reducao)
+                self.capacidade = max(1.0, self.taxa)
+                self._tokens = min(self._tokens, 0.0)
+            espera = espera_cabecalho if espera_cabecalho is not None else 1.0 / self.taxa
+            self._pausar(espera)
+            logger.warning(
+                f"[{self.nome}] HTTP {status_code}: taxa reduzida para {self.taxa:.2f} req/s, "
+                f"aguardando {espera:.1f}s"
+            )
+            return espera
+
+        restante = _ler_float(headers, 'x-ratelimit-remaining')
+        if restante is not None and restante <= 0 and espera_cabecalho:
+            # Cota da janela esgotada: pausa até o reset informado pelo provedor
+            self._pausar(espera_cabecalho)
+
+        if 200 <= status_code < 300:
+            with self._lock:
+                # Aumento aditivo: ~incremento req/s a cada segundo de respostas bem-sucedidas
+                self.taxa = min(self.taxa_maxima, self.taxa + self.incremento / self.taxa)
+                if restante is not None and espera_cabecalho:
+                    # Não ultrapassa o ritmo que esgota a cota restante antes do reset
+                    self.taxa = max(self.taxa_minima, min(self.taxa, restante / espera_cabecalho))
+                self.capacidade = max(1.0, self.taxa)
+
+        return None
+
+
+def _ler_float(headers: Mapping[str, str], nome: str) -> Optional[float]:
+    valor = headers.get(nome) if headers else None
+    if valor is None:
+        return None
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ler_espera(headers: Mapping[str, str]) -> Optional[float]:
+    """Lê Retry-After (segundos ou data HTTP) ou x-ratelimit-reset (segundos até o reset)"""
+    if not headers:
+        return None
+
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    reset = _ler_float(headers, 'x-ratelimit-reset')
+    if reset is not None:
+        return max(0.0, reset)
+    return None
+
+
+_limitadores: Dict[str, LimitadorAdaptativo] = {}
+_limitadores_lock = threading.Lock()
+
+
+def obter_limitador(nome: str) -> LimitadorAdaptativo:
+    """Retorna o limitador compartilhado do provedor, criando-o na primeira chamada"""
+    with _limitadores_lock:
+        if nome not in _limitadores:
+            taxas = {
+                'judit': settings.JUDIT_REQUISICOES_POR_SEGUNDO,
+                'pipedrive': settings.PIPEDRIVE_REQUISICOES_POR_SEGUNDO,
+                'assertiva': settings.ASSERTIVA_REQUISICOES_POR_SEGUNDO,
+                'invertexto': settings.INVERTEXTO_REQUISICOES_POR_SEGUNDO,
+            }
+            _limitadores[nome] = LimitadorAdaptativo(nome, taxas.get(nome, 1.0))
+        return _limitadores[nome]
+
+
+class SessaoLimitada(requests.Session):
+    """
+    requests.Session que passa pelo limitador do provedor e retenta 429/503
+    """
+
+    def __init__(self, provedor: str):
+        super().__init__()
+        self.limitador = obter_limitador(provedor)
+        self.max_tentativas = settings.RATE_LIMIT_MAX_TENTATIVAS
+
+    def request(self, method, url, *args, **kwargs):
+        # Uploads não são retentados: o corpo do arquivo já foi consumido
+        tentativas = 1 if kwargs.get('files') else self.max_tentativas
+
+        for tentativa in range(1, tentativas + 1):
+            self.limitador.aguardar()
+            response = super().request(method, url, *args, **kwargs)
+            espera = self.limitador.registrar_resposta(response.status_code, response.headers)
+            if espera is None or tentativa == tentativas:
+                return response
+            logger.info(
+                f"[{self.limitador.nome}] Retentando {method} {url.split('?')[0]} "
+                f"({tentativa}/{tentativas - 1})"
+            )
+        return response
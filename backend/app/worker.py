@@ -0,0 +1,138 @@
+"""
+Worker de processamento de lotes, separado do servidor da API
+
+Executa N processos que drenam a fila durável (judit_queue) e a caixa de
+entrada do webhook (judit_webhook_inbox) em paralelo. Consultas idênticas
+entre os processos são unidas via judit_consultas_em_voo (só com N > 1).
+Cada processo mantém até `concorrencia` requisições simultâneas à Judit.
+O primeiro processo também faz a manutenção das partições mensais e da
+retenção (judit_retention) a cada JUDIT_MANUTENCAO_INTERVALO_HORAS horas e
+a reconciliação de requisições sem callback e lotes parados a cada
+JUDIT_RECONCILIACAO_INTERVALO_MINUTOS minutos e a sincronização do espelho
+local do Pipedrive a cada PIPEDRIVE_ESPELHO_INTERVALO_MINUTOS minutos.
+
+Uso:
+    python -m app.worker --processos 4 --concorrencia 10
+
+Para que a API não processe lotes no mesmo processo do uvicorn,
+configure WORKER_EMBUTIDO=false no serviço da API.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+
+from app.core.config import settings
+
+
+def _executar_processo(indice: int, concorrencia: int, intervalo_ocioso: float, entre_processos: bool):
+    """Laço principal de um processo worker"""
+    from app.services.judit_service import JuditService
+    from app.services import judit_retention, pipedrive_sync
+    from app.services.judit_dispatcher import coalescedor_requisicoes
+
+    if not entre_processos:
+        # Processo único: a coalescência dentro do processo basta (sem judit_consultas_em_voo)
+        coalescedor_requisicoes.entre_processos = None
+    servico = JuditService()
+    servico.max_concorrencia = concorrencia
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+
+    async def laco():
+        parar = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sinal, parar.set)
+
+        print(f"[WORKER {indice}] Iniciado ({worker_id}, concorrência {concorrencia})")
+
+        proxima_manutencao = 0.0
+        proxima_reconciliacao = 0.0
+        proximo_espelho = 0.0
+        while not parar.is_set():
+            if indice == 0 and time.monotonic() >= proxima_manutencao:
+                await loop.run_in_executor(None, judit_retention.manutencao)
+                proxima_manutencao = time.monotonic() + settings.JUDIT_MANUTENCAO_INTERVALO_HORAS * 3600
+            
+            intervalo_reconciliacao = settings.JUDIT_RECONCILIACAO_INTERVALO_MINUTOS * 60
+            if indice == 0 and intervalo_reconciliacao > 0 and time.monotonic() >= proxima_reconciliacao:
+                await loop.run_in_executor(None, servico.reconciliar, worker_id)
+                proxima_reconciliacao = time.monotonic() + intervalo_reconciliacao
+            
+            intervalo_espelho = settings.PIPEDRIVE_ESPELHO_INTERVALO_MINUTOS * 60
+            if (indice == 0 and intervalo_espelho > 0 and settings.PIPEDRIVE_API_KEY
+                    and time.monotonic() >= proximo_espelho):
+                await loop.run_in_executor(None, pipedrive_sync.sincronizar)
+                proximo_espelho = time.monotonic() + intervalo_espelho
+
+            processados = await servico.drenar_fila(worker_id=worker_id, parar=parar)
+            # Callbacks do webhook gravados pela API (processamento síncrono, fora do loop)
+            processados += await loop.run_in_executor(None, servico.processar_inbox, worker_id)
+            if processados:
+                continue
+            # Fila vazia: aguarda o intervalo ou o sinal de parada
+            try:
+                await asyncio.wait_for(parar.wait(), timeout=intervalo_ocioso)
+            except asyncio.TimeoutError:
+                pass
+
+        print(f"[WORKER {indice}] Encerrado")
+
+    asyncio.run(laco())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker de processamento de lotes Judit")
+    parser.add_argument("--processos", type=int, default=settings.WORKER_PROCESSOS,
+                        help="Quantidade de processos worker")
+    parser.add_argument("--concorrencia", type=int, default=settings.JUDIT_MAX_CONCORRENCIA,
+                        help="Requisições simultâneas por processo")
+    parser.add_argument("--intervalo", type=float, default=settings.WORKER_INTERVALO_OCIOSO,
+                        help="Segundos entre verificações quando a fila está vazia")
+    args = parser.parse_args(argv)
+
+    # spawn: cada processo cria suas próprias conexões com o banco
+    contexto = multiprocessing.get_context("spawn")
+    processos = [
+        contexto.Process(
+            target=_executar_processo,
+            args=(indice, args.concorrencia, args.intervalo, args.processos > 1),
+            name=f"worker-{indice}"
+        )
+        for indice in range(args.processos)
+    ]
+    for processo in processos:
+        processo.start()
+
+    prazo = {"ate": None}
+
+    def encerrar(signum, frame):
+        if prazo["ate"] is not None:
+            return
+        print(f"[WORKER] Sinal {signum} recebido, finalizando itens em andamento...")
+        prazo["ate"] = time.monotonic() + settings.WORKER_TEMPO_ENCERRAMENTO
+        for processo in processos:
+            if processo.is_alive():
+                processo.terminate()  # SIGTERM: o processo termina o bloco atual e sai
+
+    signal.signal(signal.SIGTERM, encerrar)
+    signal.signal(signal.SIGINT, encerrar)
+
+    while any(processo.is_alive() for processo in processos):
+        for processo in processos:
+            processo.join(timeout=1)
+        if prazo["ate"] is not None and time.monotonic() > prazo["ate"]:
+            for processo in processos:
+                if processo.is_alive():
+                    print(f"[WORKER] {processo.name} não encerrou a tempo, forçando")
+                    processo.kill()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Script para popular as tabelas normalizadas de processos (lawsuits,
+lawsuit_parties, judit_result_lawsuits) a partir dos resultados já gravados
+
+Uso:
+    python backfill_lawsuits.py [batch_id]
+"""
+import sys
+
+from app.db.base import SessionLocal
+from app.models.judit import JuditResult
+from app.services import judit_lawsuits, judit_storage
+
+TAMANHO_BLOCO = 500
+
+
+def backfill(batch_id=None):
+    """Reprocessa os resultados com processos, em blocos com um commit cada"""
+    db = SessionLocal()
+    cursor = 0
+    total = 0
+
+    try:
+        while True:
+            query = db.query(
+                JuditResult.id, JuditResult.batch_id, JuditResult.deal_id,
+                JuditResult.processos, JuditResult.processos_comprimidos, JuditResult.processos_blobs
+            ).filter(JuditResult.id > cursor, JuditResult.qtd_processos > 0)
+            if batch_id:
+                query = query.filter(JuditResult.batch_id == batch_id)
+
+            linhas = query.order_by(JuditResult.id).limit(TAMANHO_BLOCO).all()
+            if not linhas:
+                break
+
+            processos = judit_storage.carregar_processos(db, linhas)
+            total += judit_lawsuits.ingerir(db, [
+                (linha.id, linha.batch_id, linha.deal_id, processos[linha.id]) for linha in linhas
+            ])
+            db.commit()
+            cursor = linhas[-1].id
+            print(f"  resultados até id {cursor}: {total} processos normalizados")
+
+        print(f"✓ Backfill concluído: {total} processos")
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Erro no backfill: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill(sys.argv[1] if len(sys.argv) > 1 else None)
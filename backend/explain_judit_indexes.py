@@ -0,0 +1,239 @@
+"""
+Relatório EXPLAIN ANALYZE das consultas quentes da integração Judit
+
+Cria um schema isolado no PostgreSQL de DATABASE_URL, gera uma massa
+sintética (1M linhas por padrão em judit_results, judit_requests e
+judit_queue), e executa cada consulta duas vezes: sem os índices
+compostos/parciais (migração add_composite_indexes_011) e com eles.
+O schema é removido ao final (a menos que --manter seja usado).
+
+Uso:
+    python explain_judit_indexes.py [--linhas 1000000] [--saida relatorio.md] [--planos] [--manter]
+"""
+import argparse
+import sys
+import time
+
+from sqlalchemy import func, or_, and_, select, text
+
+from app.db.base import Base, engine
+from app.models.judit import (
+    JuditBatch, JuditRequest, JuditResult, JuditQueueItem, JuditWebhookInbox
+)
+
+SCHEMA = "judit_explain"
+LOTES = 2000
+
+# Índices avaliados (definidos nos modelos)
+INDICES_NOVOS = (
+    "ix_judit_batches_created_at",
+    "ix_judit_requests_batch_id_status",
+    "ix_judit_requests_aguardando",
+    "ix_judit_results_batch_id_id",
+    "ix_judit_results_batch_id_status",
+    "ix_judit_queue_disponivel",
+    "ix_judit_queue_batch_disponivel",
+    "ix_judit_webhook_inbox_disponivel",
+)
+
+# Massa sintética gerada no servidor (generate_series); :n = linhas, :lotes = lotes
+CARGA = [
+    """
+    INSERT INTO judit_batches (batch_id, total, processados, sucesso, erro, status, created_at)
+    SELECT 'lote-' || g, 500, 500, 450, 50,
+           CASE WHEN g % 100 = 0 THEN 'aguardando_webhooks' ELSE 'concluído' END,
+           now() - g * interval '1 hour'
+    FROM generate_series(1, :lotes) g
+    """,
+    """
+    INSERT INTO judit_requests (batch_id, request_id, judit_request_id, documento, doc_type, status, created_at)
+    SELECT 'lote-' || (g % :lotes + 1), 'req-' || g, 'jr-' || (g / 3), lpad(g::text, 11, '0'), 'cpf',
+           CASE WHEN g % 200 = 0 THEN 'aguardando' ELSE 'concluído' END,
+           now() - (g % 2160) * interval '1 hour'
+    FROM generate_series(1, :n) g
+    """,
+    """
+    INSERT INTO judit_results (batch_id, request_id, documento, doc_type, status, qtd_processos, processado_at)
+    SELECT 'lote-' || (g % :lotes + 1), 'req-' || g, lpad(g::text, 11, '0'), 'cpf',
+           CASE WHEN g % 10 = 0 THEN 'erro' ELSE 'sucesso' END, g % 4,
+           now() - (g % 2160) * interval '1 hour'
+    FROM generate_series(1, :n) g
+    """,
+    """
+    INSERT INTO judit_queue (batch_id, posicao, registro, status, tentativas, lease_ate)
+    SELECT 'lote-' || (g % :lotes + 1), g, '{}'::json,
+           CASE WHEN g % 1000 = 0 THEN 'pendente' WHEN g % 1000 = 1 THEN 'processando' ELSE 'concluído' END,
+           1, now() - interval '1 minute'
+    FROM generate_series(1, :n) g
+    """,
+    """
+    INSERT INTO judit_webhook_inbox (chave, judit_request_id, payload, status, tentativas)
+    SELECT md5(g::text), 'jr-' || g, '{}'::json,
+           CASE WHEN g % 1000 = 0 THEN 'pendente' ELSE 'processado' END, 1
+    FROM generate_series(1, :n / 10) g
+    """,
+]
+
+
+def consultas():
+    """(nome, instrução) das consultas quentes, montadas como no código da aplicação"""
+    lote = "lote-42"
+    disponivel_fila = or_(
+        JuditQueueItem.status == "pendente",
+        and_(JuditQueueItem.status == "processando", JuditQueueItem.lease_ate < func.now())
+    )
+    disponivel_inbox = or_(
+        JuditWebhookInbox.status == "pendente",
+        and_(JuditWebhookInbox.status == "processando", JuditWebhookInbox.lease_ate < func.now())
+    )
+    return [
+        ("fila: reivindicar (judit_queue.reivindicar)",
+         select(JuditQueueItem.id).where(disponivel_fila).order_by(JuditQueueItem.id).limit(50)),
+        ("fila: reivindicar do lote",
+         select(JuditQueueItem.id).where(disponivel_fila, JuditQueueItem.batch_id == lote)
+         .order_by(JuditQueueItem.id).limit(50)),
+        ("fila: itens abertos do lote (judit_queue.itens_abertos)",
+         select(func.count()).select_from(JuditQueueItem).where(
+             JuditQueueItem.batch_id == lote, JuditQueueItem.status.in_(("pendente", "processando")))),
+        ("lote: requisições aguardando (_finalizar_batch)",
+         select(func.count()).select_from(JuditRequest).where(
+             JuditRequest.batch_id == lote, JuditRequest.status == "aguardando")),
+        ("webhook: requisições por judit_request_id",
+         select(JuditRequest).where(JuditRequest.judit_request_id == "jr-4242")),
+        ("varredura: aguardando há mais de 24h",
+         select(JuditRequest.id).where(
+             JuditRequest.status == "aguardando",
+             JuditRequest.created_at < func.now() - text("interval '24 hours'")).limit(500)),
+        ("webhook: caixa de entrada (judit_inbox.reivindicar)",
+         select(JuditWebhookInbox.id).where(disponivel_inbox).order_by(JuditWebhookInbox.id).limit(100)),
+        ("/resultados: página do lote",
+         select(JuditResult.id, JuditResult.documento, JuditResult.status)
+         .where(JuditResult.batch_id == lote, JuditResult.id > 0).order_by(JuditResult.id).limit(500)),
+        ("/resultados: erros do lote",
+         select(JuditResult.id).where(JuditResult.batch_id == lote, JuditResult.status == "erro")
+         .order_by(JuditResult.id).limit(500)),
+        ("/batches: mais recentes",
+         select(JuditBatch).order_by(JuditBatch.created_at.desc()).limit(50)),
+    ]
+
+
+def _explain(conexao, instrucao):
+    sql = str(instrucao.compile(dialect=conexao.dialect, compile_kwargs={"literal_binds": True}))
+    linhas = conexao.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar()
+    plano = linhas[0]
+    return plano["Plan"], plano["Execution Time"]
+
+
+def _resumo(no):
+    """Nó principal do plano: tipo + índice/tabela"""
+    while no.get("Node Type") in ("Limit", "Aggregate", "Sort") and no.get("Plans"):
+        no = no["Plans"][0]
+    alvo = no.get("Index Name") or no.get("Relation Name") or ""
+    return f"{no['Node Type']} {alvo}".strip()
+
+
+def _texto(no, nivel=0):
+    linhas = ["  " * nivel + f"-> {no['Node Type']} {no.get('Index Name') or no.get('Relation Name') or ''}"
+              f" (linhas={no.get('Actual Rows')}, tempo={no.get('Actual Total Time')} ms)"]
+    for filho in no.get("Plans", []):
+        linhas += _texto(filho, nivel + 1)
+    return linhas
+
+
+def _medir(conexao):
+    resultados = {}
+    for nome, instrucao in consultas():
+        _explain(conexao, instrucao)  # aquece o cache
+        resultados[nome] = _explain(conexao, instrucao)
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE das consultas Judit com massa sintética")
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="Linhas em judit_results/requests/queue")
+    parser.add_argument("--saida", help="Grava o relatório em Markdown neste arquivo")
+    parser.add_argument("--planos", action="store_true", help="Inclui as árvores dos planos")
+    parser.add_argument("--manter", action="store_true", help="Não remove o schema ao final")
+    args = parser.parse_args(argv)
+
+    if engine.dialect.name != "postgresql":
+        print("✗ O relatório precisa de PostgreSQL (DATABASE_URL)")
+        return 1
+
+    indices = {
+        indice.name: indice
+        for tabela in Base.metadata.sorted_tables for indice in tabela.indexes
+        if indice.name in INDICES_NOVOS
+    }
+
+    with engine.connect() as conexao:
+        conexao = conexao.execution_options(schema_translate_map={None: SCHEMA})
+        conexao.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conexao.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conexao.execute(text(f"SET search_path TO {SCHEMA}"))
+        conexao.commit()
+
+        try:
+            tabelas = [
+                Base.metadata.tables[nome] for nome in
+                ("judit_batches", "judit_requests", "judit_results", "judit_queue", "judit_webhook_inbox")
+            ]
+            Base.metadata.create_all(conexao, tables=tabelas)
+
+            print(f"Gerando {args.linhas} linhas sintéticas...")
+            inicio = time.monotonic()
+            for sql in CARGA:
+                conexao.execute(text(sql), {"n": args.linhas, "lotes": LOTES})
+            conexao.commit()
+            print(f"  carga em {time.monotonic() - inicio:.1f}s")
+
+            # Sem os índices novos
+            for nome in INDICES_NOVOS:
+                conexao.execute(text(f"DROP INDEX IF EXISTS {SCHEMA}.{nome}"))
+            conexao.execute(text("ANALYZE"))
+            conexao.commit()
+            antes = _medir(conexao)
+
+            # Com os índices novos
+            for nome in INDICES_NOVOS:
+                indices[nome].create(conexao)
+            conexao.execute(text("ANALYZE"))
+            conexao.commit()
+            depois = _medir(conexao)
+        finally:
+            if not args.manter:
+                conexao.rollback()
+                conexao.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                conexao.commit()
+
+    relatorio = [
+        f"# EXPLAIN ANALYZE - consultas Judit ({args.linhas} linhas)",
+        "",
+        "| Consulta | Sem índices novos | ms | Com índices novos | ms |",
+        "|---|---|---:|---|---:|",
+    ]
+    for nome, _ in consultas():
+        plano_antes, tempo_antes = antes[nome]
+        plano_depois, tempo_depois = depois[nome]
+        relatorio.append(
+            f"| {nome} | {_resumo(plano_antes)} | {tempo_antes:.2f} "
+            f"| {_resumo(plano_depois)} | {tempo_depois:.2f} |"
+        )
+
+    if args.planos:
+        for nome, _ in consultas():
+            relatorio += ["", f"## {nome}", "", "Sem índices novos:", "```"]
+            relatorio += _texto(antes[nome][0]) + ["```", "", "Com índices novos:", "```"]
+            relatorio += _texto(depois[nome][0]) + ["```"]
+
+    texto = "\n".join(relatorio) + "\n"
+    print(texto)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto)
+        print(f"✓ Relatório gravado em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Manutenção das partições mensais e da retenção de judit_results / judit_requests
+
+Uso:
+    python judit_retencao.py particoes [--meses-a-frente 3]
+    python judit_retencao.py arquivar [--meses 12] [--diretorio arquivo_judit]
+    python judit_retencao.py restaurar arquivo_judit/judit_results_2025_01.parquet [...] [--dias 30]
+"""
+import argparse
+import sys
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services import judit_retention
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partições e retenção dos resultados Judit")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    particoes = comandos.add_parser("particoes", help="Cria as partições dos próximos meses")
+    particoes.add_argument("--meses-a-frente", type=int, default=settings.JUDIT_PARTICOES_A_FRENTE)
+
+    arquivar = comandos.add_parser("arquivar", help="Arquiva e remove os meses fora da retenção")
+    arquivar.add_argument("--meses", type=int, default=settings.JUDIT_RETENCAO_MESES,
+                          help="Meses mantidos no banco, contando o atual")
+    arquivar.add_argument("--diretorio", default=settings.JUDIT_ARQUIVO_DIR)
+
+    restaurar = comandos.add_parser("restaurar", help="Devolve ao banco meses arquivados")
+    restaurar.add_argument("arquivos", nargs="+")
+    restaurar.add_argument("--dias", type=float, default=settings.JUDIT_RESTAURACAO_DIAS,
+                           help="Dias até a retenção voltar a arquivar o mês")
+
+    args = parser.parse_args(argv)
+    db = SessionLocal()
+
+    try:
+        if args.comando == "particoes":
+            criadas = judit_retention.garantir_particoes(db, args.meses_a_frente)
+            print(f"✓ {len(criadas)} partições criadas")
+        elif args.comando == "arquivar":
+            if args.meses <= 0:
+                print("✗ Informe --meses ou configure JUDIT_RETENCAO_MESES")
+                return 1
+            arquivos = judit_retention.arquivar(db, args.meses, args.diretorio)
+            print(f"✓ {len(arquivos)} arquivos gerados")
+        else:
+            total = sum(judit_retention.restaurar(db, arquivo, args.dias) for arquivo in args.arquivos)
+            print(f"✓ {total} linhas restauradas")
+    except Exception as e:
+        print(f"✗ Erro: {e}")
+        return 1
+    finally:
+        db.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Sincronização do espelho local do Pipedrive
+
+A primeira execução faz a carga completa; as seguintes são incrementais
+(update_time), a menos que --completo seja usado. --reindexar reconstrói
+o índice de CPF/CNPJ (pipedrive_documentos) a partir do espelho.
+
+Uso:
+    python sincronizar_pipedrive.py [--completo]
+    python sincronizar_pipedrive.py --reindexar
+"""
+import argparse
+import sys
+
+from app.db.base import SessionLocal
+from app.services import pipedrive_sync, pipedrive_documentos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sincroniza o espelho local do Pipedrive")
+    parser.add_argument("--completo", action="store_true", help="Relê todas as entidades do Pipedrive")
+    parser.add_argument("--reindexar", action="store_true", help="Só reconstrói o índice de CPF/CNPJ")
+    args = parser.parse_args(argv)
+
+    if args.reindexar:
+        db = SessionLocal()
+        try:
+            print(f"✓ {pipedrive_documentos.reindexar(db)} documentos indexados")
+        finally:
+            db.close()
+        return 0
+
+    totais = pipedrive_sync.sincronizar(completo=args.completo)
+
+    db = SessionLocal()
+    try:
+        espelho = pipedrive_sync.frescor(db)
+    finally:
+        db.close()
+
+    if not espelho or espelho.get("erro"):
+        print(f"✗ Espelho não sincronizado: {(espelho or {}).get('erro') or 'sem carga completa'}")
+        return 1
+    for entidade, total in totais.items():
+        print(f"  {entidade}: {total}")
+    print(f"✓ Espelho sincronizado em {espelho['sincronizado_at']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
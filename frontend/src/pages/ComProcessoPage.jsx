@@ -6,7 +6,6 @@ import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { FileDown, RefreshCw, CheckSquare, Square, Search, ChevronLeft, ChevronRight } from 'lucide-react';
 import ProcessosModal from '../components/ProcessosModal';
-import * as XLSX from 'xlsx';
 
 export default function ComProcessoPage() {
   const [batches, setBatches] = useState([]);
@@ -69,13 +68,11 @@ export default function ComProcessoPage() {
     try {
       setLoading(true);
       setSelectedBatch(batchId);
-      const response = await juditService.obterResultados(batchId);
+      // Filtra no servidor apenas processos encontrados (status sucesso e quantidade > 0), sem o JSON dos processos
+      const response = await juditService.obterTodosResultados(batchId, { comProcessos: true });
       
       if (response.success) {
-        // Filtra apenas processos encontrados (status sucesso e quantidade > 0)
-        const processosEncontrados = response.data.resultados.filter(
-          r => r.status === 'sucesso' && r.qtd_processos > 0
-        );
+        const processosEncontrados = response.data.resultados;
         setResultados(processosEncontrados);
         setResultadosFiltrados(processosEncontrados);
         setSelectedItems(new Set());
@@ -135,54 +132,32 @@ export default function ComProcessoPage() {
     setSelectAll(newSelected.size === resultados.length);
   };
 
+  // A listagem vem sem o JSON dos processos; busca sob demanda para os registros informados
+  const carregarProcessos = async (lista) => {
+    const semProcessos = lista.filter(r => !r.processos);
+    const processosPorId = {};
+
+    for (let i = 0; i < semProcessos.length; i += 200) {
+      const ids = semProcessos.slice(i, i + 200).map(r => r.id);
+      const response = await juditService.obterResultados(selectedBatch, {
+        ids,
+        fields: ['processos'],
+        limite: ids.length
+      });
+      response.data.resultados.forEach(r => { processosPorId[r.id] = r.processos; });
+    }
+
+    return lista.map(r => (r.processos ? r : { ...r, processos: processosPorId[r.id] || [] }));
+  };
+
   const exportarExcel = () => {
     if (resultados.length === 0) {
       alert('Nenhum dado para exportar');
       return;
     }
 
-    // Prepara dados para exportação
-    const dadosExportacao = resultados.flatMap(resultado => {
-      if (!resultado.processos || resultado.processos.length === 0) {
-        return [{
-          'Documento': resultado.documento,
-          'Tipo': resultado.doc_type,
-          'Nome': resultado.nome,
-          'Empresa': resultado.empresa,
-          'Quantidade Processos': resultado.qtd_processos,
-          'Status': resultado.status
-        }];
-      }
-
-      return resultado.processos.map(processo => ({
-        'Documento': resultado.documento,
-        'Tipo': resultado.doc_type,
-        'Nome': resultado.nome,
-        'Empresa': resultado.empresa,
-        'Número CNJ': processo.code || '',
-        'Tribunal': processo.tribunal_acronym || '',
-        'Justiça': processo.justice || '',
-        'Instância': processo.instance || '',
-        'Valor Causa': processo.amount || '',
-        'Data Distribuição': processo.distribution_date || '',
-        'Fase': processo.phase || '',
-        'Status Processo': processo.status || '',
-        'Polo Ativo': processo.parties?.filter(p => p.side === 'Active').map(p => p.name).join('; ') || '',
-        'Polo Passivo': processo.parties?.filter(p => p.side === 'Passive').map(p => p.name).join('; ') || '',
-        'Classe': processo.classifications?.map(c => c.name).join('; ') || '',
-        'Assunto': processo.subjects?.map(s => s.name).join('; ') || '',
-        'Vara': processo.courts?.map(c => c.name).join('; ') || ''
-      }));
-    });
-
-    // Cria planilha
-    const ws = XLSX.utils.json_to_sheet(dadosExportacao);
-    const wb = XLSX.utils.book_new();
-    XLSX.utils.book_append_sheet(wb, ws, 'Processos');
-
-    // Salva arquivo
-    const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
-    XLSX.writeFile(wb, `processos_encontrados_${timestamp}.xlsx`);
+    // Planilha gerada no servidor em streaming (uma linha por processo)
+    juditService.exportarResultados(selectedBatch, 'xlsx', { comProcessos: true });
   };
 
   // Valida se CPF e CNPJ aparecem juntos no processo
@@ -253,7 +228,7 @@ export default function ComProcessoPage() {
   };
 
   const atualizarPipedrive = async () => {
-    const selecionados = Array.from(selectedItems).map(idx => resultados[idx]);
+    let selecionados = Array.from(selectedItems).map(idx => resultados[idx]);
     if (selecionados.length === 0) {
       alert('Selecione pelo menos um item');
       return;
@@ -261,6 +236,7 @@ export default function ComProcessoPage() {
 
     try {
       setLoading(true);
+      selecionados = await carregarProcessos(selecionados);
       
       let totalProcessosValidos = 0;
       let totalProcessosInvalidos = 0;
@@ -322,9 +298,14 @@ export default function ComProcessoPage() {
     }
   };
 
-  const abrirModal = (resultado) => {
-    setResultadoSelecionado(resultado);
-    setModalAberto(true);
+  const abrirModal = async (resultado) => {
+    try {
+      const [completo] = await carregarProcessos([resultado]);
+      setResultadoSelecionado(completo);
+      setModalAberto(true);
+    } catch (error) {
+      console.error('Erro ao carregar processos:', error);
+    }
   };
 
   // Paginação
@@ -1,6 +1,6 @@
 import { useState, useRef, useEffect } from 'react';
 import MainLayout from '../components/layout/MainLayout';
-import { FileSearch, Play, Pause, Save, RotateCcw, Upload, Database } from 'lucide-react';
+import { FileSearch, Play, Pause, Save, RotateCcw, Upload, Database, Layers } from 'lucide-react';
 import { Button } from '../components/ui/button';
 import * as XLSX from 'xlsx';
 import { juditService } from '../services/juditService';
@@ -44,6 +44,7 @@ export default function ProcessarJuditPage() {
   const [statusProcessamento, setStatusProcessamento] = useState(null);
   const fileInputRef = useRef(null);
   const pollingIntervalRef = useRef(null);
+  const eventSourceRef = useRef(null);
 
   // Salva estados no localStorage
   useEffect(() => {
@@ -225,8 +226,8 @@ export default function ProcessarJuditPage() {
         addLog(`✓ ${response.message}`, 'success');
         addLog('Aguardando respostas via webhook...', 'info');
         
-        // Inicia polling para verificar status
-        iniciarPolling(newBatchId);
+        // Acompanha o status via SSE (polling só se o stream falhar)
+        iniciarAcompanhamento(newBatchId);
       } else {
         addLog('Erro ao iniciar processamento', 'error');
         setProcessando(false);
@@ -268,8 +269,8 @@ export default function ProcessarJuditPage() {
         addLog(`✓ ${response.message}`, 'success');
         addLog('Consultando banco de dados da Judit.io...', 'info');
         
-        // Inicia polling para verificar status
-        iniciarPolling(newBatchId);
+        // Acompanha o status via SSE (polling só se o stream falhar)
+        iniciarAcompanhamento(newBatchId);
       } else {
         addLog('Erro ao iniciar processamento', 'error');
         setProcessando(false);
@@ -280,6 +281,99 @@ export default function ProcessarJuditPage() {
     }
   };
 
+  const processarHibrido = async () => {
+    setModalTipoBuscaAberto(false);
+    setProcessando(true);
+    setPausado(false);
+    addLog('Iniciando busca HÍBRIDA (banco de dados + tempo real quando necessário)...', 'info');
+    addLog('ℹ️ Registros sem processos ou desatualizados serão reconsultados em tempo real', 'info');
+    addLog(`Total de registros: ${dadosCarregados.length}`, 'info');
+
+    try {
+      // Transforma dados mapeando as colunas corretamente
+      const dadosFormatados = dadosCarregados.map(item => ({
+        'ID': mapeamento.id ? item[mapeamento.id] || '' : '',
+        'Título': item[mapeamento.nome] || '',
+        'Pessoa': item[mapeamento.nome] || '',
+        'Organização': item[mapeamento.empresa] || '',
+        'CPF': item[mapeamento.cpf] || '',
+        'CNPJ': item[mapeamento.cnpj] || ''
+      }));
+
+      addLog('Enviando dados para API Judit.io...', 'info');
+      
+      // Envia dados para processamento
+      const response = await juditService.processar(dadosFormatados, false, true, true);
+      
+      if (response.success) {
+        const newBatchId = response.batch_id;
+        setBatchId(newBatchId);
+        addLog(`✓ Batch iniciado: ${newBatchId}`, 'success');
+        addLog(`✓ ${response.message}`, 'success');
+        addLog(`Até ${response.max_escalonamentos} registros podem ir para o tempo real`, 'info');
+        
+        // Acompanha o status via SSE (polling só se o stream falhar)
+        iniciarAcompanhamento(newBatchId);
+      } else {
+        addLog('Erro ao iniciar processamento', 'error');
+        setProcessando(false);
+      }
+    } catch (error) {
+      addLog(`Erro: ${error.message}`, 'error');
+      setProcessando(false);
+    }
+  };
+
+  const pararAcompanhamento = () => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+    if (pollingIntervalRef.current) {
+      clearInterval(pollingIntervalRef.current);
+      pollingIntervalRef.current = null;
+    }
+  };
+
+  const finalizarAcompanhamento = async (batchId, status) => {
+    const { sucesso, erro } = status;
+    pararAcompanhamento();
+    setProcessando(false);
+    
+    if (status.status === 'concluído') {
+      addLog(`✓ Processamento concluído! Total: ${sucesso} sucessos, ${erro} erros`, 'success');
+      
+      // Carrega resultados
+      const resultadosResponse = await juditService.obterTodosResultados(batchId);
+      if (resultadosResponse.success) {
+        setResultados(resultadosResponse.data.resultados);
+        addLog(`Resultados carregados: ${resultadosResponse.data.resultados.length} registros`, 'success');
+      }
+    } else {
+      addLog('Processamento finalizado com erro', 'error');
+    }
+  };
+
+  const iniciarAcompanhamento = (batchId) => {
+    pararAcompanhamento();
+
+    eventSourceRef.current = juditService.acompanharStatus(batchId, {
+      onProgresso: (status) => {
+        setStatusProcessamento(status);
+        const { total, processados, sucesso, erro } = status;
+        addLog(`Status: ${processados}/${total} processados (${sucesso} sucesso, ${erro} erros)`, 'info');
+      },
+      onFim: (status) => {
+        setStatusProcessamento(status);
+        finalizarAcompanhamento(batchId, status);
+      },
+      onErro: () => {
+        eventSourceRef.current = null;
+        iniciarPolling(batchId);
+      }
+    });
+  };
+
   const iniciarPolling = (batchId) => {
     // Limpa polling anterior se existir
     if (pollingIntervalRef.current) {
@@ -300,21 +394,7 @@ export default function ProcessarJuditPage() {
           
           // Se concluído, para o polling
           if (status.status === 'concluído' || status.status === 'erro') {
-            clearInterval(pollingIntervalRef.current);
-            setProcessando(false);
-            
-            if (status.status === 'concluído') {
-              addLog(`✓ Processamento concluído! Total: ${sucesso} sucessos, ${erro} erros`, 'success');
-              
-              // Carrega resultados
-              const resultadosResponse = await juditService.obterResultados(batchId);
-              if (resultadosResponse.success) {
-                setResultados(resultadosResponse.data.resultados);
-                addLog(`Resultados carregados: ${resultadosResponse.data.resultados.length} registros`, 'success');
-              }
-            } else {
-              addLog('Processamento finalizado com erro', 'error');
-            }
+            await finalizarAcompanhamento(batchId, status);
           }
         }
       } catch (error) {
@@ -323,13 +403,9 @@ export default function ProcessarJuditPage() {
     }, 3000);
   };
 
-  // Limpa polling ao desmontar componente
+  // Limpa stream/polling ao desmontar componente
   useEffect(() => {
-    return () => {
-      if (pollingIntervalRef.current) {
-        clearInterval(pollingIntervalRef.current);
-      }
-    };
+    return () => pararAcompanhamento();
   }, []);
 
   const handlePausar = () => {
@@ -363,11 +439,8 @@ export default function ProcessarJuditPage() {
     setBatchId(null);
     setStatusProcessamento(null);
     
-    // Limpa polling se estiver ativo
-    if (pollingIntervalRef.current) {
-      clearInterval(pollingIntervalRef.current);
-      pollingIntervalRef.current = null;
-    }
+    // Limpa stream/polling se estiver ativo
+    pararAcompanhamento();
     
     // LIMPA TUDO DO LOCALSTORAGE
     localStorage.removeItem('processar_arquivo');
@@ -689,13 +762,13 @@ export default function ProcessarJuditPage() {
         {/* Modal de Seleção de Tipo de Busca */}
         {modalTipoBuscaAberto && (
           <div className="fixed inset-0 bg-black/50 flex items-center justify-center z-50">
-            <div className="bg-card border rounded-lg p-6 max-w-2xl w-full mx-4">
+            <div className="bg-card border rounded-lg p-6 max-w-4xl w-full mx-4">
               <h3 className="text-xl font-bold mb-4">Selecione o Tipo de Busca</h3>
               <p className="text-muted-foreground mb-6">
                 Escolha como deseja processar os dados na API Judit.io:
               </p>
 
-              <div className="grid grid-cols-1 md:grid-cols-2 gap-4 mb-6">
+              <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">
                 {/* Opção 1: Tempo Real */}
                 <button
                   onClick={processarComTempoReal}
@@ -741,6 +814,29 @@ export default function ProcessarJuditPage() {
                     </div>
                   </div>
                 </button>
+
+                {/* Opção 3: Híbrido */}
+                <button
+                  onClick={processarHibrido}
+                  className="p-6 border-2 rounded-lg hover:border-purple-500 hover:bg-purple-50 dark:hover:bg-purple-950 transition-all text-left"
+                >
+                  <div className="flex items-start gap-3">
+                    <div className="p-2 bg-purple-100 dark:bg-purple-900 rounded">
+                      <Layers className="h-6 w-6 text-purple-600 dark:text-purple-400" />
+                    </div>
+                    <div>
+                      <h4 className="font-bold text-lg mb-2">Híbrido</h4>
+                      <p className="text-sm text-muted-foreground mb-3">
+                        Banco de dados, com tempo real só quando necessário
+                      </p>
+                      <div className="space-y-1 text-sm">
+                        <p className="text-green-600 dark:text-green-400">✓ Rápido na maioria dos registros</p>
+                        <p className="text-green-600 dark:text-green-400">✓ Reconsulta sem processos ou desatualizados</p>
+                        <p className="text-blue-600 dark:text-blue-400">ℹ️ Tempo real limitado por lote</p>
+                      </div>
+                    </div>
+                  </div>
+                </button>
               </div>
 
               <div className="flex justify-end">
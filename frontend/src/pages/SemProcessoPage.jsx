@@ -6,7 +6,6 @@ import { pipedriveService } from '../services/pipedriveService';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
 import { FileDown, RefreshCw, CheckSquare, Square, FileText, Search, ChevronLeft, ChevronRight } from 'lucide-react';
-import * as XLSX from 'xlsx';
 
 export default function SemProcessoPage() {
   const [batches, setBatches] = useState([]);
@@ -68,13 +67,11 @@ export default function SemProcessoPage() {
     try {
       setLoading(true);
       setSelectedBatch(batchId);
-      const response = await juditService.obterResultados(batchId);
+      // Filtra no servidor apenas registros SEM processo (quantidade = 0 ou erro)
+      const response = await juditService.obterTodosResultados(batchId, { comProcessos: false });
       
       if (response.success) {
-        // Filtra apenas registros SEM processo (quantidade = 0 ou erro)
-        const semProcesso = response.data.resultados.filter(
-          r => r.status === 'erro' || r.qtd_processos === 0
-        );
+        const semProcesso = response.data.resultados;
         setResultados(semProcesso);
         setResultadosFiltrados(semProcesso);
         setSelectedItems(new Set());
@@ -141,25 +138,8 @@ export default function SemProcessoPage() {
       return;
     }
 
-    // Prepara dados para exportação
-    const dadosExportacao = resultados.map(resultado => ({
-      'Documento': resultado.documento,
-      'Tipo': resultado.doc_type,
-      'Nome': resultado.nome,
-      'Empresa': resultado.empresa,
-      'Status': resultado.status,
-      'Erro': resultado.erro || '',
-      'Processado em': resultado.processado_at ? new Date(resultado.processado_at).toLocaleString() : ''
-    }));
-
-    // Cria planilha
-    const ws = XLSX.utils.json_to_sheet(dadosExportacao);
-    const wb = XLSX.utils.book_new();
-    XLSX.utils.book_append_sheet(wb, ws, 'Sem Processo');
-
-    // Salva arquivo
-    const timestamp = new Date().toISOString().slice(0, 19).replace(/:/g, '-');
-    XLSX.writeFile(wb, `sem_processo_${timestamp}.xlsx`);
+    // Planilha gerada no servidor em streaming
+    juditService.exportarResultados(selectedBatch, 'xlsx', { comProcessos: false });
   };
 
   const atualizarPipedrive = async () => {
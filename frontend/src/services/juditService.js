@@ -2,7 +2,8 @@ const API_URL = `${import.meta.env.VITE_API_URL || 'https://processoscanpro.aten
 
 export const juditService = {
   // Inicia processamento
-  async processar(dados, onDemand = false, withAttachments = true) {
+  // hibrido: banco de dados primeiro, on-demand só para quem não tem resultado atualizado
+  async processar(dados, onDemand = false, withAttachments = true, hibrido = false) {
     try {
       const response = await fetch(`${API_URL}/processar`, {
         method: 'POST',
@@ -12,6 +13,7 @@ export const juditService = {
         body: JSON.stringify({
           dados,
           on_demand: onDemand,
+          hibrido,
           with_attachments: withAttachments
         })
       });
@@ -43,10 +45,49 @@ export const juditService = {
     }
   },
 
-  // Obtém resultados
-  async obterResultados(batchId) {
+  // Acompanha o progresso via Server-Sent Events (substitui o polling de obterStatus)
+  // onProgresso recebe o status completo; os eventos do servidor trazem só os campos alterados
+  acompanharStatus(batchId, { onProgresso, onFim, onErro } = {}) {
+    const source = new EventSource(`${API_URL}/status/${batchId}/stream`);
+    let status = null;
+
+    source.addEventListener('progresso', (event) => {
+      status = { ...status, ...JSON.parse(event.data) };
+      onProgresso?.(status);
+    });
+
+    source.addEventListener('fim', (event) => {
+      status = { ...status, ...JSON.parse(event.data) };
+      source.close();
+      onFim?.(status);
+    });
+
+    source.onerror = (error) => {
+      // Sem SSE (proxy/conexão): quem chamou pode voltar ao polling
+      source.close();
+      onErro?.(error);
+    };
+
+    return source;
+  },
+
+  // Obtém uma página de resultados
+  // filtros: { cursor, limite, fields, comProcessos, status, docType, ids }
+  // "processos" só é retornado quando incluído em fields
+  async obterResultados(batchId, filtros = {}) {
     try {
-      const response = await fetch(`${API_URL}/resultados/${batchId}`);
+      const params = new URLSearchParams();
+      const { cursor, limite, fields, comProcessos, status, docType, ids } = filtros;
+      if (cursor != null) params.set('cursor', cursor);
+      if (limite) params.set('limite', limite);
+      if (fields) params.set('fields', Array.isArray(fields) ? fields.join(',') : fields);
+      if (comProcessos != null) params.set('com_processos', comProcessos);
+      if (status) params.set('status', status);
+      if (docType) params.set('doc_type', docType);
+      if (ids) params.set('ids', Array.isArray(ids) ? ids.join(',') : ids);
+
+      const query = params.toString();
+      const response = await fetch(`${API_URL}/resultados/${batchId}${query ? `?${query}` : ''}`);
       
       if (!response.ok) {
         throw new Error(`Erro ao obter resultados: ${response.status}`);
@@ -59,10 +100,50 @@ export const juditService = {
     }
   },
 
-  // Lista todos os batches
-  async listarBatches() {
+  // Percorre todas as páginas de resultados (mesmos filtros de obterResultados)
+  async obterTodosResultados(batchId, filtros = {}) {
+    let cursor = null;
+    let dados = null;
+    const resultados = [];
+
+    do {
+      const response = await this.obterResultados(batchId, { limite: 2000, ...filtros, cursor });
+      dados = response.data;
+      resultados.push(...dados.resultados);
+      cursor = dados.proximo_cursor;
+    } while (cursor != null);
+
+    return { success: true, data: { ...dados, resultados, proximo_cursor: null } };
+  },
+
+  // Baixa a exportação gerada no servidor (format: 'xlsx' | 'csv' | 'ndjson')
+  exportarResultados(batchId, format = 'xlsx', { comProcessos, status, docType } = {}) {
+    const params = new URLSearchParams({ format });
+    if (comProcessos != null) params.set('com_processos', comProcessos);
+    if (status) params.set('status', status);
+    if (docType) params.set('doc_type', docType);
+
+    const link = document.createElement('a');
+    link.href = `${API_URL}/resultados/${batchId}/export?${params}`;
+    link.download = `resultados_${batchId}.${format}`;
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+  },
+
+  // Lista os batches (mais recentes primeiro, paginados por cursor)
+  async listarBatches(filtros = {}) {
     try {
-      const response = await fetch(`${API_URL}/batches`);
+      const params = new URLSearchParams();
+      const { cursor, limite, status, criadoDe, criadoAte } = filtros;
+      if (cursor) params.set('cursor', cursor);
+      if (limite) params.set('limite', limite);
+      if (status) params.set('status', status);
+      if (criadoDe) params.set('criado_de', criadoDe);
+      if (criadoAte) params.set('criado_ate', criadoAte);
+
+      const query = params.toString();
+      const response = await fetch(`${API_URL}/batches${query ? `?${query}` : ''}`);
       
       if (!response.ok) {
         throw new Error(`Erro ao listar batches: ${response.status}`);